@@ -1,26 +1,357 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, Blueprint, current_app, g, jsonify, render_template, request, redirect, url_for, session, flash, send_from_directory, abort, Response
 import sqlite3
-from datetime import datetime
+import time
+from datetime import timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from pathlib import Path
 
-# Usar la misma lógica de ruta que db.py
-BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH = BASE_DIR / "hotel_reservas.db"
+import assets
+import compresion
+from catalogo import Catalogo, IndiceDisponibilidad
+from db import DB_PATH, BaseDatos, dia
+from escritor import EscritorUnico
+from limites import CubetasSQLite, Limitador
+import noches
+import plantillas
+from replica import Replica
+from reportes import ReportesHotel
+from shards import EnrutadorHoteles, ShardInexistente
+from validacion import EntradaInvalida, Validador, esquemas_hotel
+from metricas_live import MetricasEnVivo, DEFAULT_CSV, DASHBOARDS_DIR, FIGS_DIR
 
-app = Flask(__name__)
-app.secret_key = "dev-secret-key-change-me"
+CONFIG_DEFECTO = {
+    "SECRET_KEY": "dev-secret-key-change-me",
+    # Ruta (o URI file:...) de la BD de esta instancia
+    "DATABASE": str(DB_PATH),
+    "METRICS_CSV": str(DEFAULT_CSV),
+    # Crear tablas y datos iniciales al construir la app
+    "INIT_DB": False,
+    # Aplicar las migraciones pendientes (db.MIGRACIONES) al construir la app y al abrir cada shard
+    "MIGRAR_DB": True,
+    # Cargar catálogo, índice de disponibilidad y plantillas al construir la app
+    "PRECARGAR": True,
+    # Directorio con una BD por hotel (ver shards.py); None desactiva las rutas /h/<hotel_id>/
+    "SHARDS_DIR": None,
+    "SHARDS_WORKERS": 8,
+    # Escrituras (/register, /book, /pay) por un único hilo escritor con commit agrupado
+    "ESCRITOR_UNICO": False,
+    "ESCRITOR_MAX_LOTE": 64,
+    # Réplica de lectura para /search: None, "memoria" o "archivo" (<bd>.replica.{0,1}.db junto a cada BD)
+    "REPLICA": None,
+    # Desfase máximo (s) de la réplica y período (s) de refresco en segundo plano (0 = solo bajo demanda)
+    "REPLICA_MAX_DESFASE": 2.0,
+    "REPLICA_INTERVALO": 1.0,
+    # Tabla room_nights (ver noches.py): migra y completa la BD al construir; /book la mantiene
+    "ROOM_NIGHTS": False,
+    # Con ROOM_NIGHTS, minutos tras los que una reserva sin pagar expira y libera sus noches (None = nunca)
+    "PENDIENTES_EXPIRAN_MIN": None,
+    # Máximo de días de flexibilidad (±) aceptados por /search/matriz
+    "FLEX_MAXIMO": 14,
+    # Límite de tasa por IP y por usuario: {ruta: (capacidad, tokens por segundo)}, en POST
+    "LIMITES": {"login": (5, 0.2), "search": (30, 5.0), "book": (10, 1.0), "reportes": (10, 0.5)},
+    # Rutas de LIMITES que también se limitan en GET (lecturas caras)
+    "LIMITES_GET": ("reportes",),
+    # None: activos salvo con TESTING
+    "LIMITES_ACTIVOS": None,
+    # BD SQLite para compartir las cubetas entre workers (None = en memoria de cada proceso)
+    "LIMITES_DB": None,
+    # Control de admisión (503): peticiones caras en curso y tiempo medio de escritura (s) máximos
+    "ADMISION_MAX_EN_CURSO": 32,
+    "ADMISION_MAX_ESCRITURA": 0.5,
+    # Noches máximas de una estadía en /search, /search/matriz y /book
+    "ESTADIA_MAXIMA": 30,
+    # Días máximos del período de /reportes
+    "REPORTE_MAXIMO_DIAS": 731,
+    # Assets compilados (ver assets.py): directorio y compilación al construir (None: salvo con TESTING)
+    "ASSETS_DIR": str(assets.DIST_DIR),
+    "ASSETS_COMPILAR": None,
+    # Compresión gzip/brotli y ETag débil de las respuestas (ver compresion.py)
+    "COMPRESION": True,
+    # Bytes mínimos para comprimir y nivel (1-9; brotli se escala a 0-11)
+    "COMPRESION_MINIMO": 512,
+    "COMPRESION_NIVEL": 6,
+    # Opciones por endpoint: {"hotel.search_matriz": {"comprimir": False, "etag": True, "minimo": 2048}}
+    "COMPRESION_RUTAS": {},
+    # Directorio para el bytecode compilado de las plantillas (None = sin caché en disco)
+    "PLANTILLAS_CACHE_DIR": None,
+    # Fragmentos renderizados en caché ({% fragmento %}, ver plantillas.py); 0 desactiva
+    "FRAGMENTOS_MAX": 512,
+    # Desde cuántas habitaciones disponibles /search envía los resultados por partes
+    "STREAM_MINIMO": 200,
+}
+
+# Archivos que /metrics/dashboard/ y /metrics/figs/ publican; el resto del directorio responde 404
+EXTENSIONES_DASHBOARD = {".html", ".css", ".js", ".json"}
+EXTENSIONES_FIGS = {".png", ".svg"}
+
+hotel = Blueprint("hotel", __name__)
+hoteles = Blueprint("hoteles", __name__, url_prefix="/hoteles")
+metrics = Blueprint("metrics", __name__, url_prefix="/metrics")
+
+
+class RecursosHotel:
+    """
+    Estado de una instancia de la app: backend de BD y cachés construidas sobre él.
+
+    Con `replica`, catálogo e índice de disponibilidad leen de la réplica; las escrituras
+    (y la verificación de solapamiento de /book) siempre van a la BD principal.
+    """
+
+    def __init__(self, db, metrics_csv=DEFAULT_CSV, escritor_unico=False, max_lote=64, replica=None):
+        self.db = db
+        self.replica = replica
+        lectura = replica or db
+        self.catalogo = Catalogo(lectura)
+        self.disponibilidad = IndiceDisponibilidad(lectura)
+        self.reportes = ReportesHotel(lectura)
+        self.metrics_csv = str(metrics_csv)
+        self.escritor = EscritorUnico(db, max_lote=max_lote) if escritor_unico else None
+        self._demora = 0.0
+        self._ultima_escritura = 0.0
+        self._metricas = None
+
+    @property
+    def metricas(self):
+        if self._metricas is None:
+            self._metricas = MetricasEnVivo(self.metrics_csv)
+        return self._metricas
+
+    def precargar(self):
+        self.catalogo.cargar()
+        self.disponibilidad.sincronizar()
+
+    @property
+    def tiempo_escritura(self):
+        """Media móvil del tiempo de cada escritura (con la espera del lock); 0 si no hubo en los últimos 5 s"""
+        if time.monotonic() - self._ultima_escritura > 5:
+            return 0.0
+        return self._demora
+
+    def escribir(self, funcion, *args):
+        """Ejecuta `funcion(conn, *args)`: por el escritor único si está activo, si no en su propia transacción"""
+        inicio = time.monotonic()
+        try:
+            if self.escritor is not None:
+                return self.escritor.ejecutar(funcion, *args)
+            conn = self.db.connect()
+            try:
+                with conn:
+                    return funcion(conn, *args)
+            finally:
+                conn.close()
+        finally:
+            self._ultima_escritura = time.monotonic()
+            self._demora = 0.8 * self._demora + 0.2 * (self._ultima_escritura - inicio)
+
+    def disponibles(self, start_date, end_date, room_type):
+        """Habitaciones del tipo pedido sin reservas que se crucen con la estadía"""
+        ocupadas = self.disponibilidad.ocupadas(start_date, end_date)
+        return [h for h in self.catalogo.habitaciones_de_tipo(room_type) if h["room_id"] not in ocupadas]
+
+    def matriz(self, inicio, fin, tipos, flex):
+        """
+        Disponibilidad de cada tipo para la estadía [inicio, fin) corrida de -flex a +flex días.
+
+        Una fila por desplazamiento y una columna por tipo: `disponibles` (cantidad) y
+        `habitaciones` (room_id libres), calculadas con una sola pasada por el índice.
+        """
+        ocupadas = self.disponibilidad.ocupadas_flexible(inicio.isoformat(), fin.isoformat(), flex)
+        por_tipo = {t: [h["room_id"] for h in self.catalogo.habitaciones_de_tipo(t)] for t in tipos}
+        fechas, disponibles, habitaciones = [], [], []
+        for d in range(-flex, flex + 1):
+            libres = [[r for r in por_tipo[t] if r not in ocupadas[d]] for t in tipos]
+            fechas.append({"desplazamiento": d, "start_date": (inicio + timedelta(d)).isoformat(),
+                           "end_date": (fin + timedelta(d)).isoformat()})
+            disponibles.append([len(l) for l in libres])
+            habitaciones.append(libres)
+        return {
+            "noches": (fin - inicio).days,
+            "tipos": tipos,
+            "precios": [self.catalogo.tipos[t]["price"] for t in tipos],
+            "fechas": fechas,
+            "disponibles": disponibles,
+            "habitaciones": habitaciones,
+        }
+
+
+def create_app(config=None):
+    """
+    Crea una instancia independiente de la app.
+
+    Cada instancia tiene su propio backend de BD (config["DATABASE"]) y sus propias cachés,
+    así que varias pueden convivir en un mismo proceso (benchmarks, varios hoteles).
+    """
+    app = Flask(__name__)
+    app.config.update(CONFIG_DEFECTO)
+    app.config.update(config or {})
+
+    def fabrica(db):
+        if app.config["MIGRAR_DB"]:
+            db.migrar()
+        if app.config["ROOM_NIGHTS"]:
+            conn = db.connect()
+            try:
+                with conn:
+                    noches.completar(conn)
+            finally:
+                conn.close()
+        replica = None
+        if app.config["REPLICA"]:
+            destino = "memoria"
+            if app.config["REPLICA"] == "archivo" and not db.path.startswith("file:"):
+                destino = str(Path(db.path).with_suffix(".replica.db"))
+            replica = Replica(db, destino, max_desfase=app.config["REPLICA_MAX_DESFASE"],
+                              intervalo=app.config["REPLICA_INTERVALO"])
+        return RecursosHotel(db, app.config["METRICS_CSV"], escritor_unico=app.config["ESCRITOR_UNICO"],
+                             max_lote=app.config["ESCRITOR_MAX_LOTE"], replica=replica)
+
+    db = BaseDatos(app.config["DATABASE"])
+    if app.config["INIT_DB"]:
+        db.init()
+    recursos = fabrica(db)
+    app.extensions["hotel"] = recursos
+    app.extensions["validacion"] = Validador(esquemas_hotel(app.config))
+    activos = app.config["LIMITES_ACTIVOS"]
+    if activos or (activos is None and not app.config["TESTING"]):
+        cubetas = CubetasSQLite(app.config["LIMITES_DB"]) if app.config["LIMITES_DB"] else None
+        app.extensions["limites"] = Limitador(app.config["LIMITES"], cubetas,
+                                              max_en_curso=app.config["ADMISION_MAX_EN_CURSO"],
+                                              max_escritura=app.config["ADMISION_MAX_ESCRITURA"])
+
+    app.register_blueprint(hotel)
+    app.register_blueprint(metrics)
+    plantillas.configurar(app)
+    assets.configurar(app)
+    compresion.configurar(app)
+
+    if app.config["SHARDS_DIR"]:
+        # Las mismas rutas del hotel, una BD por propiedad: /h/<hotel_id>/search, /h/<hotel_id>/book...
+        app.extensions["hoteles"] = EnrutadorHoteles(app.config["SHARDS_DIR"], fabrica=fabrica,
+                                                     workers=app.config["SHARDS_WORKERS"])
+        app.register_blueprint(hotel, url_prefix="/h/<hotel_id>", name="sede")
+        app.register_blueprint(hoteles)
+
+    if app.config["PRECARGAR"]:
+        recursos.precargar()
+        # Compila todas las plantillas para que la primera petición no pague el parseo
+        for nombre in app.jinja_env.list_templates(extensions=["html"]):
+            app.jinja_env.get_template(nombre)
+    return app
+
+
+@hotel.url_value_preprocessor
+def extraer_hotel(endpoint, values):
+    g.hotel_id = values.pop("hotel_id", None) if values else None
+
+@hotel.before_request
+def validar_hotel():
+    # 404 para cualquier ruta de un hotel sin shard, aunque la vista no use la BD
+    if g.get("hotel_id") is not None:
+        get_recursos()
+
+@hotel.before_request
+def limitar():
+    # Límite de tasa y admisión de las rutas caras (ver limites.py); antes de validar y de tocar la BD
+    limitador = current_app.extensions.get("limites")
+    if limitador is None:
+        return None
+    ruta = request.endpoint.rsplit(".", 1)[-1]
+    if request.method != "POST" and not (request.method == "GET" and ruta in current_app.config["LIMITES_GET"]):
+        return None
+    usuario = session.get("user_id") or (request.form.get("username", "").strip()[:64] if ruta == "login" else None)
+    if usuario:
+        usuario = f"{g.get('hotel_id') or ''}:{usuario}"
+    escritura = get_recursos().tiempo_escritura if ruta == "book" else 0.0
+    rechazo = limitador.admitir(ruta, request.remote_addr, usuario, escritura)
+    if rechazo is not None:
+        codigo, motivo, reintentar = rechazo
+        mensaje = "Demasiadas peticiones, intenta más tarde" if codigo == 429 else "Servicio saturado, intenta más tarde"
+        return mensaje, codigo, {"Retry-After": str(reintentar)}
+    g.admitida = ruta in limitador.limites
+
+@hotel.teardown_request
+def liberar_admision(error):
+    if g.pop("admitida", False):
+        current_app.extensions["limites"].terminar()
+
+@hotel.before_request
+def validar_entrada():
+    # Rechaza la entrada mal formada antes de consultar la BD (ver validacion.py)
+    validador = current_app.extensions["validacion"]
+    ruta = request.endpoint.rsplit(".", 1)[-1]
+    if validador.esquema(ruta, request.method) is None:
+        return None
+    fuente = request.form if request.method == "POST" else request.args
+    try:
+        g.datos = validador.validar(ruta, request.method, fuente, {"tipos": get_recursos().catalogo.codigos()})
+    except EntradaInvalida as e:
+        if validador.esquema(ruta, request.method).json:
+            return jsonify({"error": str(e)}), 400
+        flash(str(e), "error")
+        return redirect(url_for(".index"))
+
+@hotel.url_defaults
+def agregar_hotel(endpoint, values):
+    if g.get("hotel_id") is not None and current_app.url_map.is_endpoint_expecting(endpoint, "hotel_id"):
+        values.setdefault("hotel_id", g.hotel_id)
+
+def get_recursos():
+    """Recursos del hotel de la petición: el shard de /h/<hotel_id>/ o la BD principal"""
+    hotel_id = g.get("hotel_id")
+    if hotel_id is None:
+        return current_app.extensions["hotel"]
+    try:
+        return current_app.extensions["hoteles"].recursos(hotel_id)
+    except ShardInexistente:
+        abort(404)
 
 def get_db():
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return get_recursos().db.connect()
+
+# Intenciones de escritura: se ejecutan dentro de una transacción (propia o del lote del escritor)
+
+def _crear_usuario(conn, username, pwd_hash):
+    """Id del usuario creado; None si el nombre ya existe"""
+    if conn.execute("SELECT id FROM users WHERE username = ?", (username,)).fetchone():
+        return None
+    return conn.execute("INSERT INTO users (username, password_hash) VALUES (?,?)", (username, pwd_hash)).lastrowid
 
-@app.route("/")
+def _crear_reserva(conn, user_id, room_id, start_date, end_date, total):
+    """Id de la reserva creada (fechas `date`); None si la habitación ya está ocupada en ese rango"""
+    # Comparación de enteros sobre idx_bookings_room_dias, sin date() por fila
+    ocupada = conn.execute("""
+        SELECT COUNT(1) as c FROM bookings
+        WHERE room_id = ? AND start_day < ? AND end_day > ? AND status != ?
+    """, (room_id, dia(end_date), dia(start_date), noches.ESTADO_EXPIRADA)).fetchone()["c"]
+    if ocupada > 0:
+        return None
+    return conn.execute("""
+        INSERT INTO bookings (user_id, room_id, start_date, end_date, start_day, end_day, total_price, status)
+        VALUES (?,?,?,?,?,?,?,?)
+    """, (user_id, room_id, start_date.isoformat(), end_date.isoformat(), dia(start_date), dia(end_date),
+          total, "PENDING_PAYMENT")).lastrowid
+
+def _crear_reserva_noches(conn, expiran_min, user_id, room_id, start_date, end_date, total):
+    """Como _crear_reserva, pero el solapamiento lo impide la clave de room_nights (IntegrityError)"""
+    if expiran_min:
+        noches.expirar_pendientes(conn, expiran_min)
+    return noches.reservar(conn, user_id, room_id, start_date, end_date, total)
+
+def _registrar_pago(conn, booking_id):
+    """True si la reserva estaba pendiente y quedó confirmada; una expirada (sus noches ya pueden
+    ser de otro) o ya pagada no se toca ni genera pago"""
+    confirmada = conn.execute("UPDATE bookings SET status = 'CONFIRMED' WHERE id = ? AND status = 'PENDING_PAYMENT'",
+                              (booking_id,)).rowcount == 1
+    if confirmada:
+        conn.execute("INSERT INTO payments (booking_id, amount, status, created_at) VALUES (?,?,?,datetime('now'))",
+                     (booking_id, 0, "APPROVED"))
+    return confirmada
+
+@hotel.route("/")
 def index():
     return render_template("index.html")
 
-@app.route("/register", methods=["GET", "POST"])
+@hotel.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
         username = request.form.get("username", "").strip()
@@ -28,31 +359,23 @@ def register():
         
         if not username or not password:
             flash("Usuario y contraseña requeridos", "error")
-            return redirect(url_for("register"))
-        
-        conn = get_db()
-        cur = conn.cursor()
+            return redirect(url_for(".register"))
         
         try:
-            cur.execute("SELECT id FROM users WHERE username = ?", (username,))
-            if cur.fetchone():
+            pwd_hash = generate_password_hash(password)
+            if get_recursos().escribir(_crear_usuario, username, pwd_hash) is None:
                 flash("El usuario ya existe", "error")
-                return redirect(url_for("register"))
+                return redirect(url_for(".register"))
             
-            pwd_hash = generate_password_hash(password)
-            cur.execute("INSERT INTO users (username, password_hash) VALUES (?,?)", (username, pwd_hash))
-            conn.commit()
             flash("Registro exitoso. Inicia sesión.", "success")
-            return redirect(url_for("login"))
+            return redirect(url_for(".login"))
         except Exception as e:
             flash(f"Error en el registro: {str(e)}", "error")
-            return redirect(url_for("register"))
-        finally:
-            conn.close()
+            return redirect(url_for(".register"))
     
     return render_template("register.html")
 
-@app.route("/login", methods=["GET", "POST"])
+@hotel.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         username = request.form.get("username", "").strip()
@@ -68,138 +391,178 @@ def login():
             if row and check_password_hash(row["password_hash"], password):
                 session["user_id"] = row["id"]
                 session["username"] = username
+                # Los ids de usuario son propios de cada shard
+                session["hotel_id"] = g.get("hotel_id")
                 flash(f"Bienvenido, {username}!", "success")
-                return redirect(url_for("index"))
+                return redirect(url_for(".index"))
             
             flash("Credenciales inválidas", "error")
-            return redirect(url_for("login"))
+            return redirect(url_for(".login"))
         except Exception as e:
             flash(f"Error en el login: {str(e)}", "error")
-            return redirect(url_for("login"))
+            return redirect(url_for(".login"))
         finally:
             conn.close()
     
     return render_template("login.html")
 
-@app.route("/logout")
+@hotel.route("/logout")
 def logout():
     session.clear()
     flash("Sesión cerrada correctamente", "success")
-    return redirect(url_for("index"))
+    return redirect(url_for(".index"))
 
-@app.route("/search", methods=["GET", "POST"])
+@hotel.route("/search", methods=["GET", "POST"])
 def search():
     if request.method == "POST":
-        start_date = request.form.get("start_date")
-        end_date = request.form.get("end_date")
-        room_type = request.form.get("room_type")
+        # Ya validados y convertidos por validar_entrada
+        start_date = g.datos["start_date"].isoformat()
+        end_date = g.datos["end_date"].isoformat()
+        room_type = g.datos["room_type"]
         
-        conn = get_db()
-        cur = conn.cursor()
+        # Catálogo e índice de disponibilidad en memoria (ver catalogo.py)
+        recursos = get_recursos()
+        available_rooms = recursos.disponibles(start_date, end_date, room_type)
+        
+        occupied_rooms = []
+        for room_id in recursos.disponibilidad.reservas_en(start_date, end_date):
+            habitacion = recursos.catalogo.habitacion(room_id)
+            if habitacion is not None:
+                occupied_rooms.append(habitacion["room_number"])
 
-        try:
-            query = """
-            SELECT rooms.id as room_id, rooms.room_number, rt.name as room_type_name, rt.price
-            FROM rooms rooms
-            JOIN room_types rt ON rooms.room_type_id = rt.id
-            WHERE rt.code = ?
-            AND rooms.id NOT IN (
-                SELECT room_id FROM bookings
-                WHERE NOT (date(end_date) <= date(?) OR date(start_date) >= date(?))
-            )
-            ORDER BY rooms.room_number
-            """
-            cur.execute(query, (room_type, start_date, end_date))
-            available_rooms = cur.fetchall()
-
-            query_occupied = """
-            SELECT rooms.room_number
-            FROM rooms rooms
-            JOIN bookings b ON rooms.id = b.room_id
-            WHERE date(b.start_date) <= date(?) AND date(b.end_date) >= date(?)
-            """
-            cur.execute(query_occupied, (end_date, start_date))
-            occupied_rooms = [row['room_number'] for row in cur.fetchall()]
-
-            return render_template("search_results.html", available_rooms=available_rooms, 
-                                   occupied_rooms=occupied_rooms, start_date=start_date, 
-                                   end_date=end_date, room_type=room_type)
-        finally:
-            conn.close()
+        contexto = dict(available_rooms=available_rooms, occupied_rooms=occupied_rooms,
+                        start_date=start_date, end_date=end_date, room_type=room_type)
+        if len(available_rooms) >= current_app.config["STREAM_MINIMO"]:
+            # Muchas habitaciones: el navegador empieza a mostrar la lista antes de que termine el render
+            return Response(plantillas.transmitir("search_results.html", **contexto), mimetype="text/html")
+        return render_template("search_results.html", **contexto)
+
+    return redirect(url_for(".index"))
 
-    return redirect(url_for("index"))
+@hotel.route("/search/matriz")
+def search_matriz():
+    """
+    Varios tipos y fechas flexibles en una sola petición (JSON):
+    /search/matriz?start_date=...&end_date=...&room_type=simple&room_type=doble&flex=2
+    """
+    inicio, fin, flex = g.datos["start_date"], g.datos["end_date"], g.datos["flex"]
+    recursos = get_recursos()
+    tipos = g.datos["room_type"] or recursos.catalogo.codigos()
+    return jsonify({"start_date": inicio.isoformat(), "end_date": fin.isoformat(), "flex": flex,
+                    **recursos.matriz(inicio, fin, list(dict.fromkeys(tipos)), flex)})
 
-@app.route("/book", methods=["POST"])
+@hotel.route("/reportes")
+def reportes():
+    """Ocupación, ADR, RevPAR y conversión del período [desde, hasta) (JSON): /reportes?desde=...&hasta=..."""
+    return jsonify(get_recursos().reportes.reporte(g.datos["desde"], g.datos["hasta"]))
+
+@hotel.route("/book", methods=["POST"])
 def book():
-    if "user_id" not in session:
+    if "user_id" not in session or session.get("hotel_id") != g.get("hotel_id"):
         flash("Inicia sesión para reservar", "error")
-        return redirect(url_for("login"))
+        return redirect(url_for(".login"))
     
-    room_id = request.form.get("room_id")
-    start_date = request.form.get("start_date")
-    end_date = request.form.get("end_date")
+    # Validados por validar_entrada: las intenciones reciben `date` y guardan texto y día
+    room_id, sd, ed = g.datos["room_id"], g.datos["start_date"], g.datos["end_date"]
 
-    conn = get_db()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("""
-            SELECT rt.price
-            FROM rooms r JOIN room_types rt ON r.room_type_id = rt.id
-            WHERE r.id = ?
-        """, (room_id,))
-        row = cur.fetchone()
-        
-        if not row:
-            flash("Habitación no encontrada", "error")
-            return redirect(url_for("index"))
-
-        price = row["price"]
-        sd = datetime.strptime(start_date, "%Y-%m-%d")
-        ed = datetime.strptime(end_date, "%Y-%m-%d")
-        nights = (ed - sd).days
-        
-        if nights <= 0:
-            flash("Rango de fechas inválido", "error")
-            return redirect(url_for("index"))
-        
-        total = price * nights
+    recursos = get_recursos()
+    habitacion = recursos.catalogo.habitacion(room_id)
+    if habitacion is None:
+        flash("Habitación no encontrada", "error")
+        return redirect(url_for(".index"))
 
-        cur.execute("""
-            SELECT COUNT(1) as c FROM bookings
-            WHERE room_id = ? AND NOT (date(end_date) <= date(?) OR date(start_date) >= date(?))
-        """, (room_id, start_date, end_date))
-        
-        if cur.fetchone()["c"] > 0:
-            flash("La habitación ya no está disponible en ese rango", "error")
-            return redirect(url_for("index"))
-
-        cur.execute("""
-            INSERT INTO bookings (user_id, room_id, start_date, end_date, total_price, status)
-            VALUES (?,?,?,?,?,?)
-        """, (session["user_id"], room_id, start_date, end_date, total, "PENDING_PAYMENT"))
-        conn.commit()
-
-        booking_id = cur.lastrowid
-        return render_template("booking.html", booking_id=booking_id, total=total)
-    finally:
-        conn.close()
-
-@app.route("/pay", methods=["POST"])
+    price = habitacion["price"]
+    nights = (ed - sd).days
+    total = price * nights
+
+    # La verificación de solapamiento y el INSERT son atómicos dentro de la intención
+    if current_app.config["ROOM_NIGHTS"]:
+        try:
+            booking_id = recursos.escribir(_crear_reserva_noches, current_app.config["PENDIENTES_EXPIRAN_MIN"],
+                                           session["user_id"], room_id, sd, ed, total)
+        except sqlite3.IntegrityError:
+            booking_id = None
+    else:
+        booking_id = recursos.escribir(_crear_reserva, session["user_id"], room_id, sd, ed, total)
+    if booking_id is None:
+        flash("La habitación ya no está disponible en ese rango", "error")
+        return redirect(url_for(".index"))
+
+    recursos.disponibilidad.registrar(booking_id, habitacion["room_id"], sd, ed)
+    return render_template("booking.html", booking_id=booking_id, total=total)
+
+@hotel.route("/pay", methods=["POST"])
 def pay():
     booking_id = request.form.get("booking_id")
-    conn = get_db()
-    cur = conn.cursor()
-    
-    try:
-        cur.execute("INSERT INTO payments (booking_id, amount, status, created_at) VALUES (?,?,?,datetime('now'))",
-                    (booking_id, 0, "APPROVED"))
-        cur.execute("UPDATE bookings SET status = 'CONFIRMED' WHERE id = ?", (booking_id,))
-        conn.commit()
-        flash("Pago simulado aprobado. Reserva confirmada.", "success")
-        return redirect(url_for("index"))
-    finally:
-        conn.close()
+    if not get_recursos().escribir(_registrar_pago, booking_id):
+        flash("La reserva ya no está pendiente de pago (expiró o ya fue pagada)", "error")
+        return redirect(url_for(".index"))
+    flash("Pago simulado aprobado. Reserva confirmada.", "success")
+    return redirect(url_for(".index"))
+
+@hoteles.route("/buscar")
+def buscar_hoteles():
+    """Búsqueda en todos los hoteles a la vez (fan-out en paralelo sobre los shards)"""
+    start_date = request.args.get("start_date")
+    end_date = request.args.get("end_date")
+    room_type = request.args.get("room_type")
+    solo = request.args.getlist("hotel") or None
+
+    resultados, errores = current_app.extensions["hoteles"].buscar(start_date, end_date, room_type, hoteles=solo)
+    return jsonify({"resultados": resultados, "errores": errores})
+
+# ==============================================================================
+# DASHBOARD DE MÉTRICAS
+# ==============================================================================
+
+def get_metricas():
+    return get_recursos().metricas
+
+@metrics.route("/")
+def metrics_index():
+    return redirect(url_for("metrics.metrics_dashboard"))
+
+@metrics.route("/dashboard/")
+def metrics_dashboard():
+    return send_from_directory(DASHBOARDS_DIR, "dashboard_metricas_cyber.html")
+
+@metrics.route("/dashboard/<path:filename>")
+def metrics_dashboard_files(filename):
+    # En dashboards/ también están el histórico, los resultados de pytest y cachés: solo se publica lo servible
+    if Path(filename).suffix not in EXTENSIONES_DASHBOARD:
+        abort(404)
+    return send_from_directory(DASHBOARDS_DIR, filename)
+
+@metrics.route("/figs/<path:filename>")
+def metrics_figs(filename):
+    if Path(filename).suffix not in EXTENSIONES_FIGS:
+        abort(404)
+    return send_from_directory(FIGS_DIR, filename)
+
+@metrics.route("/resumen.json")
+def metrics_resumen():
+    resultado = get_metricas().obtener()
+    if resultado is None:
+        abort(503)
+    cuerpo, etag = resultado
+
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return Response(cuerpo, mimetype="application/json", headers=headers)
+
+@metrics.route("/rechazos.json")
+def metrics_rechazos():
+    """Peticiones rechazadas por la validación de entrada y por límites/admisión, por ruta y motivo"""
+    limitador = current_app.extensions.get("limites")
+    return jsonify({"validacion": current_app.extensions["validacion"].resumen(),
+                    "limites": limitador.resumen() if limitador is not None else None})
+
+@metrics.route("/compresion.json")
+def metrics_compresion():
+    """Bytes originales y enviados, CPU de compresión y respuestas 304 por ETag"""
+    compresor = current_app.extensions.get("compresion")
+    return jsonify(compresor.resumen() if compresor is not None else None)
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
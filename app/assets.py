@@ -0,0 +1,242 @@
+"""
+Pipeline de assets estáticos: minifica, agrega la huella (hash) al nombre y precomprime.
+
+    python app/assets.py compilar     # static/ → static/dist/ + manifest.json
+    python app/assets.py fuentes      # descarga Orbitron/Rajdhani a static/fonts/ (uso sin conexión)
+
+Cada archivo compilado (`css/base.3f9a1c0d2e.css`) no cambia nunca de contenido, así que se sirve
+con Cache-Control de un año; al editar el original cambia la huella y con ella la URL. Junto a
+cada uno quedan las variantes `.gz` y, si está instalado el paquete `brotli`, `.br`.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import posixpath
+import re
+import shutil
+import urllib.request
+from pathlib import Path
+
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo se generan las variantes .gz
+    brotli = None
+
+STATIC_DIR = Path(__file__).resolve().parent / "static"
+DIST_DIR = STATIC_DIR / "dist"
+FUENTES_DIR = STATIC_DIR / "fonts"
+MANIFIESTO = "manifest.json"
+
+# Originales que entran al pipeline (rutas relativas a static/)
+ASSETS = ["style.css", "css/base.css", "css/booking.css", "js/base.js", "js/booking.js", "fonts/fuentes.css"]
+BINARIOS = (".woff2", ".woff", ".ttf")
+COMPRIMIBLES = (".css", ".js", ".svg", ".ttf")
+UN_ANIO = 365 * 24 * 3600
+
+URL_FUENTES = ("https://fonts.googleapis.com/css2?family=Orbitron:wght@400;600;700;900"
+               "&family=Rajdhani:wght@400;500;600;700&display=swap")
+# Con este User-Agent Google Fonts responde con woff2
+UA_WOFF2 = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+
+_COMENTARIO_CSS = re.compile(r"/\*.*?\*/", re.S)
+_ESPACIOS = re.compile(r"\s+")
+_ALREDEDOR_CSS = re.compile(r"\s*([{};,>])\s*")
+# "propiedad: valor" dentro de un bloque: después de { o ; y terminado en ; o } antes de otra {
+_DECLARACION_CSS = re.compile(r"([{;])([-\w]+)\s*:\s*(?=[^{};]*[;}])")
+_URL_CSS = re.compile(r"url\((['\"]?)([^)'\"]+)\1\)")
+
+assets = Blueprint("assets", __name__, url_prefix="/assets")
+
+
+# ----------------------------------------------------------------------
+# Minificación
+# ----------------------------------------------------------------------
+
+def minificar_css(texto):
+    texto = _COMENTARIO_CSS.sub("", texto)
+    texto = _ESPACIOS.sub(" ", texto)
+    texto = _ALREDEDOR_CSS.sub(r"\1", texto)
+    # Solo en declaraciones: en selectores ("a :hover") el espacio cambia el significado
+    texto = _DECLARACION_CSS.sub(r"\1\2:", texto)
+    return texto.replace(";}", "}").strip()
+
+
+def minificar_js(texto):
+    """Conservadora: quita sangría, líneas vacías y líneas que son solo comentario (no toca strings)"""
+    lineas = (l.strip() for l in texto.splitlines())
+    return "\n".join(l for l in lineas if l and not l.startswith("//")) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Compilación
+# ----------------------------------------------------------------------
+
+def _huella(datos):
+    return hashlib.sha256(datos).hexdigest()[:10]
+
+
+def _escribir(destino_dir, nombre, datos):
+    """Escribe `nombre` con huella (y sus variantes comprimidas); devuelve el nombre final"""
+    ruta = Path(nombre)
+    final = str(ruta.with_name(f"{ruta.stem}.{_huella(datos)}{ruta.suffix}").as_posix())
+    destino = destino_dir / final
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if not destino.exists():
+        destino.write_bytes(datos)
+        if ruta.suffix in COMPRIMIBLES:
+            destino.with_name(destino.name + ".gz").write_bytes(gzip.compress(datos, 9, mtime=0))
+            if brotli is not None:
+                destino.with_name(destino.name + ".br").write_bytes(brotli.compress(datos, quality=11))
+    return final
+
+
+def compilar(origen=STATIC_DIR, destino=DIST_DIR):
+    """Compila los assets de `origen` en `destino` y devuelve el manifiesto {original: compilado}"""
+    origen, destino = Path(origen), Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    manifiesto = {}
+    # Primero los binarios (fuentes), para reescribir las url(...) de los CSS que los usan
+    for archivo in sorted(origen.rglob("*")):
+        if archivo.suffix in BINARIOS and destino not in archivo.parents:
+            nombre = archivo.relative_to(origen).as_posix()
+            manifiesto[nombre] = _escribir(destino, nombre, archivo.read_bytes())
+    for nombre in ASSETS:
+        archivo = origen / nombre
+        if not archivo.exists():
+            continue
+        texto = archivo.read_text(encoding="utf-8")
+        if archivo.suffix == ".css":
+            texto = minificar_css(_URL_CSS.sub(lambda m: _reescribir_url(m, nombre, manifiesto), texto))
+        else:
+            texto = minificar_js(texto)
+        manifiesto[nombre] = _escribir(destino, nombre, texto.encode("utf-8"))
+    (destino / MANIFIESTO).write_text(json.dumps(manifiesto, indent=2, sort_keys=True), encoding="utf-8")
+    return manifiesto
+
+
+def _reescribir_url(match, nombre_css, manifiesto):
+    """url(relativa) de un CSS → url del compilado, relativa a la ubicación del CSS compilado"""
+    url = match.group(2)
+    if ":" in url or url.startswith(("/", "#")):
+        return match.group(0)
+    carpeta = posixpath.dirname(nombre_css)
+    referido = posixpath.normpath(posixpath.join(carpeta, url))
+    if referido not in manifiesto:
+        return match.group(0)
+    return f"url({posixpath.relpath(manifiesto[referido], carpeta or '.')})"
+
+
+def desactualizado(origen=STATIC_DIR, destino=DIST_DIR):
+    """True si falta el manifiesto o algún original es más nuevo que él"""
+    manifiesto = Path(destino) / MANIFIESTO
+    if not manifiesto.exists():
+        return True
+    limite = manifiesto.stat().st_mtime
+    return any((Path(origen) / n).exists() and (Path(origen) / n).stat().st_mtime > limite for n in ASSETS)
+
+
+# ----------------------------------------------------------------------
+# Integración con Flask
+# ----------------------------------------------------------------------
+
+def configurar(app):
+    """Registra /assets/ y el helper `asset_url` de las plantillas; compila si hace falta"""
+    destino = Path(app.config["ASSETS_DIR"])
+    compilar_al_iniciar = app.config["ASSETS_COMPILAR"]
+    if compilar_al_iniciar is None:
+        compilar_al_iniciar = not app.config["TESTING"]
+    if compilar_al_iniciar and desactualizado(STATIC_DIR, destino):
+        compilar(STATIC_DIR, destino)
+    try:
+        manifiesto = json.loads((destino / MANIFIESTO).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifiesto = {}
+    app.extensions["assets"] = {"dir": destino, "manifiesto": manifiesto}
+    app.register_blueprint(assets)
+    app.jinja_env.globals["asset_url"] = asset_url
+
+
+def asset_url(nombre):
+    """URL del asset compilado; el original de /static/ si no se compiló; None si no existe"""
+    compilado = current_app.extensions["assets"]["manifiesto"].get(nombre)
+    if compilado is not None:
+        return url_for("assets.servir", nombre=compilado)
+    if (STATIC_DIR / nombre).exists():
+        return url_for("static", filename=nombre)
+    return None
+
+
+@assets.route("/<path:nombre>")
+def servir(nombre):
+    """Sirve un asset compilado, precomprimido si el cliente lo acepta, con caché de un año"""
+    directorio = current_app.extensions["assets"]["dir"]
+    aceptadas = request.accept_encodings
+    codificacion = None
+    for sufijo, nombre_codificacion in ((".br", "br"), (".gz", "gzip")):
+        if aceptadas[nombre_codificacion] and (directorio / (nombre + sufijo)).is_file():
+            codificacion = nombre_codificacion
+            break
+    if codificacion is None:
+        respuesta = send_from_directory(directorio, nombre, max_age=UN_ANIO)
+    else:
+        sufijo = ".br" if codificacion == "br" else ".gz"
+        respuesta = send_from_directory(directorio, nombre + sufijo, max_age=UN_ANIO)
+        # El tipo es el del original, no el de .gz/.br
+        respuesta.headers["Content-Encoding"] = codificacion
+        respuesta.mimetype = mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+    respuesta.headers["Vary"] = "Accept-Encoding"
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+
+# ----------------------------------------------------------------------
+# Fuentes locales
+# ----------------------------------------------------------------------
+
+def descargar_fuentes(destino=FUENTES_DIR, url=URL_FUENTES):
+    """Descarga el CSS de Google Fonts y sus woff2, y escribe fonts/fuentes.css apuntando a los locales"""
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    peticion = urllib.request.Request(url, headers={"User-Agent": UA_WOFF2})
+    with urllib.request.urlopen(peticion, timeout=30) as r:
+        css = r.read().decode("utf-8")
+
+    def local(match):
+        remota = match.group(2)
+        nombre = f"{_huella(remota.encode())}{Path(remota).suffix or '.woff2'}"
+        if not (destino / nombre).exists():
+            with urllib.request.urlopen(remota, timeout=30) as r, open(destino / nombre, "wb") as f:
+                shutil.copyfileobj(r, f)
+        return f"url({nombre})"
+
+    css = _URL_CSS.sub(local, css)
+    (destino / "fuentes.css").write_text(css, encoding="utf-8")
+    return destino / "fuentes.css"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de assets estáticos")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("compilar", help="minifica, agrega huellas y precomprime en static/dist/")
+    sub.add_parser("fuentes", help="descarga las fuentes de Google Fonts a static/fonts/")
+    args = parser.parse_args(argv)
+
+    if args.comando == "fuentes":
+        print(f"✓ Fuentes locales: {descargar_fuentes()}")
+        return
+    manifiesto = compilar()
+    for original, compilado in sorted(manifiesto.items()):
+        antes = (STATIC_DIR / original).stat().st_size
+        despues = (DIST_DIR / compilado).stat().st_size
+        gz = DIST_DIR / (compilado + ".gz")
+        comprimido = f"{gz.stat().st_size:>8} B gzip" if gz.exists() else ""
+        print(f"{original:<22} {antes:>8} B → {despues:>8} B {comprimido}  {compilado}")
+
+
+if __name__ == "__main__":
+    main()
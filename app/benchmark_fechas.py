@@ -0,0 +1,108 @@
+"""
+Benchmark de consultas por fecha: TEXT con date() por fila contra días enteros (migración 3).
+
+Crea una BD temporal con el esquema anterior a la migración, mide las consultas de solapamiento,
+aplica la migración (con el relleno por lotes) y vuelve a medir con las columnas enteras.
+
+    python app/benchmark_fechas.py [--reservas 200000] [--habitaciones 300] [--repeticiones 5]
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from db import MIGRACIONES, connect, dia, init_db, migrar_db
+
+# nombre: (consulta TEXT, consulta con días, ¿filtra por habitación?)
+CONSULTAS = {
+    "solapamiento de /book (1 habitación)": (
+        "SELECT COUNT(1) FROM bookings WHERE room_id = ? "
+        "AND NOT (date(end_date) <= date(?) OR date(start_date) >= date(?))",
+        "SELECT COUNT(1) FROM bookings WHERE room_id = ? AND end_day > ? AND start_day < ?",
+        True,
+    ),
+    "reservas de un mes (todas las habitaciones)": (
+        "SELECT COUNT(1) FROM bookings WHERE date(end_date) > date(?) AND date(start_date) < date(?)",
+        "SELECT COUNT(1) FROM bookings WHERE end_day > ? AND start_day < ?",
+        False,
+    ),
+}
+
+
+def poblar(ruta, reservas, habitaciones):
+    init_db(ruta)
+    conn = connect(ruta)
+    # Esquema anterior a la migración 3: solo el índice de la migración 1
+    conn.executescript(f"{MIGRACIONES[0]} PRAGMA user_version = 1;")
+    conn.executemany("INSERT OR IGNORE INTO rooms (room_number, room_type_id) VALUES (?, ?)",
+                     [(f"B{i}", 1 + i % 3) for i in range(habitaciones)])
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('bench', 'x')")
+    ids = [r[0] for r in conn.execute("SELECT id FROM rooms")]
+    azar = random.Random(7)
+    inicio = date(2020, 1, 1)
+    filas = []
+    for _ in range(reservas):
+        entrada = inicio + timedelta(azar.randrange(6 * 365))
+        salida = entrada + timedelta(azar.randint(1, 7))
+        filas.append((azar.choice(ids), entrada.isoformat(), salida.isoformat()))
+    conn.executemany("INSERT INTO bookings (user_id, room_id, start_date, end_date, total_price, status) "
+                     "VALUES (1, ?, ?, ?, 100, 'CONFIRMED')", filas)
+    conn.commit()
+    conn.close()
+    return ids
+
+
+def medir(conn, sql, parametros, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for p in parametros:
+            conn.execute(sql, p).fetchone()
+        tiempos.append((time.perf_counter() - t0) / len(parametros))
+    return statistics.median(tiempos) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reservas", type=int, default=200_000)
+    parser.add_argument("--habitaciones", type=int, default=300)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "bench.db"
+        ids = poblar(ruta, args.reservas, args.habitaciones)
+        azar = random.Random(11)
+        rangos = []
+        for _ in range(50):
+            entrada = date(2020, 1, 1) + timedelta(azar.randrange(6 * 365))
+            rangos.append((azar.choice(ids), entrada, entrada + timedelta(30)))
+
+        def parametros(por_habitacion, convertir):
+            return [((h,) if por_habitacion else ()) + (convertir(i), convertir(f)) for h, i, f in rangos]
+
+        conn = connect(ruta)
+        antes = {nombre: medir(conn, texto, parametros(por_habitacion, date.isoformat), args.repeticiones)
+                 for nombre, (texto, _, por_habitacion) in CONSULTAS.items()}
+        conn.close()
+
+        t0 = time.perf_counter()
+        migrar_db(ruta)
+        migracion = time.perf_counter() - t0
+
+        conn = connect(ruta)
+        despues = {nombre: medir(conn, entero, parametros(por_habitacion, dia), args.repeticiones)
+                   for nombre, (_, entero, por_habitacion) in CONSULTAS.items()}
+        conn.close()
+
+    print(f"{args.reservas} reservas, {args.habitaciones} habitaciones; migración (con relleno): {migracion:.2f} s")
+    print(f"{'consulta':<46}{'TEXT+date()':>14}{'días enteros':>14}{'mejora':>9}")
+    for nombre in CONSULTAS:
+        print(f"{nombre:<46}{antes[nombre]:>11.3f} ms{despues[nombre]:>11.3f} ms{antes[nombre] / despues[nombre]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
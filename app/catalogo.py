@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+
+
+def normalizar_fecha(valor):
+    """'YYYY-MM-DD' como lo devuelve date() de SQLite; None si no es una fecha válida"""
+    try:
+        return date.fromisoformat(str(valor)[:10]).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def _inicio(reserva):
+    return reserva[0]
+
+
+class Catalogo:
+    """
+    Tipos de habitación y habitaciones de una BD, cargados una vez por instancia de la app.
+
+    Son datos que solo cambian al inicializar la BD, así que búsquedas y reservas
+    resuelven tipos y precios sin volver a consultar room_types/rooms.
+    """
+
+    def __init__(self, db):
+        self._db = db
+        self._lock = threading.Lock()
+        self.tipos = {}
+        self.habitaciones = {}
+        self.cargado = False
+
+    def cargar(self):
+        conn = self._db.connect()
+        try:
+            tipos = {r["code"]: dict(r) for r in conn.execute("SELECT id, code, name, price FROM room_types")}
+            nombres = {t["id"]: t for t in tipos.values()}
+            habitaciones = {}
+            for r in conn.execute("SELECT id, room_number, room_type_id FROM rooms ORDER BY room_number"):
+                tipo = nombres.get(r["room_type_id"])
+                if tipo is None:
+                    continue
+                habitaciones[r["id"]] = {
+                    "room_id": r["id"],
+                    "room_number": r["room_number"],
+                    "room_type_code": tipo["code"],
+                    "room_type_name": tipo["name"],
+                    "price": tipo["price"],
+                }
+        except sqlite3.OperationalError:
+            # BD aún sin inicializar: se reintenta en la próxima consulta
+            return False
+        finally:
+            conn.close()
+        with self._lock:
+            self.tipos, self.habitaciones, self.cargado = tipos, habitaciones, True
+        return True
+
+    def _asegurar(self):
+        if not self.cargado:
+            self.cargar()
+
+    def codigos(self):
+        """Códigos de tipo de habitación, ordenados por precio"""
+        self._asegurar()
+        return [t["code"] for t in sorted(self.tipos.values(), key=lambda t: (t["price"], t["code"]))]
+
+    def habitaciones_de_tipo(self, code):
+        """Habitaciones del tipo `code`, ordenadas por número"""
+        self._asegurar()
+        return [h for h in self.habitaciones.values() if h["room_type_code"] == code]
+
+    def habitacion(self, room_id):
+        self._asegurar()
+        try:
+            return self.habitaciones.get(int(room_id))
+        except (TypeError, ValueError):
+            return None
+
+
+class IndiceDisponibilidad:
+    """
+    Reservas por habitación en memoria, ordenadas por fecha de inicio.
+
+    Responde qué habitaciones están ocupadas en un rango sin recorrer bookings (las EXPIRED no
+    cuentan). Se valida contra una firma barata (reservas vigentes y MAX(id) de bookings) y se
+    recarga si otro proceso escribió o expiró reservas; las reservas hechas por esta instancia
+    se agregan en el lugar con `registrar`. Si `db` es una réplica, la firma solo se consulta cuando la réplica publica una generación nueva.
+    """
+
+    def __init__(self, db):
+        self._db = db
+        self._lock = threading.Lock()
+        self._reservas = {}
+        self._firma = None
+        self._generacion = None
+
+    @staticmethod
+    def _firma_actual(conn):
+        fila = conn.execute("SELECT COALESCE(SUM(status != 'EXPIRED'), 0), COALESCE(MAX(id), 0) FROM bookings").fetchone()
+        return (fila[0], fila[1])
+
+    def sincronizar(self, conn=None):
+        # Sobre una réplica (ver replica.py) solo hay algo nuevo cuando cambia su generación
+        vigente = getattr(self._db, "generacion_vigente", None)
+        generacion = vigente() if vigente is not None and conn is None else None
+        if generacion is not None and generacion == self._generacion:
+            return False
+        propia = conn is None
+        conn = conn or self._db.connect()
+        try:
+            firma = self._firma_actual(conn)
+            if firma == self._firma:
+                self._generacion = generacion
+                return False
+            reservas = {}
+            for r in conn.execute("SELECT id, room_id, start_date, end_date FROM bookings "
+                                  "WHERE status != 'EXPIRED' ORDER BY id"):
+                inicio, fin = normalizar_fecha(r["start_date"]), normalizar_fecha(r["end_date"])
+                if inicio is not None and fin is not None:
+                    reservas.setdefault(r["room_id"], []).append((inicio, fin, r["id"]))
+        except sqlite3.OperationalError:
+            return False
+        finally:
+            if propia:
+                conn.close()
+        for lista in reservas.values():
+            lista.sort()
+        with self._lock:
+            self._reservas, self._firma, self._generacion = reservas, firma, generacion
+        return True
+
+    def registrar(self, booking_id, room_id, inicio, fin):
+        """Agrega una reserva recién confirmada en la BD por esta instancia"""
+        inicio, fin = normalizar_fecha(inicio), normalizar_fecha(fin)
+        with self._lock:
+            if self._firma is None:
+                return
+            if inicio is not None and fin is not None:
+                lista = self._reservas.setdefault(int(room_id), [])
+                lista.insert(bisect_left(lista, (inicio, fin, booking_id)), (inicio, fin, booking_id))
+            self._firma = (self._firma[0] + 1, max(self._firma[1], booking_id))
+
+    def _en_rango(self, inicio, fin, inclusivo):
+        """[(room_id, inicio, fin, booking_id)] de reservas que se solapan con [inicio, fin]"""
+        self.sincronizar()
+        salida = []
+        with self._lock:
+            for room_id, lista in self._reservas.items():
+                # Solo las reservas que empiezan antes del fin del rango pueden solaparse
+                corte = (bisect_right if inclusivo else bisect_left)(lista, fin, key=_inicio)
+                for r_inicio, r_fin, booking_id in lista[:corte]:
+                    if (r_fin >= inicio) if inclusivo else (r_fin > inicio):
+                        salida.append((room_id, r_inicio, r_fin, booking_id))
+        return salida
+
+    def _solapadas(self, inicio, fin, inclusivo):
+        """[(booking_id, room_id)] de reservas que se solapan con [inicio, fin]"""
+        inicio, fin = normalizar_fecha(inicio), normalizar_fecha(fin)
+        if inicio is None or fin is None:
+            return []
+        return [(booking_id, room_id) for room_id, _, _, booking_id in self._en_rango(inicio, fin, inclusivo)]
+
+    def ocupadas(self, inicio, fin):
+        """Habitaciones con alguna reserva que se cruza con la estadía [inicio, fin)"""
+        return {room_id for _, room_id in self._solapadas(inicio, fin, inclusivo=False)}
+
+    def reservas_en(self, inicio, fin):
+        """room_id de cada reserva que toca [inicio, fin] (extremos incluidos), en orden de reserva"""
+        return [room_id for _, room_id in sorted(self._solapadas(inicio, fin, inclusivo=True))]
+
+    def ocupadas_flexible(self, inicio, fin, flex):
+        """
+        {desplazamiento: habitaciones ocupadas} de la estadía [inicio, fin) corrida de -flex a
+        +flex días. Recorre una sola vez las reservas de la ventana completa: cada una ocupa
+        el intervalo de desplazamientos d con r_inicio < fin + d y r_fin > inicio + d.
+        """
+        inicio, fin = normalizar_fecha(inicio), normalizar_fecha(fin)
+        por_desplazamiento = {d: set() for d in range(-flex, flex + 1)}
+        if inicio is None or fin is None:
+            return por_desplazamiento
+        d_inicio, d_fin = date.fromisoformat(inicio), date.fromisoformat(fin)
+        ventana = ((d_inicio - timedelta(flex)).isoformat(), (d_fin + timedelta(flex)).isoformat())
+        for room_id, r_inicio, r_fin, _ in self._en_rango(*ventana, inclusivo=False):
+            desde = max(-flex, (date.fromisoformat(r_inicio) - d_fin).days + 1)
+            hasta = min(flex, (date.fromisoformat(r_fin) - d_inicio).days - 1)
+            for d in range(desde, hasta + 1):
+                por_desplazamiento[d].add(room_id)
+        return por_desplazamiento
@@ -0,0 +1,183 @@
+"""
+Compresión (gzip/brotli) y ETag débil para las respuestas HTML y JSON de la app.
+
+Después de cada vista se calcula un ETag débil sobre el cuerpo sin comprimir: si coincide con
+If-None-Match la respuesta es un 304 sin cuerpo; si no, y el cuerpo supera el umbral, sale
+comprimido con la mejor codificación que acepte el cliente. Las respuestas en streaming, las de
+archivos (/assets/, /metrics/dashboard/) y las que ya traen su propio ETag no se tocan.
+
+    python app/compresion.py [--niveles 1 6 9]    # CPU contra bytes ahorrados por página
+"""
+import argparse
+import gzip
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli solo gzip
+    brotli = None
+
+COMPRIMIBLES = {"text/html", "text/plain", "text/css", "text/csv", "application/json",
+                "application/javascript", "image/svg+xml"}
+
+
+def _gzip(datos, nivel):
+    return gzip.compress(datos, nivel, mtime=0)
+
+
+def _brotli(datos, nivel):
+    # brotli va de 0 a 11; se escala el nivel de gzip (1-9)
+    return brotli.compress(datos, quality=min(11, round(nivel * 11 / 9)))
+
+
+CODIFICACIONES = {"gzip": _gzip}
+if brotli is not None:
+    CODIFICACIONES = {"br": _brotli, "gzip": _gzip}
+
+
+def etag_debil(datos):
+    return hashlib.blake2b(datos, digest_size=12).hexdigest()
+
+
+class Compresor:
+    """
+    Hook `after_request` con opciones por endpoint: `rutas` = {endpoint: {"comprimir": bool,
+    "etag": bool, "minimo": bytes}}, que pisan los valores generales.
+
+    Lleva por codificación los bytes originales, los enviados y el tiempo de CPU gastado.
+    """
+
+    def __init__(self, minimo=512, nivel=6, rutas=None):
+        self.minimo = minimo
+        self.nivel = nivel
+        self.rutas = rutas or {}
+        self._lock = threading.Lock()
+        self.estadisticas = defaultdict(lambda: {"respuestas": 0, "original": 0, "enviado": 0, "segundos": 0.0})
+        self.no_modificadas = 0
+
+    def opciones(self, endpoint):
+        propias = self.rutas.get(endpoint, {})
+        return (propias.get("comprimir", True), propias.get("etag", True), propias.get("minimo", self.minimo))
+
+    def _codificacion(self):
+        aceptadas = request.accept_encodings
+        for nombre in CODIFICACIONES:
+            if aceptadas[nombre]:
+                return nombre
+        return None
+
+    def __call__(self, respuesta):
+        if (respuesta.is_streamed or respuesta.direct_passthrough or respuesta.status_code != 200
+                or "ETag" in respuesta.headers or "Content-Encoding" in respuesta.headers
+                or respuesta.mimetype not in COMPRIMIBLES):
+            return respuesta
+        comprimir, etag, minimo = self.opciones(request.endpoint)
+        datos = respuesta.get_data()
+
+        if etag and request.method in ("GET", "HEAD"):
+            respuesta.set_etag(etag_debil(datos), weak=True)
+            if request.if_none_match.contains_weak(respuesta.get_etag()[0]):
+                with self._lock:
+                    self.no_modificadas += 1
+                respuesta.status_code = 304
+                respuesta.set_data(b"")
+                del respuesta.headers["Content-Length"]
+                return respuesta
+
+        if comprimir:
+            respuesta.vary.add("Accept-Encoding")
+            codificacion = self._codificacion() if len(datos) >= minimo else None
+            if codificacion is not None:
+                inicio = time.process_time()
+                comprimidos = CODIFICACIONES[codificacion](datos, self.nivel)
+                segundos = time.process_time() - inicio
+                respuesta.set_data(comprimidos)
+                respuesta.headers["Content-Encoding"] = codificacion
+                with self._lock:
+                    fila = self.estadisticas[codificacion]
+                    fila["respuestas"] += 1
+                    fila["original"] += len(datos)
+                    fila["enviado"] += len(comprimidos)
+                    fila["segundos"] += segundos
+        return respuesta
+
+    def resumen(self):
+        with self._lock:
+            codificaciones = {}
+            for nombre, fila in sorted(self.estadisticas.items()):
+                ahorrado = fila["original"] - fila["enviado"]
+                codificaciones[nombre] = {
+                    **fila,
+                    "ahorro": round(ahorrado / fila["original"], 4) if fila["original"] else 0.0,
+                    # Costo de CPU por KiB ahorrado: lo que se paga en el servidor por cada KiB que no viaja
+                    "ms_por_kib_ahorrado": round(fila["segundos"] * 1000 / (ahorrado / 1024), 4) if ahorrado > 0 else None,
+                }
+            return {"no_modificadas": self.no_modificadas, "codificaciones": codificaciones}
+
+
+def configurar(app):
+    """Registra el compresor como último `after_request` de la app (si COMPRESION está activa)"""
+    if not app.config["COMPRESION"]:
+        return
+    compresor = Compresor(app.config["COMPRESION_MINIMO"], app.config["COMPRESION_NIVEL"],
+                          app.config["COMPRESION_RUTAS"])
+    app.extensions["compresion"] = compresor
+    app.after_request(compresor)
+
+
+# ----------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------
+
+def medir(datos, codificacion, nivel, repeticiones):
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        comprimidos = CODIFICACIONES[codificacion](datos, nivel)
+    return (time.process_time() - inicio) / repeticiones, len(comprimidos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CPU de la compresión contra bytes ahorrados por página")
+    parser.add_argument("--niveles", type=int, nargs="+", default=[1, 6, 9])
+    parser.add_argument("--repeticiones", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    import tempfile
+    from pathlib import Path
+    from app import create_app
+    from db import BaseDatos
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "bench.db"
+        BaseDatos(ruta).init()
+        app = create_app({"TESTING": True, "DATABASE": str(ruta), "COMPRESION": False})
+        client = app.test_client()
+        client.post("/register", data={"username": "bench", "password": "bench"})
+        client.post("/login", data={"username": "bench", "password": "bench"})
+        paginas = {
+            "index.html": client.get("/").data,
+            "search_results.html": client.post("/search", data={
+                "start_date": "2026-03-01", "end_date": "2026-03-04", "room_type": "doble"}).data,
+            "booking.html": client.post("/book", data={
+                "room_id": "1", "start_date": "2026-03-01", "end_date": "2026-03-04"}).data,
+            "search/matriz (JSON)": client.get("/search/matriz?start_date=2026-03-01&end_date=2026-03-04&flex=7").data,
+        }
+
+    print(f"{'página':<24}{'bytes':>8}  {'codif.':<6}{'nivel':>6}{'enviado':>9}{'ahorro':>8}{'CPU':>10}{'µs/KiB ahorrado':>17}")
+    for nombre, datos in paginas.items():
+        for codificacion in CODIFICACIONES:
+            for nivel in args.niveles:
+                segundos, enviado = medir(datos, codificacion, nivel, args.repeticiones)
+                ahorrado = len(datos) - enviado
+                por_kib = segundos * 1e6 / (ahorrado / 1024) if ahorrado > 0 else float("nan")
+                print(f"{nombre:<24}{len(datos):>8}  {codificacion:<6}{nivel:>6}{enviado:>9}"
+                      f"{ahorrado / len(datos):>8.0%}{segundos * 1e6:>8.0f}µs{por_kib:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,137 @@
 import sqlite3, os, pathlib
+from datetime import date
 
 BASE = pathlib.Path(__file__).resolve().parent.parent
 DB_PATH = BASE / "hotel_reservas.db"
 
-def connect():
-    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+def connect(path=None):
+    """Abre la BD en `path` (por defecto DB_PATH); acepta URIs "file:...?mode=memory&cache=shared" """
+    path = str(path or DB_PATH)
+    conn = sqlite3.connect(path, check_same_thread=False, uri=path.startswith("file:"))
     conn.row_factory = sqlite3.Row
     return conn
 
-def init_db():
-    conn = connect()
+def copiar_db(origen, destino):
+    """Copia la BD `origen` en `destino` con la API de backup de SQLite y devuelve la conexión destino abierta"""
+    src = connect(origen)
+    dst = connect(destino)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+    return dst
+
+_EPOCA = date(1970, 1, 1).toordinal()
+# Días desde 1970-01-01 de una fecha TEXT (NULL si no es válida); julianday('1970-01-01') = 2440587.5
+SQL_DIA = "CAST(julianday({}) - 2440587.5 AS INTEGER)"
+
+# Migraciones del esquema en orden; la versión aplicada se guarda en PRAGMA user_version
+MIGRACIONES = [
+    # 1: la verificación de solapamiento de /book filtra por habitación y fechas
+    "CREATE INDEX IF NOT EXISTS idx_bookings_room_fechas ON bookings(room_id, start_date, end_date);",
+    # 2: una fila por habitación y noche reservada (ver noches.py); created_at para expirar pendientes
+    """
+    ALTER TABLE bookings ADD COLUMN created_at TEXT;
+    CREATE TABLE IF NOT EXISTS room_nights (
+        room_id INTEGER NOT NULL,
+        night TEXT NOT NULL,
+        booking_id INTEGER NOT NULL,
+        PRIMARY KEY (room_id, night),
+        FOREIGN KEY (booking_id) REFERENCES bookings(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_room_nights_booking ON room_nights(booking_id);
+    """,
+    # 3: fechas como días desde 1970-01-01 (enteros comparables por índice). Las columnas TEXT se
+    # siguen escribiendo; los triggers completan los días de quien escriba solo el texto y
+    # bookings_texto reconstruye la forma texto canónica a partir de los días.
+    f"""
+    ALTER TABLE bookings ADD COLUMN start_day INTEGER;
+    ALTER TABLE bookings ADD COLUMN end_day INTEGER;
+    CREATE INDEX IF NOT EXISTS idx_bookings_room_dias ON bookings(room_id, start_day, end_day);
+    CREATE INDEX IF NOT EXISTS idx_bookings_sin_dias ON bookings(id) WHERE start_day IS NULL OR end_day IS NULL;
+    CREATE TRIGGER IF NOT EXISTS bookings_dias_insert AFTER INSERT ON bookings
+    WHEN NEW.start_day IS NULL OR NEW.end_day IS NULL
+    BEGIN
+        UPDATE bookings SET start_day = {SQL_DIA.format("NEW.start_date")}, end_day = {SQL_DIA.format("NEW.end_date")}
+        WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS bookings_dias_update AFTER UPDATE OF start_date, end_date ON bookings
+    BEGIN
+        UPDATE bookings SET start_day = {SQL_DIA.format("NEW.start_date")}, end_day = {SQL_DIA.format("NEW.end_date")}
+        WHERE id = NEW.id;
+    END;
+    CREATE VIEW IF NOT EXISTS bookings_texto AS
+    SELECT id, user_id, room_id, date(start_day * 86400, 'unixepoch') AS start_date,
+           date(end_day * 86400, 'unixepoch') AS end_date, total_price, status, created_at
+    FROM bookings;
+    """,
+]
+
+def dia(valor):
+    """Días desde 1970-01-01 de una fecha 'YYYY-MM-DD' (o `date`); ValueError si no es válida"""
+    if not isinstance(valor, date):
+        valor = date.fromisoformat(str(valor)[:10])
+    return valor.toordinal() - _EPOCA
+
+def rellenar_dias(path=None, lote=5000):
+    """
+    Completa start_day/end_day de las reservas anteriores a la migración 3, en transacciones de
+    `lote` filas para no retener el lock de escritura; devuelve las filas revisadas.
+    """
+    conn = connect(path)
+    try:
+        revisadas, ultimo = 0, 0
+        while True:
+            with conn:
+                ids = [r[0] for r in conn.execute(
+                    "SELECT id FROM bookings INDEXED BY idx_bookings_sin_dias "
+                    "WHERE (start_day IS NULL OR end_day IS NULL) AND id > ? ORDER BY id LIMIT ?", (ultimo, lote))]
+                if not ids:
+                    return revisadas
+                conn.execute(f"""
+                    UPDATE bookings SET start_day = {SQL_DIA.format("start_date")}, end_day = {SQL_DIA.format("end_date")}
+                    WHERE id BETWEEN ? AND ? AND (start_day IS NULL OR end_day IS NULL)
+                """, (ids[0], ids[-1]))
+            revisadas, ultimo = revisadas + len(ids), ids[-1]
+    finally:
+        conn.close()
+
+def migrar_db(path=None):
+    """Aplica las migraciones pendientes; devuelve (versión anterior, versión actual)"""
+    conn = connect(path)
+    try:
+        anterior = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, script in enumerate(MIGRACIONES[anterior:], start=anterior + 1):
+            conn.executescript(f"BEGIN; {script} PRAGMA user_version = {version}; COMMIT;")
+    finally:
+        conn.close()
+    if max(anterior, len(MIGRACIONES)) >= 3:
+        # Datos: se completa por lotes fuera de la transacción del esquema (reanudable)
+        rellenar_dias(path)
+    return anterior, max(anterior, len(MIGRACIONES))
+
+class BaseDatos:
+    """Backend de almacenamiento de una instancia de la app: una sola BD (ruta o URI file:...)"""
+
+    def __init__(self, path=None):
+        self.path = str(path or DB_PATH)
+
+    def connect(self):
+        return connect(self.path)
+
+    def init(self):
+        init_db(self.path)
+        return migrar_db(self.path)
+
+    def migrar(self):
+        return migrar_db(self.path)
+
+    def copiar_a(self, destino):
+        """Copia esta BD en `destino` (ver copiar_db) y devuelve la conexión destino abierta"""
+        return copiar_db(self.path, destino)
+
+def init_db(path=None):
+    conn = connect(path)
     cur = conn.cursor()
 
     cur.executescript("""
@@ -65,4 +187,5 @@ def init_db():
 
 if __name__ == "__main__":
     init_db()
+    migrar_db()
     print("DB inicializada en:", DB_PATH)
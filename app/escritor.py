@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_FIN = object()
+
+
+class EscritorUnico:
+    """
+    Único hilo escritor de una BD SQLite, con commit agrupado.
+
+    Los hilos de las peticiones encolan intenciones de escritura (`funcion(conn, *args)`)
+    y esperan su Future. El escritor toma todo lo que haya en la cola (hasta `max_lote`),
+    lo ejecuta en una sola transacción con un SAVEPOINT por intención y hace un único
+    COMMIT: si una intención falla solo se deshace la suya, y cada petición recibe su
+    propio resultado o excepción una vez que el lote quedó confirmado.
+    """
+
+    def __init__(self, db, max_lote=64, espera=0.0):
+        self._db = db
+        self.max_lote = max_lote
+        self.espera = espera
+        self._cola = queue.Queue()
+        self.lotes = 0
+        self.escrituras = 0
+        self._hilo = threading.Thread(target=self._bucle, name="escritor-sqlite", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, funcion, *args):
+        """Encola una escritura y devuelve su Future"""
+        futuro = Future()
+        self._cola.put((funcion, args, futuro))
+        return futuro
+
+    def ejecutar(self, funcion, *args, timeout=30):
+        """Encola una escritura y espera su resultado"""
+        return self.enviar(funcion, *args).result(timeout)
+
+    def cerrar(self, timeout=5):
+        self._cola.put(_FIN)
+        self._hilo.join(timeout)
+
+    def _tomar_lote(self):
+        primero = self._cola.get()
+        if primero is _FIN:
+            return None
+        lote = [primero]
+        limite = time.monotonic() + self.espera
+        while len(lote) < self.max_lote:
+            try:
+                restante = limite - time.monotonic()
+                item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if item is _FIN:
+                self._cola.put(_FIN)
+                break
+            lote.append(item)
+        return lote
+
+    def _bucle(self):
+        conn = self._db.connect()
+        # Control manual de transacciones (BEGIN/SAVEPOINT/COMMIT explícitos)
+        conn.isolation_level = None
+        try:
+            while True:
+                lote = self._tomar_lote()
+                if lote is None:
+                    return
+                self._procesar(conn, lote)
+        finally:
+            conn.close()
+
+    def _procesar(self, conn, lote):
+        resultados = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for funcion, args, _ in lote:
+                conn.execute("SAVEPOINT intencion")
+                try:
+                    resultados.append((True, funcion(conn, *args)))
+                    conn.execute("RELEASE intencion")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO intencion")
+                    conn.execute("RELEASE intencion")
+                    resultados.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        self.lotes += 1
+        self.escrituras += len(lote)
+        for (ok, valor), (_, _, futuro) in zip(resultados, lote):
+            if ok:
+                futuro.set_result(valor)
+            else:
+                futuro.set_exception(valor)
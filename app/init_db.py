@@ -1,5 +1,6 @@
-from db import init_db
+from db import init_db, migrar_db
 
 if __name__ == "__main__":
     init_db()
+    migrar_db()
     print("Base de datos inicializada correctamente.")
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Límite de tasa (token bucket) y control de admisión para las rutas caras.
+
+Cada ruta limitada tiene una cubeta por IP y otra por usuario (la sesión o, en /login, el
+usuario que se intenta). Las cubetas viven en memoria o, con CubetasSQLite, en una tabla
+SQLite compartida por todos los workers. El control de admisión corta con 503 cuando hay demasiadas
+peticiones caras en curso o cuando las escrituras en la BD vienen tardando demasiado.
+"""
+import itertools
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# Una sola sentencia: inserta la cubeta llena o la recarga y descuenta si alcanza, de forma atómica
+_SQL_CONSUMIR = """
+    INSERT INTO cubetas (clave, tokens, actualizado) VALUES (:clave, :capacidad - :costo, :ahora)
+    ON CONFLICT(clave) DO UPDATE SET
+        tokens = min(:capacidad, tokens + (excluded.actualizado - actualizado) * :tasa) - :costo,
+        actualizado = excluded.actualizado
+    WHERE min(:capacidad, tokens + (excluded.actualizado - actualizado) * :tasa) >= :costo
+"""
+
+
+class CubetasMemoria:
+    """Cubetas de este proceso: {clave: (tokens, actualizado)}"""
+
+    def __init__(self, max_claves=100_000):
+        self._lock = threading.Lock()
+        self._cubetas = {}
+        self.max_claves = max_claves
+
+    def consumir(self, clave, capacidad, tasa, costo=1.0):
+        ahora = time.monotonic()
+        with self._lock:
+            if len(self._cubetas) >= self.max_claves:
+                # Muchas IPs distintas: se descartan las cubetas quietas (se recrean llenas)
+                self._cubetas = {c: v for c, v in self._cubetas.items() if ahora - v[1] < 60}
+            tokens, actualizado = self._cubetas.get(clave, (capacidad, ahora))
+            tokens = min(capacidad, tokens + (ahora - actualizado) * tasa)
+            if tokens < costo:
+                self._cubetas[clave] = (tokens, ahora)
+                return False
+            self._cubetas[clave] = (tokens - costo, ahora)
+            return True
+
+
+class CubetasSQLite:
+    """Cubetas compartidas entre procesos en una BD SQLite propia (no la del hotel)"""
+
+    def __init__(self, ruta, purgar_cada=1000):
+        self.ruta = str(ruta)
+        self.purgar_cada = purgar_cada
+        # next() sobre count es atómico: los hilos de un worker no pierden ni repiten consumos
+        self._consumos = itertools.count(1)
+        self._local = threading.local()
+        conn = self._conexion()
+        conn.execute("CREATE TABLE IF NOT EXISTS cubetas (clave TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                     "actualizado REAL NOT NULL) WITHOUT ROWID")
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=1.0, isolation_level=None,
+                                   uri=self.ruta.startswith("file:"))
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def consumir(self, clave, capacidad, tasa, costo=1.0):
+        ahora = time.time()
+        try:
+            conn = self._conexion()
+            cursor = conn.execute(_SQL_CONSUMIR, {
+                "clave": clave, "capacidad": capacidad, "tasa": tasa, "costo": costo, "ahora": ahora})
+        except sqlite3.OperationalError:
+            # Estado compartido ocupado: se deja pasar antes que rechazar tráfico legítimo
+            return True
+        if next(self._consumos) % self.purgar_cada == 0:
+            try:
+                conn.execute("DELETE FROM cubetas WHERE actualizado < ?", (ahora - 3600,))
+            except sqlite3.OperationalError:
+                pass  # la purga es solo limpieza: queda para la próxima vuelta
+        return cursor.rowcount == 1
+
+
+class Limitador:
+    """
+    Límites por ruta: `limites` = {ruta: (capacidad, tokens por segundo)}.
+
+    `admitir` decide antes de la vista y devuelve None o (código HTTP, motivo, reintentar en s);
+    los rechazos quedan contados por ruta y motivo.
+    """
+
+    def __init__(self, limites, cubetas=None, max_en_curso=32, max_escritura=0.5):
+        self.limites = limites
+        self.cubetas = cubetas or CubetasMemoria()
+        self.max_en_curso = max_en_curso
+        self.max_escritura = max_escritura
+        self.en_curso = 0
+        self._lock = threading.Lock()
+        self.rechazos = Counter()
+
+    def _rechazar(self, ruta, motivo, codigo, reintentar):
+        with self._lock:
+            self.rechazos[(ruta, motivo)] += 1
+        return codigo, motivo, reintentar
+
+    def admitir(self, ruta, ip, usuario=None, tiempo_escritura=0.0):
+        if ruta not in self.limites:
+            return None
+        capacidad, tasa = self.limites[ruta]
+        reintentar = max(1, round(1 / tasa))
+        if not self.cubetas.consumir(f"{ruta}:ip:{ip}", capacidad, tasa):
+            return self._rechazar(ruta, "ip", 429, reintentar)
+        if usuario and not self.cubetas.consumir(f"{ruta}:usuario:{usuario}", capacidad, tasa):
+            return self._rechazar(ruta, "usuario", 429, reintentar)
+        # Admisión: con la BD lenta o demasiadas peticiones caras en curso, cortar rápido es más barato
+        if tiempo_escritura > self.max_escritura:
+            return self._rechazar(ruta, "bd_ocupada", 503, 1)
+        with self._lock:
+            if self.en_curso >= self.max_en_curso:
+                self.rechazos[(ruta, "saturado")] += 1
+                return 503, "saturado", 1
+            self.en_curso += 1
+        return None
+
+    def terminar(self):
+        """Cierra una petición admitida por `admitir`"""
+        with self._lock:
+            self.en_curso -= 1
+
+    def resumen(self):
+        with self._lock:
+            rechazadas = {}
+            for (ruta, motivo), n in sorted(self.rechazos.items()):
+                rechazadas.setdefault(ruta, {})[motivo] = n
+            return {"en_curso": self.en_curso, "rechazadas": rechazadas}
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+METRICS_DIR = BASE_DIR / "metrics"
+DASHBOARDS_DIR = METRICS_DIR / "dashboards"
+FIGS_DIR = METRICS_DIR / "figs"
+DEFAULT_CSV = METRICS_DIR / "dataset_defectos.csv"
+
+
+def _calcular_resumen(ruta_csv):
+    """Calcula el resumen de métricas con el pipeline de metrics/ (importado bajo demanda)"""
+    if str(METRICS_DIR) not in sys.path:
+        sys.path.insert(0, str(METRICS_DIR))
+    from metricas_lote import procesar_dataset
+
+    resultado = procesar_dataset(ruta_csv)
+    if not resultado["ok"]:
+        raise RuntimeError(resultado["error"])
+    return resultado["resumen"]
+
+
+class MetricasEnVivo:
+    """
+    Caché en proceso del resumen de métricas de un CSV de defectos.
+
+    La primera consulta calcula el resumen de forma síncrona; después, si cambia el mtime
+    del CSV se recalcula en un hilo de fondo mientras se sigue sirviendo la versión anterior.
+    """
+
+    def __init__(self, ruta_csv=DEFAULT_CSV, calcular=_calcular_resumen):
+        self.ruta_csv = Path(ruta_csv)
+        self._calcular = calcular
+        self._lock = threading.Lock()
+        self._cuerpo = None
+        self._etag = None
+        self._mtime = None
+        self._hilo = None
+        self.ultimo_error = None
+
+    def _mtime_actual(self):
+        try:
+            return os.stat(self.ruta_csv).st_mtime_ns
+        except OSError:
+            return None
+
+    def _recalcular(self, mtime):
+        try:
+            resumen = self._calcular(self.ruta_csv)
+        except Exception as e:
+            self.ultimo_error = f"{type(e).__name__}: {e}"
+            with self._lock:
+                # Se registra el mtime para no reintentar en cada petición hasta que cambie el CSV
+                self._mtime = mtime
+                self._hilo = None
+            return
+        cuerpo = json.dumps(resumen, indent=2, ensure_ascii=False).encode("utf-8")
+        etag = hashlib.sha1(cuerpo).hexdigest()
+        with self._lock:
+            self._cuerpo, self._etag, self._mtime = cuerpo, etag, mtime
+            self._hilo = None
+            self.ultimo_error = None
+
+    def obtener(self):
+        """Devuelve (cuerpo_json, etag); None si nunca se pudo calcular"""
+        mtime = self._mtime_actual()
+        with self._lock:
+            cuerpo, etag = self._cuerpo, self._etag
+            desactualizado = mtime != self._mtime
+            if cuerpo is not None and desactualizado and self._hilo is None:
+                self._hilo = threading.Thread(target=self._recalcular, args=(mtime,), daemon=True)
+                self._hilo.start()
+        if cuerpo is None and desactualizado:
+            self._recalcular(mtime)
+            with self._lock:
+                cuerpo, etag = self._cuerpo, self._etag
+        if cuerpo is None:
+            return None
+        return cuerpo, etag
+
+    def esperar(self, timeout=None):
+        """Espera a que termine un recálculo en curso (útil en tests y scripts)"""
+        hilo = self._hilo
+        if hilo is not None:
+            hilo.join(timeout)
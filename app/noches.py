@@ -0,0 +1,111 @@
+"""
+Tabla room_nights: una fila por habitación y noche reservada (migración 2 de db.py).
+
+Con la clave (room_id, night) una doble reserva es una violación de restricción y la
+disponibilidad es un anti-join por índice, sin comparar rangos de fechas.
+
+    python app/noches.py --db hotel_reservas.db completar
+    python app/noches.py --db hotel_reservas.db expirar --minutos 30
+"""
+import argparse
+from datetime import date, timedelta
+
+from db import BaseDatos, dia
+
+ESTADO_EXPIRADA = "EXPIRED"
+
+# Backfill: expande a noches las reservas vigentes que todavía no tienen filas en room_nights.
+# Si datos viejos tienen reservas solapadas, la noche queda para la de menor id.
+_SQL_COMPLETAR = """
+    INSERT OR IGNORE INTO room_nights (room_id, night, booking_id)
+    WITH RECURSIVE estadias(room_id, night, fin, booking_id) AS (
+        SELECT b.room_id, date(b.start_date), date(b.end_date), b.id FROM bookings b
+        WHERE b.status != ? AND date(b.end_date) > date(b.start_date)
+          AND NOT EXISTS (SELECT 1 FROM room_nights n WHERE n.booking_id = b.id)
+        UNION ALL
+        SELECT room_id, date(night, '+1 day'), fin, booking_id FROM estadias
+        WHERE date(night, '+1 day') < fin
+    )
+    SELECT room_id, night, booking_id FROM estadias ORDER BY booking_id
+"""
+
+
+def noches(inicio, fin):
+    """Noches 'YYYY-MM-DD' de la estadía [inicio, fin)"""
+    inicio, fin = date.fromisoformat(str(inicio)[:10]), date.fromisoformat(str(fin)[:10])
+    return [(inicio + timedelta(d)).isoformat() for d in range((fin - inicio).days)]
+
+
+def reservar(conn, user_id, room_id, start_date, end_date, total):
+    """
+    Inserta la reserva (fechas `date` o 'YYYY-MM-DD') y sus noches en la transacción de `conn`;
+    devuelve el id.
+
+    Si alguna noche ya está tomada sale sqlite3.IntegrityError y quien abrió la transacción
+    (o el SAVEPOINT del escritor único) deshace también el INSERT de la reserva.
+    """
+    start_date, end_date = date.fromisoformat(str(start_date)[:10]), date.fromisoformat(str(end_date)[:10])
+    booking_id = conn.execute("""
+        INSERT INTO bookings (user_id, room_id, start_date, end_date, start_day, end_day, total_price, status, created_at)
+        VALUES (?,?,?,?,?,?,?,?,datetime('now'))
+    """, (user_id, room_id, start_date.isoformat(), end_date.isoformat(), dia(start_date), dia(end_date),
+          total, "PENDING_PAYMENT")).lastrowid
+    conn.executemany("INSERT INTO room_nights (room_id, night, booking_id) VALUES (?,?,?)",
+                     [(int(room_id), noche, booking_id) for noche in noches(start_date, end_date)])
+    return booking_id
+
+
+def expirar_pendientes(conn, minutos):
+    """Marca EXPIRED las reservas sin pagar creadas hace más de `minutos` y libera sus noches"""
+    vencidas = [r[0] for r in conn.execute(
+        "SELECT id FROM bookings WHERE status = 'PENDING_PAYMENT' AND created_at < datetime('now', ?)",
+        (f"-{int(minutos)} minutes",))]
+    for i in range(0, len(vencidas), 500):
+        lote = vencidas[i:i + 500]
+        marcas = ",".join("?" * len(lote))
+        conn.execute(f"UPDATE bookings SET status = ? WHERE id IN ({marcas})", (ESTADO_EXPIRADA, *lote))
+        conn.execute(f"DELETE FROM room_nights WHERE booking_id IN ({marcas})", lote)
+    return len(vencidas)
+
+
+def completar(conn):
+    """Backfill en bloque de las reservas existentes; devuelve las noches agregadas"""
+    return conn.execute(_SQL_COMPLETAR, (ESTADO_EXPIRADA,)).rowcount
+
+
+def disponibles(conn, start_date, end_date, room_type):
+    """Habitaciones del tipo sin ninguna noche tomada en [start_date, end_date) (anti-join por la clave)"""
+    return [dict(r) for r in conn.execute("""
+        SELECT r.id AS room_id, r.room_number, t.code AS room_type_code, t.name AS room_type_name, t.price
+        FROM rooms r JOIN room_types t ON t.id = r.room_type_id
+        WHERE t.code = ? AND NOT EXISTS (
+            SELECT 1 FROM room_nights n WHERE n.room_id = r.id AND n.night >= date(?) AND n.night < date(?)
+        )
+        ORDER BY r.room_number
+    """, (room_type, start_date, end_date))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la tabla room_nights")
+    parser.add_argument("--db", default=None, help="ruta de la BD (por defecto hotel_reservas.db)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("completar", help="migra la BD y expande a noches las reservas existentes")
+    expirar = sub.add_parser("expirar", help="expira reservas sin pagar y libera sus noches")
+    expirar.add_argument("--minutos", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    db = BaseDatos(args.db)
+    db.migrar()
+    conn = db.connect()
+    try:
+        with conn:
+            if args.comando == "completar":
+                print(f"✓ Noches agregadas: {completar(conn)}")
+            else:
+                print(f"✓ Reservas expiradas: {expirar_pendientes(conn, args.minutos)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
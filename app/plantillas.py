@@ -0,0 +1,110 @@
+"""
+Plantillas: caché de bytecode en disco, caché de fragmentos y respuestas en streaming.
+
+- Con PLANTILLAS_CACHE_DIR, Jinja guarda ahí el código compilado de cada plantilla; un worker
+  nuevo lo carga en vez de volver a parsear (se invalida solo si cambia la plantilla).
+- `{% fragmento "nombre", clave1, clave2 %}...{% endfragmento %}` guarda el HTML ya renderizado del
+  bloque por (plantilla, nombre, claves): la cabecera de base.html por sede y usuario; el marco de
+  booking.html (encabezado, métodos de pago, acciones por sede y overlay) una sola vez.
+- `transmitir` envía la plantilla por partes a medida que se renderiza (listas de resultados largas).
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from flask import get_flashed_messages, stream_template
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+
+class CacheFragmentos:
+    """LRU de fragmentos renderizados; `maximo` = 0 la desactiva"""
+
+    def __init__(self, maximo=512):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._fragmentos = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, renderizar):
+        if self.maximo <= 0:
+            return renderizar()
+        with self._lock:
+            html = self._fragmentos.get(clave)
+            if html is not None:
+                self._fragmentos.move_to_end(clave)
+                self.aciertos += 1
+                return html
+            self.fallos += 1
+        html = renderizar()
+        with self._lock:
+            self._fragmentos[clave] = html
+            if len(self._fragmentos) > self.maximo:
+                self._fragmentos.popitem(last=False)
+        return html
+
+    def limpiar(self):
+        with self._lock:
+            self._fragmentos.clear()
+
+    def resumen(self):
+        with self._lock:
+            return {"fragmentos": len(self._fragmentos), "maximo": self.maximo,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+class FragmentosExtension(Extension):
+    """Etiqueta {% fragmento %}: el cuerpo se renderiza una vez por combinación de claves"""
+
+    tags = {"fragmento"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragmentos=CacheFragmentos())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        claves = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            claves.append(parser.parse_expression())
+        cuerpo = parser.parse_statements(("name:endfragmento",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_renderizar", [nodes.Tuple(claves, "load")]),
+                               [], [], cuerpo).set_lineno(lineno)
+
+    def _renderizar(self, clave, caller):
+        return self.environment.fragmentos.obtener(clave, caller)
+
+
+def configurar(app):
+    """Caché de bytecode (si hay directorio) y extensión de fragmentos en el entorno Jinja de la app"""
+    directorio = app.config["PLANTILLAS_CACHE_DIR"]
+    if directorio:
+        Path(directorio).mkdir(parents=True, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(str(directorio))
+    app.jinja_env.add_extension(FragmentosExtension)
+    app.jinja_env.fragmentos.maximo = app.config["FRAGMENTOS_MAX"]
+
+
+def _agrupar(partes, tamano):
+    """Junta las partes que genera Jinja (muy chicas) en bloques de ~`tamano` caracteres"""
+    bloque, largo = [], 0
+    for parte in partes:
+        bloque.append(parte)
+        largo += len(parte)
+        if largo >= tamano:
+            yield "".join(bloque)
+            bloque, largo = [], 0
+    if bloque:
+        yield "".join(bloque)
+
+
+def transmitir(nombre, tamano=8192, **contexto):
+    """
+    stream_template en bloques de ~`tamano` caracteres.
+
+    Los mensajes flash se leen antes de empezar: la sesión se guarda cuando termina la vista,
+    y si la plantilla los sacara durante el streaming volverían a aparecer en la página siguiente.
+    """
+    get_flashed_messages(with_categories=True)
+    return _agrupar(stream_template(nombre, **contexto), tamano)
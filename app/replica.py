@@ -0,0 +1,102 @@
+import itertools
+import threading
+import time
+from pathlib import Path
+
+from db import connect, copiar_db
+
+_replicas = itertools.count()
+
+
+class Replica:
+    """
+    Réplica de solo lectura de la BD principal, refrescada con la API de backup de SQLite.
+
+    Cada refresco copia la principal en una BD nueva (en memoria con caché compartida, o
+    alternando entre dos archivos) y recién entonces la publica en `path`. `connect` resuelve
+    `path` y abre la conexión sin que un refresco pueda publicar en el medio, así que en memoria
+    cada conexión queda sobre una generación completa, que sigue viva mientras esté abierta. En
+    archivo la atomicidad es por transacción: el backup escribe con el archivo bloqueado, pero
+    una conexión que sobrevive a dos refrescos lee el archivo ya sobrescrito con la generación
+    nueva (y ese refresco espera si tiene una lectura en curso). El desfase está acotado: `connect` y
+    `generacion_vigente` refrescan de forma síncrona si la copia supera `max_desfase`
+    segundos, y opcionalmente un hilo la refresca cada `intervalo` segundos.
+    """
+
+    def __init__(self, primaria, destino="memoria", max_desfase=2.0, intervalo=None):
+        self.primaria = primaria
+        self.max_desfase = max_desfase
+        self.generacion = 0
+        self.path = None
+        self.actualizada = None
+        self._archivo = None if destino == "memoria" else Path(destino)
+        self._nombre = f"replica_{next(_replicas)}"
+        self._conexion = None
+        self._lock = threading.Lock()
+        # Publicar una generación y abrir una conexión sobre la vigente se excluyen (sin esperar copias)
+        self._publicar = threading.Lock()
+        self._detener = threading.Event()
+        self.refrescar()
+        self._hilo = None
+        if intervalo:
+            self._hilo = threading.Thread(target=self._bucle, args=(intervalo,), name="replica-sqlite", daemon=True)
+            self._hilo.start()
+
+    def _destino(self, generacion):
+        if self._archivo is None:
+            return f"file:{self._nombre}_{generacion}?mode=memory&cache=shared"
+        return str(self._archivo.with_name(f"{self._archivo.stem}.{generacion % 2}{self._archivo.suffix}"))
+
+    def refrescar(self, solo_si_vencida=False):
+        """Copia la principal en una BD nueva y la publica como réplica vigente"""
+        anterior = None
+        with self._lock:
+            # Con varios lectores esperando, solo el primero refresca una réplica vencida
+            if solo_si_vencida and self.actualizada is not None and self.desfase <= self.max_desfase:
+                return self.generacion
+            generacion = self.generacion + 1
+            inicio = time.monotonic()
+            conexion = copiar_db(self.primaria.path, self._destino(generacion))
+            if self._archivo is not None:
+                conexion.close()
+                conexion = None
+            with self._publicar:
+                # En memoria, la conexión retenida mantiene viva la copia hasta el próximo refresco;
+                # las conexiones ya abiertas sobre la anterior la mantienen viva por su cuenta
+                anterior, self._conexion = self._conexion, conexion
+                self.path, self.generacion, self.actualizada = self._destino(generacion), generacion, inicio
+                if anterior is not None:
+                    anterior.close()
+        return generacion
+
+    @property
+    def desfase(self):
+        """Segundos desde el inicio del último refresco"""
+        return time.monotonic() - self.actualizada
+
+    def generacion_vigente(self):
+        """Generación de la réplica, refrescando antes si superó el desfase máximo"""
+        if self.desfase > self.max_desfase:
+            self.refrescar(solo_si_vencida=True)
+        return self.generacion
+
+    def connect(self):
+        self.generacion_vigente()
+        with self._publicar:
+            return connect(self.path)
+
+    def _bucle(self, intervalo):
+        while not self._detener.wait(intervalo):
+            try:
+                self.refrescar()
+            except Exception:
+                # Principal bloqueada u ocupada: se reintenta en el próximo intervalo
+                pass
+
+    def cerrar(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(5)
+        if self._conexion is not None:
+            self._conexion.close()
+            self._conexion = None
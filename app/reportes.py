@@ -0,0 +1,191 @@
+"""
+Reportes de ocupación e ingresos sobre bookings/payments.
+
+    python app/reportes.py --desde 2026-01-01 --hasta 2027-01-01 [--db hotel_reservas.db]
+
+Ocupación por noche y tipo de habitación, ADR (ingreso por noche vendida), RevPAR (ingreso por
+noche disponible) y conversión de PENDING_PAYMENT a CONFIRMED.
+"""
+import argparse
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+from db import BaseDatos, dia
+from noches import ESTADO_EXPIRADA
+
+# Estados que bloquean la habitación y estados que cuentan como ingreso realizado
+ESTADOS_OCUPACION = ("PENDING_PAYMENT", "CONFIRMED")
+ESTADOS_INGRESO = ("CONFIRMED",)
+
+# Reservas agrupadas por (tipo, inicio, fin, estado): la BD agrega y Python recibe lotes
+_SQL_ESTADIAS = """
+    SELECT t.code, b.start_day, b.end_day, b.status, COUNT(*) AS reservas, SUM(b.total_price) AS ingreso
+    FROM bookings b
+    JOIN rooms r ON r.id = b.room_id
+    JOIN room_types t ON t.id = r.room_type_id
+    WHERE b.end_day > ? AND b.start_day < ?
+    GROUP BY t.code, b.start_day, b.end_day, b.status
+"""
+
+
+def _tasa(numerador, denominador):
+    return round(float(numerador) / float(denominador), 4) if denominador else 0.0
+
+
+class ReportesHotel:
+    """
+    Calcula y cachea reportes por período [desde, hasta) (noches de `desde` a `hasta` - 1).
+
+    La BD agrega las reservas en SQL y las entrega en lotes de `tamano_lote` filas; cada lote
+    se expande a noches con numpy sin generar una fila por noche: cada estadía suma en su
+    primera noche y resta en la siguiente a la última (arreglo de diferencias), y un cumsum
+    por tipo da las habitaciones ocupadas de cada noche. Cada resultado se guarda junto con
+    la firma de bookings/payments y se reutiliza mientras nadie escriba.
+    """
+
+    def __init__(self, db, tamano_lote=50_000, max_periodos=128):
+        self._db = db
+        self.tamano_lote = tamano_lote
+        self.max_periodos = max_periodos
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+
+    @staticmethod
+    def _firma(conn):
+        # Además de filas nuevas, los cambios de estado (pago, expiración) e importe invalidan la caché
+        return tuple(conn.execute("""
+            SELECT COUNT(*), COALESCE(MAX(id), 0), TOTAL(status = 'CONFIRMED'), TOTAL(status = 'PENDING_PAYMENT'),
+                   TOTAL(total_price), (SELECT COUNT(*) FROM payments), (SELECT COALESCE(MAX(id), 0) FROM payments)
+            FROM bookings
+        """).fetchone())
+
+    def reporte(self, desde, hasta):
+        """Reporte del período (fechas `date` o 'YYYY-MM-DD'); ValueError si el rango es inválido"""
+        desde, hasta = date.fromisoformat(str(desde)), date.fromisoformat(str(hasta))
+        if hasta <= desde:
+            raise ValueError("El período debe terminar después de empezar")
+        clave = (desde.isoformat(), hasta.isoformat())
+        conn = self._db.connect()
+        try:
+            firma = self._firma(conn)
+            with self._lock:
+                guardado = self._cache.get(clave)
+                if guardado is not None and guardado[0] == firma:
+                    self._cache.move_to_end(clave)
+                    return guardado[1]
+            reporte = self._calcular(conn, *clave)
+        finally:
+            conn.close()
+        with self._lock:
+            self._cache[clave] = (firma, reporte)
+            self._cache.move_to_end(clave)
+            while len(self._cache) > self.max_periodos:
+                self._cache.popitem(last=False)
+        return reporte
+
+    def _calcular(self, conn, desde, hasta):
+        inicio = dia(desde)
+        n_noches = dia(hasta) - inicio
+        habitaciones = {r["code"]: r["n"] for r in conn.execute("""
+            SELECT t.code, COUNT(r.id) AS n FROM room_types t LEFT JOIN rooms r ON r.room_type_id = t.id
+            GROUP BY t.code ORDER BY t.price, t.code
+        """)}
+        tipos = list(habitaciones)
+        posicion = {t: i for i, t in enumerate(tipos)}
+
+        # Arreglos de diferencias (noche × tipo) de habitaciones ocupadas, noches e ingreso confirmados
+        ocupadas = np.zeros((n_noches + 1, len(tipos)), dtype=np.int64)
+        vendidas = np.zeros_like(ocupadas)
+        ingreso = np.zeros((n_noches + 1, len(tipos)), dtype=np.float64)
+        conversion = dict.fromkeys((*ESTADOS_OCUPACION, ESTADO_EXPIRADA), 0)
+
+        cursor = conn.execute(_SQL_ESTADIAS, (inicio, dia(hasta)))
+        while True:
+            lote = cursor.fetchmany(self.tamano_lote)
+            if not lote:
+                break
+            tipo, ini, fin, estado, reservas, total = zip(*lote)
+            tipo = np.array([posicion.get(t, -1) for t in tipo])
+            ini, fin = np.array(ini, dtype=np.int64), np.array(fin, dtype=np.int64)
+            estado = np.array(estado)
+            reservas = np.array(reservas, dtype=np.int64)
+            total = np.array(total, dtype=np.float64)
+            for e in conversion:
+                # Conversión sobre las reservas que empiezan dentro del período
+                conversion[e] += int(reservas[(estado == e) & (ini >= inicio)].sum())
+
+            noches_reserva = fin - ini
+            validas = (tipo >= 0) & (noches_reserva > 0) & np.isin(estado, ESTADOS_OCUPACION)
+            a = np.clip(ini - inicio, 0, n_noches)[validas]
+            b = np.clip(fin - inicio, 0, n_noches)[validas]
+            t, n = tipo[validas], reservas[validas]
+            np.add.at(ocupadas, (a, t), n)
+            np.add.at(ocupadas, (b, t), -n)
+
+            pagadas = np.isin(estado[validas], ESTADOS_INGRESO)
+            a, b, t, n = a[pagadas], b[pagadas], t[pagadas], n[pagadas]
+            tarifa = (total[validas] / noches_reserva[validas])[pagadas]
+            np.add.at(vendidas, (a, t), n)
+            np.add.at(vendidas, (b, t), -n)
+            np.add.at(ingreso, (a, t), tarifa)
+            np.add.at(ingreso, (b, t), -tarifa)
+
+        ocupadas = ocupadas.cumsum(axis=0)[:n_noches]
+        vendidas = vendidas.cumsum(axis=0)[:n_noches]
+        ingreso = ingreso.cumsum(axis=0)[:n_noches]
+        capacidad = np.array([habitaciones[t] for t in tipos], dtype=np.int64)
+
+        def resumen(ocup, vend, ing, hab):
+            ocup, vend, ing, hab = int(ocup), int(vend), float(ing), int(hab)
+            disponibles = hab * n_noches
+            return {
+                "habitaciones": hab,
+                "noches_disponibles": disponibles,
+                "noches_ocupadas": ocup,
+                "noches_vendidas": vend,
+                "ingresos": round(ing, 2),
+                "ocupacion": _tasa(ocup, disponibles),
+                "adr": round(ing / vend, 2) if vend else 0.0,
+                "revpar": round(ing / disponibles, 2) if disponibles else 0.0,
+            }
+
+        por_noche = np.divide(ocupadas, capacidad, out=np.zeros(ocupadas.shape), where=capacidad > 0)
+        confirmadas, pendientes, expiradas = (conversion[e] for e in ("CONFIRMED", "PENDING_PAYMENT", ESTADO_EXPIRADA))
+        return {
+            "desde": desde,
+            "hasta": hasta,
+            "tipos": tipos,
+            "fechas": [str(d) for d in np.arange(desde, hasta, dtype="datetime64[D]")],
+            "ocupacion_por_noche": {t: np.round(por_noche[:, i], 4).tolist() for i, t in enumerate(tipos)},
+            "por_tipo": {t: resumen(ocupadas[:, i].sum(), vendidas[:, i].sum(), ingreso[:, i].sum(), capacidad[i])
+                         for i, t in enumerate(tipos)},
+            "total": resumen(ocupadas.sum(), vendidas.sum(), ingreso.sum(), capacidad.sum()),
+            "conversion": {"pendientes": pendientes, "confirmadas": confirmadas, "expiradas": expiradas,
+                           "tasa": _tasa(confirmadas, confirmadas + pendientes + expiradas)},
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reporte de ocupación, ADR, RevPAR y conversión")
+    parser.add_argument("--desde", required=True, help="primera noche (YYYY-MM-DD)")
+    parser.add_argument("--hasta", required=True, help="fin del período, excluido (YYYY-MM-DD)")
+    parser.add_argument("--db", default=None, help="ruta de la BD (por defecto hotel_reservas.db)")
+    parser.add_argument("--por-noche", action="store_true", help="incluir la ocupación de cada noche")
+    args = parser.parse_args(argv)
+
+    try:
+        reporte = ReportesHotel(BaseDatos(args.db)).reporte(args.desde, args.hasta)
+    except (ValueError, sqlite3.Error) as e:
+        parser.error(str(e))
+    if not args.por_noche:
+        reporte = {k: v for k, v in reporte.items() if k not in ("fechas", "ocupacion_por_noche")}
+    print(json.dumps(reporte, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
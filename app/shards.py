@@ -0,0 +1,162 @@
+"""
+Sharding por hotel: una BD SQLite por propiedad.
+
+SQLite serializa las escrituras por archivo, así que con una BD por hotel las reservas
+de propiedades distintas nunca compiten por el mismo lock.
+
+    python app/shards.py --dir shards crear hotel-centro
+    python app/shards.py --dir shards migrar
+    python app/shards.py --dir shards listar
+"""
+import argparse
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from db import BaseDatos
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SHARDS_DIR = BASE_DIR / "shards"
+
+PREFIJO = "hotel_"
+PATRON_ID = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+
+class ShardInexistente(KeyError):
+    """No hay BD para el hotel pedido"""
+
+
+def validar_id(hotel_id):
+    if not isinstance(hotel_id, str) or not PATRON_ID.match(hotel_id):
+        raise ValueError(f"Id de hotel inválido: {hotel_id!r} (minúsculas, dígitos, '-' o '_')")
+    return hotel_id
+
+
+class EnrutadorHoteles:
+    """
+    Resuelve cada hotel a su shard (`<directorio>/hotel_<id>.db`) y a sus recursos.
+
+    `fabrica(BaseDatos)` construye los recursos de un shard (catálogo, índice de disponibilidad...);
+    se crean la primera vez que se usa el hotel y se reutilizan después.
+    """
+
+    def __init__(self, directorio=SHARDS_DIR, fabrica=None, workers=8):
+        self.directorio = Path(directorio)
+        self._fabrica = fabrica or (lambda db: db)
+        self._lock = threading.Lock()
+        self._recursos = {}
+        self._construyendo = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shard")
+
+    def ruta(self, hotel_id):
+        return self.directorio / f"{PREFIJO}{validar_id(hotel_id)}.db"
+
+    def hoteles(self):
+        """Ids de los shards existentes en el directorio, ordenados"""
+        ids = (p.stem[len(PREFIJO):] for p in self.directorio.glob(f"{PREFIJO}*.db"))
+        # Ignora archivos auxiliares como las réplicas (hotel_<id>.replica.0.db)
+        return sorted(i for i in ids if PATRON_ID.match(i))
+
+    def recursos(self, hotel_id):
+        """Recursos del shard de `hotel_id`; ShardInexistente si no fue creado"""
+        with self._lock:
+            if hotel_id in self._recursos:
+                return self._recursos[hotel_id]
+        try:
+            ruta = self.ruta(hotel_id)
+        except ValueError:
+            raise ShardInexistente(hotel_id)
+        if not ruta.exists():
+            raise ShardInexistente(hotel_id)
+        # Un lock por hotel: dos primeras peticiones simultáneas construyen los recursos una sola vez
+        # (un RecursosHotel descartado dejaría vivos su escritor y su réplica) sin frenar a otros hoteles
+        with self._lock:
+            construir = self._construyendo.setdefault(hotel_id, threading.Lock())
+        with construir:
+            with self._lock:
+                if hotel_id in self._recursos:
+                    return self._recursos[hotel_id]
+            recursos = self._fabrica(BaseDatos(ruta))
+            with self._lock:
+                self._recursos[hotel_id] = recursos
+                self._construyendo.pop(hotel_id, None)
+            return recursos
+
+    # ------------------------------------------------------------------
+    # Herramientas de shards
+    # ------------------------------------------------------------------
+
+    def crear(self, hotel_id):
+        """Crea la BD de un hotel nuevo con el esquema al día"""
+        ruta = self.ruta(hotel_id)
+        if ruta.exists():
+            raise FileExistsError(f"El shard ya existe: {ruta}")
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        BaseDatos(ruta).init()
+        return ruta
+
+    def migrar(self, hoteles=None):
+        """Aplica las migraciones pendientes a cada shard (en paralelo); {hotel: (antes, después)}"""
+        hoteles = list(hoteles or self.hoteles())
+        versiones = self._pool.map(lambda h: BaseDatos(self.ruta(h)).migrar(), hoteles)
+        return dict(zip(hoteles, versiones))
+
+    # ------------------------------------------------------------------
+    # Consultas entre shards
+    # ------------------------------------------------------------------
+
+    def buscar(self, start_date, end_date, room_type, hoteles=None):
+        """
+        Habitaciones disponibles en todos los hoteles (o en `hoteles`), consultando los
+        shards en paralelo. Devuelve (resultados ordenados por precio, {hotel: error}).
+        """
+        hoteles = list(hoteles or self.hoteles())
+
+        def buscar_en(hotel_id):
+            disponibles = self.recursos(hotel_id).disponibles(start_date, end_date, room_type)
+            return [{**h, "hotel_id": hotel_id} for h in disponibles]
+
+        futuros = {h: self._pool.submit(buscar_en, h) for h in hoteles}
+        resultados, errores = [], {}
+        for hotel_id, futuro in futuros.items():
+            try:
+                resultados.extend(futuro.result())
+            except Exception as e:
+                errores[hotel_id] = f"{type(e).__name__}: {e}"
+        resultados.sort(key=lambda h: (h["price"], h["hotel_id"], h["room_number"]))
+        return resultados, errores
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Herramientas de shards por hotel")
+    parser.add_argument("--dir", default=str(SHARDS_DIR), help="directorio de los shards")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    crear = sub.add_parser("crear", help="crea la BD de uno o más hoteles")
+    crear.add_argument("hoteles", nargs="+")
+    migrar = sub.add_parser("migrar", help="aplica migraciones pendientes (todos los shards por defecto)")
+    migrar.add_argument("hoteles", nargs="*")
+    sub.add_parser("listar", help="lista los shards existentes")
+    args = parser.parse_args(argv)
+
+    enrutador = EnrutadorHoteles(args.dir)
+    try:
+        if args.comando == "crear":
+            for hotel_id in args.hoteles:
+                print(f"✓ Shard creado: {enrutador.crear(hotel_id)}")
+        elif args.comando == "migrar":
+            for hotel_id, (antes, despues) in enrutador.migrar(args.hoteles).items():
+                estado = "al día" if antes == despues else f"v{antes} → v{despues}"
+                print(f"✓ {hotel_id}: {estado}")
+        else:
+            for hotel_id in enrutador.hoteles():
+                print(f"{hotel_id:<30} {enrutador.ruta(hotel_id)}")
+    finally:
+        enrutador.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+// Auto-dismiss flash messages
+document.addEventListener('DOMContentLoaded', function() {
+    const flashes = document.querySelectorAll('.flash');
+    flashes.forEach((flash, index) => {
+        setTimeout(() => {
+            flash.style.animation = 'flashAppear 0.5s ease-out reverse';
+            setTimeout(() => flash.remove(), 500);
+        }, 5000 + (index * 500));
+    });
+});
+
+// Scroll indicator
+window.addEventListener('scroll', function() {
+    const scrollIndicator = document.getElementById('scrollIndicator');
+    const scrollHeight = document.documentElement.scrollHeight - window.innerHeight;
+    const scrollPercent = (window.scrollY / scrollHeight) * 100;
+    scrollIndicator.style.width = scrollPercent + '%';
+});
+
+// Add scanlines if not exists
+if (!document.querySelector('.scanlines')) {
+    const scanlines = document.createElement('div');
+    scanlines.className = 'scanlines';
+    document.body.prepend(scanlines);
+}
+
+// Keyboard shortcuts (Easter egg)
+let konamiCode = [];
+const konamiSequence = [38, 38, 40, 40, 37, 39, 37, 39, 66, 65];
+
+document.addEventListener('keydown', function(e) {
+    konamiCode.push(e.keyCode);
+    if (konamiCode.length > 10) konamiCode.shift();
+
+    if (konamiCode.join(',') === konamiSequence.join(',')) {
+        document.body.style.animation = 'glitchEffect 0.5s';
+        const flash = document.createElement('div');
+        flash.className = 'flash success';
+        flash.innerHTML = '<span class="flash-icon">🎮</span>CHEAT CODE ACTIVATED!<button class="flash-close" onclick="this.parentElement.remove()"></button>';
+        document.getElementById('flashMessages').appendChild(flash);
+        setTimeout(() => flash.remove(), 3000);
+        konamiCode = [];
+    }
+});
+
+// Console Easter egg
+console.log('%c⚡ HOTEL CYBER RESERVA ⚡', 'color: #0ff; font-size: 24px; font-weight: bold; text-shadow: 0 0 10px #0ff;');
+console.log('%c// SYSTEM ACCESS GRANTED //', 'color: #f0f; font-size: 14px; font-weight: bold;');
+console.log('%cWelcome to the Cyberpunk Hotel System!', 'color: #0f0; font-size: 12px;');
@@ -0,0 +1,48 @@
+// Payment method selection
+document.querySelectorAll('.method-card').forEach(card => {
+    card.addEventListener('click', function() {
+        document.querySelectorAll('.method-card').forEach(c => c.classList.remove('selected'));
+        this.classList.add('selected');
+    });
+});
+
+// Card number formatting
+document.getElementById('cardNumber').addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\s/g, '');
+    let formattedValue = value.match(/.{1,4}/g)?.join(' ') || value;
+    e.target.value = formattedValue;
+});
+
+// Expiry date formatting
+document.getElementById('expiry').addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\D/g, '');
+    if (value.length >= 2) {
+        value = value.slice(0, 2) + '/' + value.slice(2, 4);
+    }
+    e.target.value = value;
+});
+
+// CVV validation
+document.getElementById('cvv').addEventListener('input', function(e) {
+    e.target.value = e.target.value.replace(/\D/g, '');
+});
+
+// Form submission
+document.getElementById('paymentForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    // Show processing overlay
+    document.getElementById('processingOverlay').classList.add('active');
+
+    // Simulate processing delay
+    setTimeout(() => {
+        e.target.submit();
+    }, 2000);
+});
+
+// Add scanlines if not exists
+if (!document.querySelector('.scanlines')) {
+    const scanlines = document.createElement('div');
+    scanlines.className = 'scanlines';
+    document.body.prepend(scanlines);
+}
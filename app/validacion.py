@@ -0,0 +1,139 @@
+"""
+Validación de entrada por ruta, antes de tocar la BD.
+
+Cada ruta tiene un esquema compilado una vez al crear la app (patrones ya compilados y límites
+de la config). `Validador.validar` convierte los valores (fechas a `date`, enteros a `int`) o
+rechaza la petición con un motivo, que se cuenta en `rechazos`.
+"""
+import re
+import threading
+from collections import Counter
+from datetime import date
+
+PATRON_FECHA = re.compile(r"\d{4}-\d{2}-\d{2}")
+PATRON_ENTERO = re.compile(r"\d{1,9}")
+
+
+class EntradaInvalida(ValueError):
+    """Petición rechazada por el esquema; `motivo` es la clave corta que se cuenta"""
+
+    def __init__(self, motivo, mensaje):
+        super().__init__(mensaje)
+        self.motivo = motivo
+
+
+class Campo:
+    """Un parámetro del formulario o de la query string"""
+
+    def __init__(self, nombre, convertir, obligatorio=True, multiple=False, defecto=None):
+        self.nombre = nombre
+        self.convertir = convertir
+        self.obligatorio = obligatorio
+        self.multiple = multiple
+        self.defecto = defecto
+
+
+def fecha(nombre, valor, contexto):
+    if not PATRON_FECHA.fullmatch(valor):
+        raise EntradaInvalida("fecha", f"Fecha inválida en {nombre} (YYYY-MM-DD)")
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise EntradaInvalida("fecha", f"Fecha inválida en {nombre}")
+
+
+def entero(minimo, maximo):
+    def convertir(nombre, valor, contexto):
+        if not PATRON_ENTERO.fullmatch(valor) or not minimo <= int(valor) <= maximo:
+            raise EntradaInvalida("entero", f"{nombre} debe ser un entero entre {minimo} y {maximo}")
+        return int(valor)
+    return convertir
+
+
+def tipo_habitacion(nombre, valor, contexto):
+    if valor not in contexto["tipos"]:
+        raise EntradaInvalida("tipo", f"Tipo de habitación desconocido: {valor[:32]}")
+    return valor
+
+
+def rango(inicio, fin, maximo_dias=None):
+    """Regla: `inicio` < `fin` y, con `maximo_dias`, a lo sumo esa cantidad de días"""
+    def verificar(datos):
+        dias = (datos[fin] - datos[inicio]).days
+        if dias <= 0:
+            raise EntradaInvalida("rango", "Rango de fechas inválido")
+        if maximo_dias is not None and dias > maximo_dias:
+            raise EntradaInvalida("estadia", f"El rango no puede superar {maximo_dias} días")
+    return verificar
+
+
+class Esquema:
+    def __init__(self, campos, reglas=(), json=False):
+        self.campos = campos
+        self.reglas = reglas
+        self.json = json
+
+    def validar(self, fuente, contexto):
+        datos = {}
+        for campo in self.campos:
+            valores = fuente.getlist(campo.nombre) if campo.multiple else [fuente.get(campo.nombre, "")]
+            valores = [v.strip() for v in valores if v and v.strip()]
+            if not valores:
+                if campo.obligatorio:
+                    raise EntradaInvalida("falta", f"Falta el campo {campo.nombre}")
+                datos[campo.nombre] = campo.defecto
+                continue
+            convertidos = [campo.convertir(campo.nombre, v, contexto) for v in valores]
+            datos[campo.nombre] = convertidos if campo.multiple else convertidos[0]
+        for regla in self.reglas:
+            regla(datos)
+        return datos
+
+
+def esquemas_hotel(config):
+    """Esquemas de las rutas del blueprint hotel, con los límites de `config`"""
+    estadia = rango("start_date", "end_date", config["ESTADIA_MAXIMA"])
+    fechas = [Campo("start_date", fecha), Campo("end_date", fecha)]
+    return {
+        ("search", "POST"): Esquema(fechas + [Campo("room_type", tipo_habitacion)], [estadia]),
+        ("book", "POST"): Esquema([Campo("room_id", entero(1, 10**9))] + fechas, [estadia]),
+        ("search_matriz", "GET"): Esquema(
+            fechas + [Campo("room_type", tipo_habitacion, obligatorio=False, multiple=True, defecto=[]),
+                      Campo("flex", entero(0, config["FLEX_MAXIMO"]), obligatorio=False, defecto=0)],
+            [estadia], json=True),
+        ("reportes", "GET"): Esquema([Campo("desde", fecha), Campo("hasta", fecha)],
+                                     [rango("desde", "hasta", config["REPORTE_MAXIMO_DIAS"])], json=True),
+    }
+
+
+class Validador:
+    """Esquemas por (ruta, método) y contadores de peticiones aceptadas y rechazadas"""
+
+    def __init__(self, esquemas):
+        self.esquemas = esquemas
+        self._lock = threading.Lock()
+        self.aceptadas = Counter()
+        self.rechazos = Counter()
+
+    def esquema(self, ruta, metodo):
+        return self.esquemas.get((ruta, metodo))
+
+    def validar(self, ruta, metodo, fuente, contexto):
+        """Datos convertidos; EntradaInvalida (ya contada) si la petición no cumple el esquema"""
+        esquema = self.esquemas[(ruta, metodo)]
+        try:
+            datos = esquema.validar(fuente, contexto)
+        except EntradaInvalida as e:
+            with self._lock:
+                self.rechazos[(ruta, e.motivo)] += 1
+            raise
+        with self._lock:
+            self.aceptadas[ruta] += 1
+        return datos
+
+    def resumen(self):
+        with self._lock:
+            rechazadas = {}
+            for (ruta, motivo), n in sorted(self.rechazos.items()):
+                rechazadas.setdefault(ruta, {})[motivo] = n
+            return {"aceptadas": dict(sorted(self.aceptadas.items())), "rechazadas": rechazadas}
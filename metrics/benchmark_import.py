@@ -0,0 +1,80 @@
+"""
+Benchmark de arranque del CLI de métricas.
+
+Ejecuta cada subcomando en un proceso nuevo (como lo invoca el gate de release)
+y reporta la mediana de tiempo de pared, además de qué módulos pesados quedaron cargados.
+Corre sobre una copia de metrics/ en un directorio temporal: `compute` y `dashboard` escriben
+ahí el resumen y el histórico, y el árbol del repo queda intacto.
+
+    python metrics/benchmark_import.py [--repeticiones 10]
+"""
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ORIGEN = Path(__file__).resolve().parent
+PESADOS = ("pandas", "numpy", "matplotlib", "jinja2")
+
+CASOS = {
+    "--help": ["--help"],
+    "criteria --desde-json": ["criteria", "--desde-json", "-q"],
+    "compute": ["compute"],
+    "dashboard --json-only": ["dashboard", "--json-only"],
+}
+
+# Ejecuta el CLI en proceso y luego informa qué módulos pesados se importaron
+_SONDA = (
+    "import sys, io, contextlib; sys.path.insert(0, {base!r}); sys.argv = ['metricas_cli'] + {argv!r}\n"
+    "import metricas_cli\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    try: metricas_cli.main(sys.argv[1:])\n"
+    "    except SystemExit: pass\n"
+    "print(','.join(m for m in {pesados!r} if m in sys.modules))"
+)
+
+
+def copiar_metricas(destino):
+    """Copia metrics/ (código, datos y cachés) a `destino`; ahí van todas las salidas del benchmark"""
+    return Path(shutil.copytree(ORIGEN, Path(destino) / "metrics",
+                                ignore=shutil.ignore_patterns("__pycache__")))
+
+
+def medir(base, argv, repeticiones):
+    """Mediana (s) de `repeticiones` ejecuciones del CLI en procesos nuevos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, str(base / "metricas_cli.py"), *argv], cwd=base,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def modulos_cargados(base, argv):
+    """Módulos pesados presentes en sys.modules después de ejecutar el subcomando"""
+    codigo = _SONDA.format(base=str(base), argv=list(argv), pesados=PESADOS)
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=base,
+                            capture_output=True, text=True).stdout.strip().splitlines()
+    return salida[-1] if salida and salida[-1] else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque del CLI de métricas")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = copiar_metricas(tmp)
+        print(f"{'subcomando':<26} {'mediana':>9}   módulos pesados")
+        for nombre, argv in CASOS.items():
+            mediana = medir(base, argv, args.repeticiones)
+            print(f"{nombre:<26} {mediana * 1000:>7.0f}ms   {modulos_cargados(base, argv)}")
+
+
+if __name__ == "__main__":
+    main()
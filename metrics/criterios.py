@@ -0,0 +1,181 @@
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE = Path(__file__).resolve().parent
+RUTA_CRITERIOS = BASE / "criterios_salida.json"
+
+
+def _contiene(valores, patron):
+    return np.char.find(valores.astype(str), str(patron)) >= 0
+
+
+# Operadores vectorizados: (columna, umbral) -> array booleano
+OPERADORES = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+    "<": np.less,
+    "==": np.equal,
+    "!=": np.not_equal,
+    "contiene": _contiene,
+}
+
+
+class Condicion:
+    """Comparación `metrica op umbral`; `defecto` reemplaza el valor si la métrica falta"""
+
+    def __init__(self, metrica, op, umbral, defecto=0):
+        if op not in OPERADORES:
+            raise ValueError(f"Operador no soportado en criterio '{metrica}': {op}")
+        self.metrica = metrica
+        self.op = op
+        self.umbral = umbral
+        self.defecto = defecto
+        self.textual = op == "contiene" or isinstance(defecto, str)
+        # Condiciones con la misma clave comparten columna en la evaluación por lote
+        self.clave = (metrica, self.textual, repr(defecto))
+        self._funcion = OPERADORES[op]
+
+    def columna(self, tabla):
+        """Valores de la métrica para todos los candidatos, con el defecto donde falte"""
+        if self.metrica not in tabla:
+            serie = pd.Series(self.defecto, index=tabla.index)
+        else:
+            serie = tabla[self.metrica].where(tabla[self.metrica].notna(), self.defecto)
+        if self.textual:
+            return serie.astype(str).to_numpy()
+        return pd.to_numeric(serie, errors="coerce").fillna(self.defecto).to_numpy(dtype=float)
+
+    def evaluar(self, columna):
+        return self._funcion(columna, self.umbral)
+
+    def explicar(self, valor, cumple):
+        if not self.textual:
+            valor = int(valor) if float(valor).is_integer() else round(float(valor), 2)
+        return f"{self.metrica} = {valor!r} ({self.op} {self.umbral!r}) {'✓' if cumple else '✗'}"
+
+
+class Criterio:
+    """Criterio de salida: se cumple si alguna de sus condiciones se cumple"""
+
+    def __init__(self, nombre, condiciones):
+        self.nombre = nombre
+        self.condiciones = condiciones
+
+    @classmethod
+    def desde_config(cls, config):
+        especificaciones = config.get("cualquiera") or [config]
+        return cls(config["nombre"], [
+            Condicion(c["metrica"], c["op"], c["umbral"], c.get("defecto", 0)) for c in especificaciones
+        ])
+
+
+class ResultadoCriterios:
+    """Resultado de evaluar N candidatos: matriz booleana candidatos × criterios más los valores usados"""
+
+    def __init__(self, motor, matriz, columnas, parciales):
+        self.motor = motor
+        self.matriz = matriz
+        self.columnas = columnas
+        self.parciales = parciales
+        self.cumplidos = matriz.sum(axis=1)
+        self.aprobados = self.cumplidos >= motor.minimo_cumplidos
+
+    def __len__(self):
+        return self.matriz.shape[0]
+
+    @property
+    def porcentajes(self):
+        total = self.matriz.shape[1]
+        return np.round(self.cumplidos / total * 100, 2) if total else np.zeros(len(self))
+
+    def explicaciones(self, i):
+        """Por criterio, el valor observado de cada condición frente a su umbral"""
+        salida = {}
+        for j, criterio in enumerate(self.motor.criterios):
+            partes = [cond.explicar(self.columnas[cond.clave][i], bool(self.parciales[j][k][i]))
+                      for k, cond in enumerate(criterio.condiciones)]
+            salida[criterio.nombre] = " o ".join(partes)
+        return salida
+
+    def detalle(self, i=0):
+        """Resultado del candidato `i` con el formato de MetricasTesting.criterios_salida"""
+        return {
+            "criterios": {c.nombre: bool(self.matriz[i, j]) for j, c in enumerate(self.motor.criterios)},
+            "cumplidos": int(self.cumplidos[i]),
+            "total": int(self.matriz.shape[1]),
+            "porcentaje": float(self.porcentajes[i]),
+            "aprobado": bool(self.aprobados[i]),
+            "explicaciones": self.explicaciones(i),
+        }
+
+    def tabla(self, indice=None):
+        """DataFrame candidatos × criterios con cumplidos y aprobado"""
+        df = pd.DataFrame(self.matriz, columns=[c.nombre for c in self.motor.criterios], index=indice)
+        df["cumplidos"] = self.cumplidos
+        df["aprobado"] = self.aprobados
+        return df
+
+
+class MotorCriterios:
+    """
+    Motor declarativo de criterios de salida.
+
+    Los criterios se leen de configuración (criterios_salida.json) y se compilan una vez en
+    predicados vectorizados. Cada predicado se evalúa sobre columnas de agregados ya calculados
+    (métricas y conteos del cubo), nunca sobre las filas del dataset, de modo que un criterio
+    nuevo cuesta una comparación por candidato y no un recorrido completo del DataFrame.
+    """
+
+    def __init__(self, config):
+        self.minimo_cumplidos = int(config.get("minimo_cumplidos", 0))
+        self.conteos = dict(config.get("conteos", {}))
+        self.criterios = [Criterio.desde_config(c) for c in config["criterios"]]
+        self.condiciones = {}
+        for criterio in self.criterios:
+            for cond in criterio.condiciones:
+                self.condiciones.setdefault(cond.clave, cond)
+
+    @classmethod
+    def desde_archivo(cls, ruta=RUTA_CRITERIOS):
+        return cls(json.loads(Path(ruta).read_text(encoding="utf-8")))
+
+    def agregados(self, metricas, cubo):
+        """Métricas calculadas más los conteos configurados, resueltos contra el cubo"""
+        return {**metricas, **{nombre: cubo.contar(**filtros) for nombre, filtros in self.conteos.items()}}
+
+    def evaluar_lote(self, candidatos):
+        """
+        Evalúa todos los candidatos (DataFrame o lista de dicts de agregados) en una sola pasada.
+
+        Cada condición se aplica una vez sobre la columna completa de su métrica.
+        """
+        tabla = candidatos if isinstance(candidatos, pd.DataFrame) else pd.DataFrame.from_records(list(candidatos))
+        columnas = {clave: cond.columna(tabla) for clave, cond in self.condiciones.items()}
+        parciales = [[cond.evaluar(columnas[cond.clave]) for cond in c.condiciones] for c in self.criterios]
+        if parciales:
+            matriz = np.column_stack([np.logical_or.reduce(p) for p in parciales])
+        else:
+            matriz = np.zeros((len(tabla), 0), dtype=bool)
+        return ResultadoCriterios(self, matriz, columnas, parciales)
+
+    def evaluar(self, agregados):
+        """Evalúa un único candidato y devuelve su detalle"""
+        return self.evaluar_lote([agregados]).detalle(0)
+
+
+@lru_cache(maxsize=8)
+def _motor_compilado(ruta, firma):
+    return MotorCriterios.desde_archivo(ruta)
+
+
+def cargar_motor(ruta=RUTA_CRITERIOS):
+    """Motor compilado para `ruta`; se recompila solo si el archivo de configuración cambió"""
+    ruta = str(Path(ruta).resolve())
+    st = os.stat(ruta)
+    return _motor_compilado(ruta, f"{st.st_size}:{st.st_mtime_ns}")
@@ -0,0 +1,177 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Ejes del cubo, en orden; "day" es numérico (días desde dia_inicio), el resto categóricos
+EJES = ["day", "module", "severity", "status", "env"]
+CATEGORICOS = EJES[1:]
+
+
+class CuboDefectos:
+    """
+    Cubo de agregación denso: conteo de defectos por día × módulo × severidad × estado × entorno.
+
+    Se construye una vez desde el dataset y responde cualquier conteo o serie
+    (los que usan MetricasTesting y detectar_tendencia) sin volver a las filas originales.
+    """
+
+    def __init__(self, conteos, dia_inicio, categorias):
+        self.conteos = conteos
+        self.dia_inicio = np.datetime64(dia_inicio, "D")
+        self.categorias = {eje: list(categorias[eje]) for eje in CATEGORICOS}
+        self._posiciones = {eje: {v: i for i, v in enumerate(vals)} for eje, vals in self.categorias.items()}
+        self.metadatos = {}
+        # Filas sin fecha o sin valor en algún eje: no tienen celda (el groupby anterior también las omitía)
+        self.descartadas = 0
+
+    # ------------------------------------------------------------------
+    # Construcción y persistencia
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def vacio(cls):
+        return cls(np.zeros((0,) + (0,) * len(CATEGORICOS), dtype=np.int64),
+                   np.datetime64("1970-01-01", "D"), {eje: [] for eje in CATEGORICOS})
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        cubo = cls.vacio()
+        cubo.agregar(df)
+        return cubo
+
+    def agregar(self, df):
+        """Suma al cubo las filas de `df` (append incremental: amplía días y categorías si hace falta)"""
+        if len(df) == 0:
+            return self
+        # Sin fecha (NaT) o sin categoría no hay índice válido para ravel_multi_index
+        fechas = pd.to_datetime(df["date"], errors="coerce")
+        validas = fechas.notna()
+        for eje in CATEGORICOS:
+            validas &= df[eje].notna()
+        self.descartadas += int((~validas).sum())
+        df = df[validas]
+        if len(df) == 0:
+            return self
+        dias = fechas[validas].to_numpy().astype("datetime64[D]")
+
+        # Ampliar el eje de días
+        inicio = min(dias.min(), self.dia_inicio) if self.n_dias else dias.min()
+        fin = max(dias.max(), self.dia_fin) if self.n_dias else dias.max()
+        desplazamiento = int((self.dia_inicio - inicio).astype(int)) if self.n_dias else 0
+
+        # Ampliar los ejes categóricos con los valores nuevos
+        codigos = []
+        for eje in CATEGORICOS:
+            valores = df[eje].astype(str).to_numpy()
+            nuevos = [v for v in pd.unique(valores) if v not in self._posiciones[eje]]
+            for v in sorted(nuevos):
+                self._posiciones[eje][v] = len(self.categorias[eje])
+                self.categorias[eje].append(v)
+            codigos.append(pd.Series(valores).map(self._posiciones[eje]).to_numpy())
+
+        forma = (int((fin - inicio).astype(int)) + 1,) + tuple(len(self.categorias[e]) for e in CATEGORICOS)
+        if forma != self.conteos.shape:
+            ampliado = np.zeros(forma, dtype=np.int64)
+            region = (slice(desplazamiento, desplazamiento + self.conteos.shape[0]),) + \
+                     tuple(slice(0, n) for n in self.conteos.shape[1:])
+            ampliado[region] = self.conteos
+            self.conteos = ampliado
+        self.dia_inicio = inicio
+
+        indice_dia = (dias - inicio).astype(int)
+        plano = np.ravel_multi_index((indice_dia, *codigos), forma)
+        self.conteos += np.bincount(plano, minlength=self.conteos.size).reshape(forma)
+        return self
+
+    def guardar(self, ruta, **metadatos):
+        np.savez_compressed(
+            ruta,
+            conteos=self.conteos,
+            dia_inicio=np.array([str(self.dia_inicio)]),
+            descartadas=np.array([self.descartadas]),
+            **{f"cat_{eje}": np.array(self.categorias[eje], dtype=str) for eje in CATEGORICOS},
+            **{f"meta_{k}": np.array([v]) for k, v in metadatos.items()},
+        )
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            cubo = cls(datos["conteos"], datos["dia_inicio"][0],
+                       {eje: datos[f"cat_{eje}"].tolist() for eje in CATEGORICOS})
+            cubo.metadatos = {k[5:]: datos[k][0].item() for k in datos.files if k.startswith("meta_")}
+            if "descartadas" in datos.files:
+                cubo.descartadas = int(datos["descartadas"][0])
+        return cubo
+
+    @classmethod
+    def cargar_o_construir(cls, ruta_csv, ruta_cubo, df=None):
+        """Carga el cubo desde disco si corresponde al CSV actual; si no, lo reconstruye y lo guarda"""
+        st = os.stat(ruta_csv)
+        firma = f"{st.st_size}:{st.st_mtime_ns}"
+        ruta_cubo = Path(ruta_cubo)
+        if ruta_cubo.exists():
+            try:
+                cubo = cls.cargar(ruta_cubo)
+                if cubo.metadatos.get("firma") == firma:
+                    return cubo
+            except (OSError, ValueError, KeyError):
+                pass
+        cubo = cls.desde_dataframe(df if df is not None else pd.read_csv(ruta_csv))
+        ruta_cubo.parent.mkdir(parents=True, exist_ok=True)
+        cubo.metadatos = {"firma": firma}
+        cubo.guardar(ruta_cubo, **cubo.metadatos)
+        return cubo
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    @property
+    def n_dias(self):
+        return self.conteos.shape[0]
+
+    @property
+    def dia_fin(self):
+        return self.dia_inicio + np.timedelta64(self.n_dias - 1, "D")
+
+    def _recortar(self, desde=None, hasta=None, **filtros):
+        """
+        Sub-cubo con los filtros aplicados; cada filtro acepta un valor o una lista de valores.
+
+        Devuelve (sub_cubo, índice del primer día, etiquetas de los ejes categóricos filtrados).
+        """
+        i0 = 0 if desde is None else int((np.datetime64(desde, "D") - self.dia_inicio).astype(int))
+        i1 = self.n_dias if hasta is None else int((np.datetime64(hasta, "D") - self.dia_inicio).astype(int)) + 1
+        i0, i1 = max(i0, 0), max(min(i1, self.n_dias), 0)
+        sub = self.conteos[i0:max(i0, i1)]
+        etiquetas = dict(self.categorias)
+        for eje, valores in filtros.items():
+            if valores is None:
+                continue
+            if isinstance(valores, str):
+                valores = [valores]
+            etiquetas[eje] = [v for v in valores if v in self._posiciones[eje]]
+            sub = sub.take([self._posiciones[eje][v] for v in etiquetas[eje]], axis=EJES.index(eje))
+        return sub, i0, etiquetas
+
+    def contar(self, desde=None, hasta=None, **filtros):
+        """Total de defectos que cumplen los filtros (p. ej. severity="critical", status=["new", "open"])"""
+        sub, _, _ = self._recortar(desde, hasta, **filtros)
+        return int(sub.sum())
+
+    def serie(self, eje="day", desde=None, hasta=None, **filtros):
+        """Conteos a lo largo de un eje; para "day" devuelve una Serie indexada por fecha"""
+        sub, i0, etiquetas = self._recortar(desde, hasta, **filtros)
+        pos = EJES.index(eje)
+        valores = sub.sum(axis=tuple(i for i in range(sub.ndim) if i != pos))
+        if eje == "day":
+            fechas = self.dia_inicio + np.arange(i0, i0 + len(valores)).astype("timedelta64[D]")
+            return pd.Series(valores, index=pd.DatetimeIndex(fechas))
+        return pd.Series(valores, index=etiquetas[eje])
+
+    def serie_diaria(self, desde, hasta, **filtros):
+        """Serie diaria completa en [desde, hasta] (días fuera del cubo cuentan 0)"""
+        fechas = pd.date_range(desde, hasta, freq="D")
+        return self.serie("day", desde, hasta, **filtros).reindex(fechas, fill_value=0)
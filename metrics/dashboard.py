@@ -0,0 +1,149 @@
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+PLANTILLAS = Path(__file__).resolve().parent / "templates"
+HOJA_ESTILOS = "dashboard_cyber.css"
+
+# Orden de las secciones del dashboard y la plantilla parcial de cada una
+SECCIONES = {
+    "encabezado": "_encabezado.html",
+    "metricas": "_metricas.html",
+    "graficos": "_graficos.html",
+    "criterios": "_criterios.html",
+}
+
+TARJETAS = [
+    ("Cobertura", "cobertura_pruebas", "%"),
+    ("Resolución", "tasa_resolucion", "%"),
+    ("Eficiencia", "eficiencia_pruebas", "%"),
+    ("Estabilidad", "indice_estabilidad", "%"),
+    ("Críticos", "densidad_criticos", "%"),
+    ("T.Promedio", "tiempo_promedio_dias", "d"),
+    ("Retest", "tasa_retest", "%"),
+]
+
+GRAFICOS = [
+    ("trend", "Tendencia"),
+    ("severity", "Severidad"),
+    ("status", "Estado"),
+    ("semaforo", "Semáforo"),
+]
+
+# Entorno compartido: cada plantilla se compila una sola vez por proceso
+_entorno = Environment(
+    loader=FileSystemLoader(str(PLANTILLAS)),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    keep_trailing_newline=True,
+)
+
+
+def _huella(datos):
+    payload = json.dumps(datos, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _tendencia_display(tendencia):
+    """Texto corto de la tendencia para la tarjeta del dashboard"""
+    if "DESCENDENTE" in tendencia:
+        return "DESCEND"
+    if "ASCENDENTE" in tendencia:
+        return "ASCEND"
+    if "ESTABLE" in tendencia:
+        return "STABLE"
+    return tendencia
+
+
+def construir_contexto(metricas, criterios, huellas_graficos=None, dir_figuras="../figs"):
+    """Arma el contexto de cada sección a partir de las métricas y los criterios de salida"""
+    huellas_graficos = huellas_graficos or {}
+    tarjetas = [{"titulo": t, "valor": metricas.get(clave, 0), "unidad": u} for t, clave, u in TARJETAS]
+    tarjetas.append({"titulo": "Tendencia", "unidad": "",
+                     "valor": _tendencia_display(metricas.get("tendencia_defectos", "N/A"))})
+
+    graficos = []
+    for nombre, alt in GRAFICOS:
+        src = f"{dir_figuras}/{nombre}.png"
+        if nombre in huellas_graficos:
+            # Cache busting: la URL cambia solo cuando cambia el PNG
+            src += f"?v={huellas_graficos[nombre][:12]}"
+        graficos.append({"src": src, "alt": alt})
+
+    return {
+        "encabezado": {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")},
+        "metricas": {"tarjetas": tarjetas},
+        "graficos": {"graficos": graficos},
+        "criterios": {
+            "cumplidos": criterios["cumplidos"],
+            "total": criterios["total"],
+            "porcentaje": criterios["porcentaje"],
+            "aprobado": bool(criterios["aprobado"]),
+            "criterios": [(k, bool(v)) for k, v in criterios["criterios"].items()],
+        },
+    }
+
+
+class GeneradorDashboard:
+    """Genera el dashboard cyberpunk desde plantillas Jinja2 con caché por sección"""
+
+    def __init__(self, destino, nombre="dashboard_metricas_cyber.html"):
+        self.destino = Path(destino)
+        self.nombre = nombre
+        self._secciones = {}  # nombre -> (huella, html)
+
+    @property
+    def ruta(self):
+        return self.destino / self.nombre
+
+    @property
+    def _ruta_huella(self):
+        return self.destino / f".{self.nombre}.sha256"
+
+    def _render_seccion(self, nombre, contexto):
+        huella = _huella(contexto)
+        cacheada = self._secciones.get(nombre)
+        if cacheada and cacheada[0] == huella:
+            return cacheada[1]
+        html = Markup(_entorno.get_template(SECCIONES[nombre]).render(**contexto).rstrip("\n"))
+        self._secciones[nombre] = (huella, html)
+        return html
+
+    def render(self, contexto):
+        """Devuelve el HTML completo; solo re-renderiza las secciones cuyo contexto cambió"""
+        secciones = {nombre: self._render_seccion(nombre, contexto[nombre]) for nombre in SECCIONES}
+        return _entorno.get_template("dashboard_cyber.html").render(
+            secciones=secciones, hoja_estilos=HOJA_ESTILOS)
+
+    def escribir_estilos(self):
+        """Copia la hoja de estilos junto al dashboard si falta o está desactualizada"""
+        origen = (PLANTILLAS / HOJA_ESTILOS).read_bytes()
+        destino = self.destino / HOJA_ESTILOS
+        if destino.exists() and destino.read_bytes() == origen:
+            return False
+        destino.write_bytes(origen)
+        return True
+
+    def escribir(self, contexto):
+        """
+        Escribe el dashboard en disco. Si las métricas no cambiaron desde la última
+        escritura (el timestamp no cuenta) no se toca el archivo y devuelve False.
+        """
+        self.destino.mkdir(parents=True, exist_ok=True)
+        self.escribir_estilos()
+
+        huella = _huella({k: v for k, v in contexto.items() if k != "encabezado"})
+        try:
+            anterior = self._ruta_huella.read_text(encoding="utf-8").strip()
+        except OSError:
+            anterior = None
+        if anterior == huella and self.ruta.exists():
+            return False
+
+        self.ruta.write_text(self.render(contexto), encoding="utf-8")
+        self._ruta_huella.write_text(huella, encoding="utf-8")
+        return True
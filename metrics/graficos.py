@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Cambiar este valor invalida la caché cuando se modifica el estilo de los gráficos
+VERSION_ESTILO = "cyber-1"
+ARCHIVO_CACHE = ".cache_graficos.json"
+FONDO = '#0a0e27'
+
+
+def _pyplot():
+    """Importa pyplot bajo demanda forzando el backend headless Agg"""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot as plt
+    plt.style.use('dark_background')
+    return plt
+
+
+def _grafico_tendencia(plt, datos):
+    import numpy as np
+
+    plt.figure(figsize=(10, 6), facecolor=FONDO)
+    ax = plt.gca()
+    ax.set_facecolor(FONDO)
+
+    x = np.arange(len(datos["day"]))
+    plt.plot(x, datos["new"], marker='o', label="Nuevos", linewidth=3,
+             color='#00ffff', markerfacecolor='#ff00ff', markersize=10)
+    plt.plot(x, datos["closed"], marker='s', label="Cerrados", linewidth=3,
+             color='#ff00ff', markerfacecolor='#00ffff', markersize=10)
+    plt.plot(x, datos["open"], marker='^', label="Abiertos", linewidth=3,
+             color='#ffff00', markerfacecolor='#00ff00', markersize=10)
+
+    plt.xticks(x, datos["day"], rotation=45, color='#00ffff', fontsize=10)
+    plt.yticks(color='#00ffff', fontsize=10)
+    plt.title("TENDENCIA DE DEFECTOS", fontsize=16, fontweight='bold',
+              color='#00ffff', pad=20)
+    plt.xlabel("Fecha", color='#00ffff', fontsize=12)
+    plt.ylabel("Cantidad", color='#00ffff', fontsize=12)
+    plt.legend(facecolor=FONDO, edgecolor='#00ffff', fontsize=10)
+    plt.grid(True, alpha=0.2, color='#00ffff', linestyle='--')
+
+
+def _grafico_severidad(plt, datos):
+    plt.figure(figsize=(8, 6), facecolor=FONDO)
+    ax = plt.gca()
+    ax.set_facecolor(FONDO)
+
+    colors = ['#ff0000', '#ff00ff', '#ffff00', '#00ff00']
+    etiquetas = datos["labels"]
+    ax.bar(range(len(etiquetas)), datos["counts"], color=colors, edgecolor='#00ffff', linewidth=2)
+    ax.set_xticks(range(len(etiquetas)))
+    ax.set_xticklabels(etiquetas)
+
+    plt.title("DISTRIBUCIÓN POR SEVERIDAD", fontsize=16, fontweight='bold',
+              color='#ff00ff', pad=20)
+    plt.xlabel("Severidad", color='#00ffff', fontsize=12)
+    plt.ylabel("Cantidad", color='#00ffff', fontsize=12)
+    plt.xticks(rotation=45, color='#00ffff', fontsize=10)
+    plt.yticks(color='#00ffff', fontsize=10)
+    plt.grid(True, alpha=0.2, axis='y', color='#00ffff', linestyle='--')
+
+
+def _grafico_estado(plt, datos):
+    plt.figure(figsize=(8, 6), facecolor=FONDO)
+    ax = plt.gca()
+    ax.set_facecolor(FONDO)
+
+    colors_status = ['#00ff00', '#00ffff', '#ffff00', '#ff0000']
+    wedges, texts, autotexts = plt.pie(datos["counts"], labels=datos["labels"],
+                                       autopct='%1.1f%%', colors=colors_status,
+                                       startangle=90, textprops={'color': '#ffffff', 'fontsize': 11},
+                                       wedgeprops={'edgecolor': '#00ffff', 'linewidth': 2})
+
+    for autotext in autotexts:
+        autotext.set_color('#000000')
+        autotext.set_fontweight('bold')
+        autotext.set_fontsize(12)
+
+    plt.title("ESTADO DE DEFECTOS", fontsize=16, fontweight='bold',
+              color='#ff00ff', pad=20)
+
+
+def _grafico_semaforo(plt, datos):
+    import numpy as np
+
+    fig, ax = plt.subplots(figsize=(10, 6), facecolor=FONDO)
+    ax.set_facecolor(FONDO)
+
+    nombres, valores, umbral = datos["nombres"], datos["valores"], datos["umbral"]
+    x_pos = np.arange(len(nombres))
+    colores = ['#00ff00' if v >= u else '#ff0000' for v, u in zip(valores, umbral)]
+
+    bars = ax.barh(x_pos, valores, color=colores, alpha=0.8, edgecolor='#00ffff', linewidth=2)
+    ax.barh(x_pos, umbral, color='#666666', alpha=0.3, label='Umbral', edgecolor='#00ffff', linewidth=1)
+
+    ax.set_yticks(x_pos)
+    ax.set_yticklabels(nombres, color='#00ffff', fontsize=11)
+    ax.set_xlabel('Porcentaje (%)', color='#00ffff', fontsize=12)
+    ax.set_title('MÉTRICAS PRINCIPALES - SEMÁFORO', fontsize=16, fontweight='bold',
+                 color='#00ffff', pad=20)
+    ax.set_xlim(0, 100)
+    ax.legend(facecolor=FONDO, edgecolor='#00ffff', fontsize=10)
+    ax.grid(True, alpha=0.2, axis='x', color='#00ffff', linestyle='--')
+    ax.tick_params(colors='#00ffff')
+
+    for i, (bar, val) in enumerate(zip(bars, valores)):
+        ax.text(val + 2, i, f'{val}%', va='center', fontweight='bold',
+                color='#ffff00', fontsize=11)
+
+
+GRAFICOS = {
+    "trend": _grafico_tendencia,
+    "severity": _grafico_severidad,
+    "status": _grafico_estado,
+    "semaforo": _grafico_semaforo,
+}
+
+
+def preparar_datos(metricas_obj, tendencia_df):
+    """Extrae de las métricas los datos (serializables) que necesita cada gráfico"""
+    severidad = metricas_obj.df["severity"].value_counts()
+    estado = metricas_obj.df["status"].value_counts()
+    m = metricas_obj.metricas
+    principales = [
+        ("Cobertura", m.get("cobertura_pruebas", 0), 90),
+        ("Resolución", m.get("tasa_resolucion", 0), 85),
+        ("Eficiencia", m.get("eficiencia_pruebas", 0), 80),
+        ("Estabilidad", m.get("indice_estabilidad", 0), 70),
+    ]
+    return metricas_obj._convert_to_native({
+        "trend": {
+            "day": list(tendencia_df["day"]),
+            "new": list(tendencia_df["new"]),
+            "closed": list(tendencia_df["closed"]),
+            "open": list(tendencia_df["open"]),
+        },
+        "severity": {"labels": [str(k) for k in severidad.index], "counts": list(severidad.values)},
+        "status": {"labels": [str(k) for k in estado.index], "counts": list(estado.values)},
+        "semaforo": {
+            "nombres": [p[0] for p in principales],
+            "valores": [p[1] for p in principales],
+            "umbral": [p[2] for p in principales],
+        },
+    })
+
+
+def huella(nombre, datos):
+    """Hash del contenido de entrada de un gráfico (incluye la versión de estilo)"""
+    payload = json.dumps([VERSION_ESTILO, nombre, datos], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def huellas(datos):
+    """Huella de cada gráfico a partir de los datos preparados"""
+    return {nombre: huella(nombre, datos[nombre]) for nombre in GRAFICOS}
+
+
+def renderizar_grafico(nombre, datos, ruta, dpi=100):
+    """Renderiza un gráfico a PNG; es la unidad de trabajo de los procesos worker"""
+    plt = _pyplot()
+    GRAFICOS[nombre](plt, datos)
+    plt.tight_layout()
+    plt.savefig(ruta, dpi=dpi, facecolor=FONDO)
+    plt.close('all')
+    return nombre
+
+
+def _leer_cache(destino):
+    try:
+        return json.loads((destino / ARCHIVO_CACHE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def renderizar_graficos(datos, destino, paralelo=True, workers=None, forzar=False):
+    """
+    Renderiza los gráficos cuyos datos cambiaron desde la última ejecución.
+
+    Devuelve la lista de nombres re-renderizados; los PNG con la misma huella se reutilizan.
+    """
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    cache = _leer_cache(destino)
+
+    actuales = huellas(datos)
+    pendientes = [
+        nombre for nombre in GRAFICOS
+        if forzar or cache.get(nombre) != actuales[nombre] or not (destino / f"{nombre}.png").exists()
+    ]
+
+    if paralelo and len(pendientes) > 1:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pendientes)))
+    else:
+        workers = 1
+
+    if workers == 1:
+        for nombre in pendientes:
+            renderizar_grafico(nombre, datos[nombre], destino / f"{nombre}.png")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [pool.submit(renderizar_grafico, nombre, datos[nombre], destino / f"{nombre}.png")
+                       for nombre in pendientes]
+            for futuro in futuros:
+                futuro.result()
+
+    if pendientes:
+        cache.update({nombre: actuales[nombre] for nombre in pendientes})
+        (destino / ARCHIVO_CACHE).write_text(json.dumps(cache, indent=2), encoding="utf-8")
+    return pendientes
@@ -0,0 +1,164 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent
+RUTA_HISTORIAL = BASE / "dashboards" / "historial_metricas.db"
+
+# Longitud del prefijo ISO del timestamp que define cada granularidad de compactación
+GRANULARIDADES = {"hora": 13, "dia": 10, "mes": 7}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    dataset TEXT NOT NULL DEFAULT '',
+    release_tag TEXT NOT NULL DEFAULT '',
+    granularidad TEXT NOT NULL DEFAULT 'raw',
+    cumplidos INTEGER,
+    total INTEGER,
+    aprobado INTEGER
+);
+CREATE TABLE IF NOT EXISTS valores (
+    snapshot_id INTEGER NOT NULL,
+    metrica TEXT NOT NULL,
+    valor REAL NOT NULL,
+    PRIMARY KEY (snapshot_id, metrica),
+    FOREIGN KEY (snapshot_id) REFERENCES snapshots(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots(timestamp);
+CREATE INDEX IF NOT EXISTS idx_snapshots_release ON snapshots(release_tag, timestamp);
+CREATE INDEX IF NOT EXISTS idx_valores_metrica ON valores(metrica, snapshot_id);
+"""
+
+
+def _valores_numericos(resumen):
+    """Métricas numéricas del resumen más los contadores de criterios de salida"""
+    valores = {
+        k: float(v) for k, v in resumen.get("metricas", {}).items()
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    }
+    criterios = resumen.get("criterios_salida", {})
+    if "porcentaje" in criterios:
+        valores["criterios_porcentaje"] = float(criterios["porcentaje"])
+    return valores
+
+
+class HistorialMetricas:
+    """Histórico de resúmenes de métricas en SQLite, con consultas de series temporales"""
+
+    def __init__(self, ruta=RUTA_HISTORIAL):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.executescript(ESQUEMA)
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        conn = sqlite3.connect(str(self.ruta))
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def guardar(self, resumen, dataset="", release=""):
+        """Guarda un resumen (el de construir_resumen) como snapshot; devuelve su id"""
+        return self.guardar_lote([(resumen, dataset, release)])[0]
+
+    def guardar_lote(self, entradas):
+        """Inserta varios (resumen, dataset, release) en una sola transacción"""
+        ids = []
+        conn = self._conectar()
+        try:
+            with conn:
+                filas = []
+                for resumen, dataset, release in entradas:
+                    c = resumen.get("criterios_salida", {})
+                    cur = conn.execute(
+                        "INSERT INTO snapshots (timestamp, dataset, release_tag, cumplidos, total, aprobado) "
+                        "VALUES (?,?,?,?,?,?)",
+                        (resumen.get("timestamp") or datetime.now().isoformat(), str(dataset or ""),
+                         str(release or ""), c.get("cumplidos"), c.get("total"),
+                         None if "aprobado" not in c else int(bool(c["aprobado"]))))
+                    ids.append(cur.lastrowid)
+                    filas.extend((cur.lastrowid, k, v) for k, v in _valores_numericos(resumen).items())
+                conn.executemany("INSERT INTO valores (snapshot_id, metrica, valor) VALUES (?,?,?)", filas)
+        finally:
+            conn.close()
+        return ids
+
+    def serie(self, metrica, desde=None, hasta=None, dataset=None, release=None):
+        """Serie temporal [(timestamp, valor), ...] de una métrica, ordenada por timestamp"""
+        sql = ["SELECT s.timestamp, v.valor FROM valores v JOIN snapshots s ON s.id = v.snapshot_id",
+               "WHERE v.metrica = ?"]
+        params = [metrica]
+        for condicion, valor in (("s.timestamp >= ?", desde), ("s.timestamp <= ?", hasta),
+                                 ("s.dataset = ?", dataset), ("s.release_tag = ?", release)):
+            if valor is not None:
+                sql.append(f"AND {condicion}")
+                params.append(str(valor))
+        sql.append("ORDER BY s.timestamp")
+        conn = self._conectar()
+        try:
+            return [(r["timestamp"], r["valor"]) for r in conn.execute(" ".join(sql), params)]
+        finally:
+            conn.close()
+
+    def por_release(self, metrica, dataset=None):
+        """Último valor y promedio de una métrica por release, en orden de aparición"""
+        sql = """
+            SELECT s.release_tag AS release, MIN(s.timestamp) AS desde, MAX(s.timestamp) AS hasta,
+                   AVG(v.valor) AS promedio, COUNT(*) AS snapshots,
+                   (SELECT v2.valor FROM valores v2 JOIN snapshots s2 ON s2.id = v2.snapshot_id
+                     WHERE v2.metrica = v.metrica AND s2.release_tag = s.release_tag
+                       AND (:dataset IS NULL OR s2.dataset = :dataset)
+                     ORDER BY s2.timestamp DESC LIMIT 1) AS ultimo
+            FROM valores v JOIN snapshots s ON s.id = v.snapshot_id
+            WHERE v.metrica = :metrica AND s.release_tag != ''
+              AND (:dataset IS NULL OR s.dataset = :dataset)
+            GROUP BY s.release_tag
+            ORDER BY desde
+        """
+        conn = self._conectar()
+        try:
+            return [dict(r) for r in conn.execute(sql, {"metrica": metrica, "dataset": dataset})]
+        finally:
+            conn.close()
+
+    def compactar(self, antiguedad_dias=30, granularidad="dia", ahora=None):
+        """
+        Retención: los snapshots crudos más antiguos que `antiguedad_dias` se reemplazan
+        por un snapshot promedio por (dataset, release, periodo). Devuelve cuántos se compactaron.
+        """
+        largo = GRANULARIDADES[granularidad]
+        limite = ((ahora or datetime.now()) - timedelta(days=antiguedad_dias)).isoformat()
+        conn = self._conectar()
+        try:
+            with conn:
+                grupos = conn.execute(
+                    """SELECT dataset, release_tag, substr(timestamp, 1, ?) AS periodo,
+                              MIN(timestamp) AS ts, MIN(cumplidos) AS cumplidos, MAX(total) AS total,
+                              MIN(aprobado) AS aprobado, group_concat(id) AS ids, COUNT(*) AS n
+                       FROM snapshots WHERE granularidad = 'raw' AND timestamp < ?
+                       GROUP BY dataset, release_tag, periodo""",
+                    (largo, limite)).fetchall()
+                compactados = 0
+                for g in grupos:
+                    ids = [int(i) for i in g["ids"].split(",")]
+                    marcadores = ",".join("?" * len(ids))
+                    cur = conn.execute(
+                        "INSERT INTO snapshots (timestamp, dataset, release_tag, granularidad, cumplidos, total, aprobado) "
+                        "VALUES (?,?,?,?,?,?,?)",
+                        (g["ts"], g["dataset"], g["release_tag"], granularidad,
+                         g["cumplidos"], g["total"], g["aprobado"]))
+                    conn.execute(
+                        f"""INSERT INTO valores (snapshot_id, metrica, valor)
+                            SELECT ?, metrica, AVG(valor) FROM valores
+                            WHERE snapshot_id IN ({marcadores}) GROUP BY metrica""",
+                        [cur.lastrowid, *ids])
+                    conn.execute(f"DELETE FROM snapshots WHERE id IN ({marcadores})", ids)
+                    compactados += g["n"]
+            return compactados
+        finally:
+            conn.close()
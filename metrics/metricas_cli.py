@@ -0,0 +1,136 @@
+"""
+CLI de métricas de testing con subcomandos.
+
+    python metrics/metricas_cli.py compute   [--release R] [--stdout]
+    python metrics/metricas_cli.py criteria  [--desde-json [RUTA]]
+    python metrics/metricas_cli.py dashboard [--release R] [--json-only]
+    python metrics/metricas_cli.py lote ORIGEN [--workers N] [--release R]
+    python metrics/metricas_cli.py pruebas [--ejecuciones N] [--top N]
+
+Este módulo solo importa la biblioteca estándar: pandas/numpy se cargan en los
+subcomandos que calculan métricas, y matplotlib/Jinja2 únicamente en `dashboard`
+sin --json-only. `criteria --desde-json` lee el último resumen sin cargar nada de eso.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent
+RESUMEN_JSON = BASE / "dashboards" / "metricas_resumen.json"
+
+
+def _imprimir_criterios(criterios_salida):
+    for nombre, ok in criterios_salida["detalle"].items():
+        print(f"{'✓' if ok else '✗'} {nombre}")
+    estado = "APROBADO" if criterios_salida["aprobado"] else "NO CUMPLE CRITERIOS MÍNIMOS"
+    print(f"\n{criterios_salida['cumplidos']}/{criterios_salida['total']} "
+          f"({criterios_salida['porcentaje']}%) - {estado}")
+
+
+def cmd_compute(args):
+    """Calcula métricas y criterios y guarda el resumen JSON (sin gráficos ni HTML)"""
+    from sistema_metricas import calcular_metricas, guardar_resumen
+
+    metricas, _, criterios = calcular_metricas()
+    resumen, ruta, _ = guardar_resumen(metricas, criterios, release=args.release)
+    if args.stdout:
+        print(json.dumps(resumen, indent=2, ensure_ascii=False))
+    else:
+        print(f"✓ Resumen JSON guardado: {ruta}")
+    return 0
+
+
+def cmd_criteria(args):
+    """Evalúa los criterios de salida; el código de salida es 0 si el release se aprueba"""
+    if args.desde_json:
+        ruta = Path(args.desde_json)
+        if not ruta.exists():
+            print(f"✗ No existe el resumen: {ruta}", file=sys.stderr)
+            return 2
+        criterios_salida = json.loads(ruta.read_text(encoding="utf-8"))["criterios_salida"]
+    else:
+        from sistema_metricas import calcular_metricas, construir_resumen
+
+        metricas, _, criterios = calcular_metricas()
+        criterios_salida = construir_resumen(metricas, criterios)["criterios_salida"]
+
+    if not args.quiet:
+        _imprimir_criterios(criterios_salida)
+    return 0 if criterios_salida["aprobado"] else 1
+
+
+def cmd_dashboard(args):
+    """Pipeline completo: métricas, gráficos, dashboard HTML, resumen JSON e histórico"""
+    from sistema_metricas import main
+
+    main(release=args.release, json_only=args.json_only)
+    return 0
+
+
+def cmd_lote(args):
+    """Modo batch sobre un directorio o patrón glob de datasets"""
+    from metricas_lote import main_lote
+
+    consolidado = main_lote(args.origen, workers=args.workers, release=args.release)
+    return 0 if consolidado is not None else 2
+
+
+def cmd_pruebas(args):
+    """Reporte de duración por test a lo largo de las últimas ejecuciones de pytest"""
+    from resultados_pruebas import ResultadosPruebas, reporte_duraciones
+
+    almacen = ResultadosPruebas(args.db) if args.db else ResultadosPruebas()
+    conteos = almacen.conteos()
+    if conteos is None:
+        print("✗ No hay ejecuciones de pytest registradas", file=sys.stderr)
+        return 2
+    print(f"Última ejecución #{conteos['ejecucion']} ({conteos['fecha']}): "
+          f"{conteos['ejecutados']}/{conteos['total']} ejecutados {conteos['resultados']}\n")
+    print(reporte_duraciones(almacen.duraciones(ejecuciones=args.ejecuciones, limite=args.top)))
+    return 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="metricas_cli",
+                                     description="Sistema de métricas de testing - IEEE 829")
+    sub = parser.add_subparsers(dest="comando", metavar="COMANDO")
+    sub.required = True
+
+    p = sub.add_parser("compute", help="calcula métricas y guarda el resumen JSON (sin gráficos)")
+    p.add_argument("--release", default="", help="etiqueta de release del snapshot en el histórico")
+    p.add_argument("--stdout", action="store_true", help="imprime el resumen JSON por salida estándar")
+    p.set_defaults(func=cmd_compute)
+
+    p = sub.add_parser("criteria", help="evalúa los criterios de salida (exit 0 = aprobado, 1 = rechazado)")
+    p.add_argument("--desde-json", nargs="?", const=str(RESUMEN_JSON), default=None, metavar="RUTA",
+                   help="usa un resumen ya calculado en lugar de recalcular (por defecto el último)")
+    p.add_argument("-q", "--quiet", action="store_true", help="sin salida; solo el código de salida")
+    p.set_defaults(func=cmd_criteria)
+
+    p = sub.add_parser("dashboard", help="genera gráficos, dashboard HTML y resumen JSON")
+    p.add_argument("--release", default="", help="etiqueta de release del snapshot en el histórico")
+    p.add_argument("--json-only", action="store_true", help="no genera gráficos ni HTML (no importa matplotlib)")
+    p.set_defaults(func=cmd_dashboard)
+
+    p = sub.add_parser("lote", help="procesa varios datasets en paralelo")
+    p.add_argument("origen", help="directorio o patrón glob de datasets CSV")
+    p.add_argument("--workers", type=int, default=None, help="procesos del pool (por defecto: núcleos)")
+    p.add_argument("--release", default="", help="etiqueta de release de los snapshots")
+    p.set_defaults(func=cmd_lote)
+
+    p = sub.add_parser("pruebas", help="duración por test en las últimas ejecuciones de pytest")
+    p.add_argument("--ejecuciones", type=int, default=10, help="ejecuciones a considerar")
+    p.add_argument("--top", type=int, default=20, help="cantidad de tests más lentos a mostrar")
+    p.add_argument("--db", default=None, help="almacén de resultados (por defecto dashboards/resultados_pruebas.db)")
+    p.set_defaults(func=cmd_pruebas)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
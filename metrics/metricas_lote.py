@@ -0,0 +1,143 @@
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from historial import HistorialMetricas
+from sistema_metricas import MetricasTesting, construir_resumen, OUT, PARAMETROS_EJECUCION
+
+# Parámetros de ejecución por defecto (los mismos que usa main())
+PARAMETROS_DEFECTO = PARAMETROS_EJECUCION
+
+
+def resolver_datasets(origen):
+    """Devuelve la lista ordenada de CSV a procesar a partir de un directorio o un patrón glob"""
+    origen = str(origen)
+    if os.path.isdir(origen):
+        rutas = glob.glob(os.path.join(origen, "**", "*.csv"), recursive=True)
+    else:
+        rutas = glob.glob(origen, recursive=True)
+    return sorted(Path(r).resolve() for r in rutas if os.path.isfile(r))
+
+
+def procesar_dataset(ruta, parametros=None):
+    """Calcula métricas y criterios de salida de un dataset (se ejecuta en un proceso worker)"""
+    import pandas as pd
+
+    parametros = {**PARAMETROS_DEFECTO, **(parametros or {})}
+    inicio = datetime.now()
+    try:
+        df = pd.read_csv(ruta)
+        metricas = MetricasTesting(df)
+        metricas.calcular_todas_metricas(**parametros)
+        metricas.detectar_tendencia(dias=5)
+        criterios = metricas.criterios_salida()
+        resumen = construir_resumen(metricas, criterios)
+        resumen["defectos"] = int(len(df))
+        return {"dataset": str(ruta), "ok": True, "resumen": resumen,
+                "segundos": (datetime.now() - inicio).total_seconds()}
+    except Exception as e:
+        return {"dataset": str(ruta), "ok": False, "error": f"{type(e).__name__}: {e}",
+                "segundos": (datetime.now() - inicio).total_seconds()}
+
+
+def procesar_lote(rutas, workers=None, parametros=None):
+    """Procesa varios datasets en un pool de procesos y devuelve los resultados en el orden de entrada"""
+    rutas = list(rutas)
+    if not rutas:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(rutas)))
+    if workers == 1:
+        return [procesar_dataset(r, parametros) for r in rutas]
+
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(procesar_dataset, r, parametros): r for r in rutas}
+        for futuro in as_completed(futuros):
+            ruta = futuros[futuro]
+            try:
+                resultados[ruta] = futuro.result()
+            except Exception as e:
+                # Fallo del propio worker (p. ej. proceso terminado), no del dataset
+                resultados[ruta] = {"dataset": str(ruta), "ok": False,
+                                    "error": f"{type(e).__name__}: {e}", "segundos": 0.0}
+    return [resultados[r] for r in rutas]
+
+
+def consolidar(resultados):
+    """Combina los resultados individuales en un único resumen con reporte de fallos"""
+    exitosos = [r for r in resultados if r["ok"]]
+    fallidos = [r for r in resultados if not r["ok"]]
+
+    # Promedio ponderado por número de defectos de cada métrica numérica
+    total_defectos = sum(r["resumen"]["defectos"] for r in exitosos)
+    sumas = {}
+    for r in exitosos:
+        peso = r["resumen"]["defectos"]
+        for nombre, valor in r["resumen"]["metricas"].items():
+            if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+                sumas[nombre] = sumas.get(nombre, 0.0) + valor * peso
+    promedios = {k: round(v / total_defectos, 2) for k, v in sumas.items()} if total_defectos else {}
+
+    aprobados = sum(1 for r in exitosos if r["resumen"]["criterios_salida"]["aprobado"])
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "datasets": {
+            "total": len(resultados),
+            "procesados": len(exitosos),
+            "fallidos": len(fallidos),
+            "aprobados": aprobados,
+        },
+        "defectos_totales": total_defectos,
+        "metricas_ponderadas": promedios,
+        "resultados": {r["dataset"]: r["resumen"] for r in exitosos},
+        "fallos": [{"dataset": r["dataset"], "error": r["error"]} for r in fallidos],
+    }
+
+
+def main_lote(origen, workers=None, salida=None, release=""):
+    """Ejecuta el modo batch: procesa todos los datasets de `origen` y escribe el consolidado"""
+    print("=" * 60)
+    print("SISTEMA DE MÉTRICAS DE TESTING - MODO LOTE")
+    print("=" * 60)
+
+    rutas = resolver_datasets(origen)
+    if not rutas:
+        print(f"\n✗ No se encontraron datasets en: {origen}")
+        return None
+    print(f"\n✓ Datasets encontrados: {len(rutas)}")
+
+    inicio = datetime.now()
+    resultados = procesar_lote(rutas, workers=workers)
+    consolidado = consolidar(resultados)
+    duracion = (datetime.now() - inicio).total_seconds()
+
+    print("\n" + "=" * 60)
+    print("RESULTADOS POR DATASET")
+    print("=" * 60)
+    for r in resultados:
+        if r["ok"]:
+            c = r["resumen"]["criterios_salida"]
+            estado = "✓ APROBADO" if c["aprobado"] else "✗ RECHAZADO"
+            print(f"{Path(r['dataset']).name:.<40} {c['cumplidos']}/{c['total']} {estado}")
+        else:
+            print(f"{Path(r['dataset']).name:.<40} ⚠ ERROR: {r['error']}")
+
+    salida = Path(salida) if salida else OUT / "metricas_consolidado.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(consolidado, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    d = consolidado["datasets"]
+    print(f"\n✓ {d['procesados']}/{d['total']} datasets procesados en {duracion:.2f}s "
+          f"({d['aprobados']} aprobados, {d['fallidos']} con error)")
+    print(f"✓ Resumen consolidado guardado: {salida}")
+
+    historial = HistorialMetricas()
+    historial.guardar_lote([(r["resumen"], r["dataset"], release) for r in resultados if r["ok"]])
+    print(f"✓ {d['procesados']} snapshots agregados al histórico: {historial.ruta}")
+    return consolidado
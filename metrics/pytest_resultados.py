@@ -0,0 +1,109 @@
+"""
+Plugin de pytest que guarda cada resultado (y su duración) en el almacén de resultados.
+
+Se carga desde tests/conftest.py (en otros proyectos: `pytest -p pytest_resultados`), pero solo
+registra la ejecución si se pide: `--resultados-db` (el almacén de métricas), `--resultados-db-ruta RUTA`
+o la variable de entorno PYTEST_RESULTADOS_DB=RUTA. Así una corrida local cualquiera no ensucia las métricas.
+"""
+import os
+import re
+
+import pytest
+
+from resultados_pruebas import RUTA_RESULTADOS, ResultadosPruebas
+
+_CASO = re.compile(r"\bTC-\d+\b")
+VARIABLE_ENTORNO = "PYTEST_RESULTADOS_DB"
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("resultados", "almacén de resultados para métricas")
+    grupo.addoption("--resultados-db", action="store_true",
+                    help="registrar la ejecución en el almacén de métricas")
+    grupo.addoption("--resultados-db-ruta", metavar="RUTA", default=os.environ.get(VARIABLE_ENTORNO) or None,
+                    help=f"registrar la ejecución en esta base SQLite (también con la variable {VARIABLE_ENTORNO})")
+    grupo.addoption("--sin-resultados", action="store_true",
+                    help="no registrar esta ejecución aunque estén las opciones o la variable de entorno")
+
+
+def ruta_resultados(config):
+    """Base donde registrar esta ejecución; None si no se pidió registrarla"""
+    if config.getoption("sin_resultados"):
+        return None
+    ruta = config.getoption("resultados_db_ruta")
+    if ruta:
+        return ruta
+    return str(RUTA_RESULTADOS) if config.getoption("resultados_db") else None
+
+
+def pytest_configure(config):
+    # Con pytest-xdist solo registra el proceso controlador (recibe los reportes de los workers)
+    ruta = ruta_resultados(config)
+    if ruta is None or hasattr(config, "workerinput"):
+        return
+    config.pluginmanager.register(RegistroResultados(ruta), "registro_resultados")
+
+
+def pytest_collection_modifyitems(config, items):
+    # Corre donde se colecciona (el worker con xdist): el caso viaja en los reportes como user_properties
+    if ruta_resultados(config) is None:
+        return
+    for item in items:
+        doc = getattr(getattr(item, "obj", None), "__doc__", None) or ""
+        caso = _CASO.search(doc)
+        if caso:
+            item.user_properties.append(("caso", caso.group(0)))
+
+
+class RegistroResultados:
+    def __init__(self, ruta):
+        self.almacen = ResultadosPruebas(ruta)
+        self.ejecucion = None
+        self._fases = {}
+
+    def pytest_sessionstart(self, session):
+        self.ejecucion = self.almacen.iniciar()
+
+    def pytest_collection_finish(self, session):
+        self.almacen.fijar_total(self.ejecucion, len(session.items))
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_xdist_node_collection_finished(self, node, ids):
+        # Con pytest-xdist el controlador no colecciona: cada worker informa la colección completa
+        self.almacen.fijar_total(self.ejecucion, len(ids))
+
+    def pytest_runtest_logreport(self, report):
+        fases = self._fases.setdefault(report.nodeid, [])
+        fases.append(report)
+        if report.when != "teardown":
+            return
+        del self._fases[report.nodeid]
+        self.almacen.registrar(self.ejecucion, report.nodeid, _resultado(fases),
+                               sum(r.duration for r in fases), dict(report.user_properties).get("caso", ""))
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if self.ejecucion is not None:
+            self.almacen.finalizar(self.ejecucion, exitstatus)
+
+    def pytest_terminal_summary(self, terminalreporter):
+        terminalreporter.write_line(f"resultados registrados en {self.almacen.ruta} (ejecución #{self.ejecucion})")
+
+
+def _resultado(fases):
+    """Resultado final de un test a partir de sus reportes setup/call/teardown"""
+    por_fase = {r.when: r for r in fases}
+    setup, call, teardown = por_fase.get("setup"), por_fase.get("call"), por_fase.get("teardown")
+    if setup is not None and setup.failed:
+        return "error"
+    if setup is not None and setup.skipped:
+        return "skipped"
+    if call is not None:
+        if hasattr(call, "wasxfail"):
+            return "xfailed" if call.skipped else "xpassed"
+        if call.failed:
+            return "failed"
+        if call.skipped:
+            return "skipped"
+    if teardown is not None and teardown.failed:
+        return "error"
+    return "passed"
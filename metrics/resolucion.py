@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+DIMENSIONES = ["module", "severity", "env"]
+CERRADOS = ["fixed", "closed"]
+PERCENTILES = (50, 90, 95)
+
+
+def _percentil_ponderado(valores, pesos, q):
+    """Percentil con interpolación lineal (equivale a np.percentile sobre los datos expandidos)"""
+    n = pesos.sum()
+    if n == 0:
+        return float("nan")
+    acumulado = np.cumsum(pesos)
+    pos = (q / 100) * (n - 1)
+    bajo = valores[np.searchsorted(acumulado, np.floor(pos), side="right")]
+    alto = valores[np.searchsorted(acumulado, np.ceil(pos), side="right")]
+    return float(bajo + (alto - bajo) * (pos - np.floor(pos)))
+
+
+class AnalisisResolucion:
+    """
+    Analítica de tiempos de resolución (`resolved_days`) y reaperturas (`reopened`).
+
+    El dataset se recorre una sola vez: un groupby sobre
+    (module, severity, env, cerrado, resolved_days, reopened) produce una tabla de
+    histogramas pequeña de la que se derivan medias, percentiles, histogramas y tasas
+    de reapertura para cualquier desglose sin volver a tocar las filas originales.
+    """
+
+    def __init__(self, df):
+        columnas = {
+            d: df[d].astype("string").fillna("N/A") if d in df else pd.Series("N/A", index=df.index)
+            for d in DIMENSIONES
+        }
+        base = pd.DataFrame({
+            **columnas,
+            "cerrado": df["status"].isin(CERRADOS).to_numpy(),
+            "dias": pd.to_numeric(df["resolved_days"], errors="coerce") if "resolved_days" in df else np.nan,
+            "reabierto": (pd.to_numeric(df["reopened"], errors="coerce").fillna(0) > 0).to_numpy()
+                         if "reopened" in df else False,
+        }, index=df.index)
+        self.histograma_base = (
+            base.groupby(DIMENSIONES + ["cerrado", "dias", "reabierto"], dropna=False, observed=True)
+            .size()
+            .rename("n")
+            .reset_index()
+        )
+
+    def _estadisticas(self, h):
+        total = int(h["n"].sum())
+        cerrados = h[h["cerrado"] & h["dias"].notna()]
+        dias = cerrados.groupby("dias")["n"].sum()
+        valores, pesos = dias.index.to_numpy(dtype=float), dias.to_numpy()
+        n_cerrados = int(pesos.sum())
+
+        stats = {
+            "defectos": total,
+            "cerrados": n_cerrados,
+            "media_dias": round(float((valores * pesos).sum() / n_cerrados), 2) if n_cerrados else 0.0,
+        }
+        for q in PERCENTILES:
+            p = _percentil_ponderado(valores, pesos, q)
+            stats[f"p{q}_dias"] = round(p, 2) if n_cerrados else 0.0
+        reabiertos = int(h.loc[h["reabierto"], "n"].sum())
+        stats["reabiertos"] = reabiertos
+        stats["tasa_reapertura"] = round(reabiertos / total * 100, 2) if total else 0.0
+        return stats
+
+    def resumen(self, por=None):
+        """
+        Estadísticas globales (por=None) o desglosadas por una o varias dimensiones.
+
+        Devuelve un dict con media, percentiles, cerrados y tasa de reapertura.
+        """
+        if por is None:
+            return self._estadisticas(self.histograma_base)
+        por = [por] if isinstance(por, str) else list(por)
+        return {
+            (clave if len(por) > 1 else clave[0]): self._estadisticas(grupo)
+            for clave, grupo in self.histograma_base.groupby(por, sort=True)
+        }
+
+    def histograma(self, por=None):
+        """Conteo de defectos cerrados por días completos de resolución (opcionalmente por dimensión)"""
+        h = self.histograma_base[self.histograma_base["cerrado"] & self.histograma_base["dias"].notna()]
+        # 2.5 y 2.0 van al mismo bin [2, 3): se agrupa ya redondeado para sumar, no pisar, sus conteos
+        h = h.assign(dias=np.floor(h["dias"]).astype(int))
+        if por is None:
+            serie = h.groupby("dias")["n"].sum()
+            return {int(k): int(v) for k, v in serie.items()}
+        tabla = h.pivot_table(index=por, columns="dias", values="n", aggfunc="sum", fill_value=0)
+        return {k: {int(d): int(v) for d, v in fila.items()} for k, fila in tabla.iterrows()}
+
+    def reporte(self):
+        """Resumen serializable: global más desglose por módulo, severidad y entorno"""
+        return {
+            "global": self.resumen(),
+            "histograma_dias": self.histograma(),
+            **{f"por_{d}": self.resumen(por=d) for d in DIMENSIONES},
+        }
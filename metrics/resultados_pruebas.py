@@ -0,0 +1,159 @@
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+BASE = Path(__file__).resolve().parent
+RUTA_RESULTADOS = BASE / "dashboards" / "resultados_pruebas.db"
+
+# Resultados que cuentan como caso ejecutado (los omitidos no se ejecutaron)
+EJECUTADOS = ("passed", "failed", "error", "xfailed", "xpassed")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    inicio TEXT NOT NULL,
+    fin TEXT,
+    total INTEGER,
+    estado INTEGER
+);
+CREATE TABLE IF NOT EXISTS resultados (
+    ejecucion_id INTEGER NOT NULL,
+    nodeid TEXT NOT NULL,
+    caso TEXT NOT NULL DEFAULT '',
+    resultado TEXT NOT NULL,
+    duracion REAL NOT NULL,
+    PRIMARY KEY (ejecucion_id, nodeid),
+    FOREIGN KEY (ejecucion_id) REFERENCES ejecuciones(id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_resultados_nodeid ON resultados(nodeid, ejecucion_id);
+"""
+
+
+class ResultadosPruebas:
+    """
+    Almacén append-only de resultados de pytest: una fila por test y ejecución.
+
+    El plugin `pytest_resultados` escribe aquí a medida que corren los tests; el sistema
+    de métricas lee los casos ejecutados/totales de la última ejecución terminada.
+    """
+
+    def __init__(self, ruta=RUTA_RESULTADOS):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = None
+        conn = self._conectar()
+        try:
+            conn.executescript(ESQUEMA)
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        conn = sqlite3.connect(str(self.ruta), timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # ------------------------------------------------------------------
+    # Escritura (una conexión abierta durante toda la ejecución de pytest)
+    # ------------------------------------------------------------------
+
+    def iniciar(self, total=None):
+        """Registra el inicio de una ejecución y devuelve su id"""
+        self._conn = self._conectar()
+        with self._conn:
+            cur = self._conn.execute("INSERT INTO ejecuciones (inicio, total) VALUES (?, ?)",
+                                     (datetime.now().isoformat(), total))
+        return cur.lastrowid
+
+    def fijar_total(self, ejecucion_id, total):
+        with self._conn:
+            self._conn.execute("UPDATE ejecuciones SET total = ? WHERE id = ?", (total, ejecucion_id))
+
+    def registrar(self, ejecucion_id, nodeid, resultado, duracion, caso=""):
+        """Agrega el resultado de un test (se confirma de inmediato)"""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO resultados (ejecucion_id, nodeid, caso, resultado, duracion) "
+                "VALUES (?,?,?,?,?)",
+                (ejecucion_id, nodeid, caso or "", resultado, float(duracion)))
+
+    def finalizar(self, ejecucion_id, estado):
+        with self._conn:
+            self._conn.execute("UPDATE ejecuciones SET fin = ?, estado = ? WHERE id = ?",
+                               (datetime.now().isoformat(), int(estado), ejecucion_id))
+        self._conn.close()
+        self._conn = None
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def conteos(self, ejecucion_id=None):
+        """
+        Casos totales, ejecutados y por resultado de una ejecución (por defecto la última terminada).
+
+        Devuelve None si todavía no hay ejecuciones registradas.
+        """
+        conn = self._conectar()
+        try:
+            if ejecucion_id is None:
+                fila = conn.execute("SELECT id FROM ejecuciones WHERE fin IS NOT NULL "
+                                    "ORDER BY id DESC LIMIT 1").fetchone()
+                if fila is None:
+                    return None
+                ejecucion_id = fila["id"]
+            ejecucion = conn.execute("SELECT * FROM ejecuciones WHERE id = ?", (ejecucion_id,)).fetchone()
+            por_resultado = {r["resultado"]: r["n"] for r in conn.execute(
+                "SELECT resultado, COUNT(*) AS n FROM resultados WHERE ejecucion_id = ? GROUP BY resultado",
+                (ejecucion_id,))}
+        finally:
+            conn.close()
+        registrados = sum(por_resultado.values())
+        return {
+            "ejecucion": ejecucion_id,
+            "fecha": ejecucion["inicio"],
+            "total": max(ejecucion["total"] or 0, registrados),
+            "ejecutados": sum(por_resultado.get(r, 0) for r in EJECUTADOS),
+            "resultados": por_resultado,
+        }
+
+    def duraciones(self, ejecuciones=10, limite=20):
+        """
+        Duración por test en las últimas `ejecuciones`: última, media, máxima y variación
+        de la última frente a la media anterior. Ordenado de más lento a más rápido.
+        """
+        sql = """
+            WITH recientes AS (
+                SELECT id FROM ejecuciones WHERE fin IS NOT NULL ORDER BY id DESC LIMIT ?
+            ), ultima AS (SELECT MAX(id) AS id FROM recientes)
+            SELECT r.nodeid,
+                   MAX(CASE WHEN r.ejecucion_id = (SELECT id FROM ultima) THEN r.duracion END) AS ultima,
+                   AVG(CASE WHEN r.ejecucion_id != (SELECT id FROM ultima) THEN r.duracion END) AS media_anterior,
+                   AVG(r.duracion) AS media,
+                   MAX(r.duracion) AS maxima,
+                   COUNT(*) AS ejecuciones
+            FROM resultados r JOIN recientes e ON e.id = r.ejecucion_id
+            GROUP BY r.nodeid
+            ORDER BY COALESCE(ultima, media) DESC
+            LIMIT ?
+        """
+        conn = self._conectar()
+        try:
+            filas = [dict(r) for r in conn.execute(sql, (ejecuciones, limite))]
+        finally:
+            conn.close()
+        for f in filas:
+            previa = f["media_anterior"]
+            f["variacion"] = round((f["ultima"] - previa) / previa * 100, 1) \
+                if f["ultima"] is not None and previa else None
+        return filas
+
+
+def reporte_duraciones(filas):
+    """Tabla de texto con las duraciones de `ResultadosPruebas.duraciones`"""
+    lineas = [f"{'test':<60} {'última':>9} {'media':>9} {'máx':>9} {'var':>8}"]
+    for f in filas:
+        ultima = f"{f['ultima'] * 1000:.0f}ms" if f["ultima"] is not None else "-"
+        variacion = f"{f['variacion']:+.1f}%" if f["variacion"] is not None else "-"
+        lineas.append(f"{f['nodeid'][-60:]:<60} {ultima:>9} {f['media'] * 1000:>7.0f}ms "
+                      f"{f['maxima'] * 1000:>7.0f}ms {variacion:>8}")
+    return "\n".join(lineas)
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# El plugin de resultados vive junto al sistema de métricas
+sys.path.insert(0, str(Path(__file__).parent.parent / "metrics"))
+
+pytest_plugins = ["pytest_resultados"]
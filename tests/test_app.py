@@ -1,35 +1,59 @@
+import itertools
+import os
 import pytest
 import sys
+import time
 from pathlib import Path
 
 # Agregar el directorio app al path
 sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
 
-from app import app
-from db import init_db, connect
+import db
+from app import create_app
+from db import BaseDatos, copiar_db
 from werkzeug.security import check_password_hash
 
+_bases = itertools.count()
+_actual = {}
+
+
+def connect():
+    """Conexión a la BD del test en curso"""
+    return db.connect(_actual["uri"])
+
+
+@pytest.fixture(scope="session")
+def plantilla_db(tmp_path_factory):
+    """BD inicializada una sola vez por proceso (con pytest-xdist, una por worker)"""
+    ruta = tmp_path_factory.mktemp("db") / "plantilla.db"
+    BaseDatos(ruta).init()
+    return ruta
+
+
+@pytest.fixture(autouse=True)
+def base_datos(plantilla_db):
+    """Cada test usa su propia copia en memoria de la plantilla; se descarta al terminar"""
+    uri = f"file:hotel_test_{os.getpid()}_{next(_bases)}?mode=memory&cache=shared"
+    # La conexión de la copia mantiene viva la BD en memoria mientras dura el test
+    conexion = copiar_db(plantilla_db, uri)
+    _actual["uri"] = uri
+    yield uri
+    _actual.clear()
+    conexion.close()
+
+
+@pytest.fixture
+def app(base_datos):
+    """Instancia de la app apuntando a la BD del test"""
+    return create_app({"TESTING": True, "SECRET_KEY": "test-secret-key", "DATABASE": base_datos})
+
+
 @pytest.fixture(scope="function")
-def client():
+def client(app):
     """Crea un cliente de prueba con base de datos limpia"""
-    app.config["TESTING"] = True
-    app.config["SECRET_KEY"] = "test-secret-key"
-    
-    # Inicializar BD de prueba
-    init_db()
-    
     with app.test_client() as client:
         with app.app_context():
             yield client
-    
-    # Cleanup después de cada test
-    conn = connect()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM users WHERE username LIKE 'test_%'")
-    cur.execute("DELETE FROM bookings")
-    cur.execute("DELETE FROM payments")
-    conn.commit()
-    conn.close()
 
 
 @pytest.fixture
@@ -373,6 +397,101 @@ def test_search_shows_available_rooms(client):
     assert b"10" in response.data or b"Habitaciones" in response.data
 
 
+def _reservar_directo(room_id, start_date, end_date, uri=None):
+    """Inserta una reserva sin pasar por la app (otro proceso escribiendo en la BD)"""
+    conn = db.connect(uri or _actual["uri"])
+    conn.execute("INSERT OR IGNORE INTO users (username, password_hash) VALUES ('test_externo', 'x')")
+    conn.execute("INSERT INTO bookings (user_id, room_id, start_date, end_date, total_price, status) "
+                 "SELECT id, ?, ?, ?, 0, 'PENDING_PAYMENT' FROM users WHERE username = 'test_externo'",
+                 (room_id, start_date, end_date))
+    conn.commit()
+    conn.close()
+
+
+def test_search_refleja_reservas_externas(client):
+    """El índice de disponibilidad se recarga si otra conexión agregó reservas"""
+    datos = {"start_date": "2026-03-01", "end_date": "2026-03-04", "room_type": "simple"}
+    assert b'name="room_id" value="1"' in client.post("/search", data=datos).data
+    
+    _reservar_directo(1, "2026-03-03", "2026-03-06")
+    response = client.post("/search", data=datos)
+    
+    assert b'name="room_id" value="1"' not in response.data
+    assert b'name="room_id" value="2"' in response.data
+
+
+def test_search_matriz_equivale_a_busquedas_sueltas(client):
+    """/search/matriz da, para cada tipo y desplazamiento, lo mismo que un /search por combinación"""
+    _reservar_directo(1, "2026-04-03", "2026-04-06")
+    _reservar_directo(5, "2026-04-01", "2026-04-02")
+    response = client.get("/search/matriz?start_date=2026-04-02&end_date=2026-04-04"
+                          "&room_type=simple&room_type=doble&flex=2")
+    
+    assert response.status_code == 200
+    matriz = response.get_json()
+    assert matriz["tipos"] == ["simple", "doble"] and matriz["noches"] == 2
+    assert len(matriz["fechas"]) == 5
+    for fila, fecha in enumerate(matriz["fechas"]):
+        for columna, tipo in enumerate(matriz["tipos"]):
+            html = client.post("/search", data={"start_date": fecha["start_date"],
+                                                "end_date": fecha["end_date"], "room_type": tipo}).data
+            libres = matriz["habitaciones"][fila][columna]
+            assert html.count(b'name="room_id"') == len(libres) == matriz["disponibles"][fila][columna]
+            for room_id in libres:
+                assert f'name="room_id" value="{room_id}"'.encode() in html
+
+
+def test_search_matriz_valida_parametros(client):
+    """Fechas inválidas, flex fuera de rango o tipos desconocidos devuelven 400"""
+    base = "/search/matriz?start_date=2026-04-02&end_date=2026-04-04"
+    assert client.get(base + "&flex=99").status_code == 400
+    assert client.get(base + "&room_type=penthouse").status_code == 400
+    assert client.get("/search/matriz?start_date=2026-04-04&end_date=2026-04-02").status_code == 400
+    assert client.get(base).get_json()["tipos"] == ["simple", "doble", "suite"]
+
+
+def test_validacion_rechaza_sin_abrir_la_bd(authenticated_client):
+    """Entradas mal formadas se rechazan antes de tocar la BD y quedan contadas por ruta y motivo"""
+    client = authenticated_client
+    recursos = client.application.extensions["hotel"]
+    
+    def sin_bd():
+        raise AssertionError("la validación no debería abrir la BD")
+    recursos.db.connect = sin_bd
+    
+    invalidas = [
+        ("/search", {"start_date": "2026-02-10", "end_date": "2026-02-01", "room_type": "simple"}),
+        ("/search", {"start_date": "10/02/2026", "end_date": "2026-02-12", "room_type": "simple"}),
+        ("/search", {"start_date": "2026-02-10", "end_date": "2026-02-12", "room_type": "penthouse"}),
+        ("/search", {"start_date": "2026-02-01", "end_date": "2026-05-01", "room_type": "simple"}),
+        ("/book", {"room_id": "uno", "start_date": "2026-02-10", "end_date": "2026-02-12"}),
+        ("/book", {"room_id": "1", "start_date": "2026-02-30", "end_date": "2026-03-02"}),
+    ]
+    for ruta, datos in invalidas:
+        response = client.post(ruta, data=datos)
+        assert response.status_code == 302
+    assert client.get("/reportes?desde=2026-02-01").status_code == 400
+    
+    rechazos = client.get("/metrics/rechazos.json").get_json()["validacion"]["rechazadas"]
+    assert rechazos["search"] == {"estadia": 1, "fecha": 1, "rango": 1, "tipo": 1}
+    assert rechazos["book"] == {"entero": 1, "fecha": 1}
+    assert rechazos["reportes"] == {"falta": 1}
+
+
+def test_apps_aisladas_en_un_mismo_proceso(plantilla_db, tmp_path):
+    """Dos instancias de create_app con BDs distintas no comparten datos ni cachés"""
+    rutas = [tmp_path / "hotel_a.db", tmp_path / "hotel_b.db"]
+    for ruta in rutas:
+        copiar_db(plantilla_db, ruta).close()
+    app_a, app_b = (create_app({"TESTING": True, "DATABASE": str(r)}) for r in rutas)
+    
+    _reservar_directo(1, "2026-03-01", "2026-03-10", uri=str(rutas[0]))
+    datos = {"start_date": "2026-03-02", "end_date": "2026-03-05", "room_type": "simple"}
+    
+    assert b'name="room_id" value="1"' not in app_a.test_client().post("/search", data=datos).data
+    assert b'name="room_id" value="1"' in app_b.test_client().post("/search", data=datos).data
+
+
 # ==============================================================================
 # TESTS DE RESERVAS (RF-005)
 # ==============================================================================
@@ -572,6 +691,628 @@ def test_database_connection_closes():
         assert True
 
 
+# ==============================================================================
+# TESTS DE SHARDS POR HOTEL
+# ==============================================================================
+
+@pytest.fixture
+def app_shards(tmp_path):
+    """App con dos hoteles, cada uno en su propia BD"""
+    from shards import EnrutadorHoteles
+    
+    enrutador = EnrutadorHoteles(tmp_path / "shards")
+    enrutador.crear("centro")
+    enrutador.crear("playa")
+    enrutador.cerrar()
+    return create_app({"TESTING": True, "DATABASE": _actual["uri"], "SHARDS_DIR": str(tmp_path / "shards")})
+
+
+def test_shard_reserva_solo_afecta_a_su_hotel(app_shards):
+    """Una reserva en /h/centro/ ocupa la habitación en ese hotel y no en los demás"""
+    client = app_shards.test_client()
+    client.post("/h/centro/register", data={"username": "test_shard", "password": "clave"})
+    client.post("/h/centro/login", data={"username": "test_shard", "password": "clave"})
+    response = client.post("/h/centro/book", data={
+        "room_id": "1", "start_date": "2026-05-01", "end_date": "2026-05-04"})
+    assert response.status_code == 200
+    
+    response = client.get("/hoteles/buscar?start_date=2026-05-02&end_date=2026-05-03&room_type=simple")
+    data = response.get_json()
+    
+    assert data["errores"] == {}
+    por_hotel = {(h["hotel_id"], h["room_id"]) for h in data["resultados"]}
+    assert ("centro", 1) not in por_hotel
+    assert ("playa", 1) in por_hotel
+    assert [h["price"] for h in data["resultados"]] == sorted(h["price"] for h in data["resultados"])
+
+
+def test_shard_sesion_no_vale_en_otro_hotel(app_shards):
+    """El login de un hotel no permite reservar en otro (los ids de usuario son por shard)"""
+    client = app_shards.test_client()
+    client.post("/h/centro/register", data={"username": "test_shard", "password": "clave"})
+    client.post("/h/centro/login", data={"username": "test_shard", "password": "clave"})
+    
+    response = client.post("/h/playa/book", data={
+        "room_id": "1", "start_date": "2026-05-01", "end_date": "2026-05-04"})
+    
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/h/playa/login")
+
+
+def test_shard_inexistente_404(app_shards):
+    """Un hotel sin BD responde 404"""
+    assert app_shards.test_client().get("/h/montana/").status_code == 404
+
+
+def test_migrar_shards_es_idempotente(tmp_path):
+    """migrar deja todos los shards en la última versión y una segunda pasada no cambia nada"""
+    from db import MIGRACIONES
+    from shards import EnrutadorHoteles
+    
+    enrutador = EnrutadorHoteles(tmp_path)
+    enrutador.crear("centro")
+    
+    assert enrutador.migrar() == {"centro": (len(MIGRACIONES), len(MIGRACIONES))}
+    enrutador.cerrar()
+
+
+def test_shard_recursos_se_construyen_una_vez(tmp_path):
+    """Varias primeras peticiones simultáneas al mismo hotel construyen sus recursos una sola vez"""
+    from concurrent.futures import ThreadPoolExecutor
+    from shards import EnrutadorHoteles
+    
+    construidos = []
+    
+    def fabrica(base):
+        time.sleep(0.05)
+        construidos.append(base.path)
+        return object()
+    
+    enrutador = EnrutadorHoteles(tmp_path, fabrica=fabrica)
+    enrutador.crear("centro")
+    enrutador.crear("playa")
+    with ThreadPoolExecutor(8) as pool:
+        obtenidos = list(pool.map(enrutador.recursos, ["centro"] * 6 + ["playa"] * 2))
+    
+    assert len(construidos) == 2
+    assert len({id(r) for r in obtenidos[:6]}) == 1 and obtenidos[6] is obtenidos[7]
+    enrutador.cerrar()
+
+
+def test_migracion_dias_por_lotes(tmp_path):
+    """La migración 3 completa start_day/end_day por lotes y los triggers cubren escrituras solo de texto"""
+    ruta = tmp_path / "legado.db"
+    db.init_db(ruta)
+    conn = db.connect(ruta)
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('test_legado', 'x')")
+    conn.executemany("INSERT INTO bookings (user_id, room_id, start_date, end_date, total_price, status) "
+                     "VALUES (1, 1, ?, ?, 0, 'CONFIRMED')",
+                     [("2026-03-01", "2026-03-04"), ("2026-03-10 00:00:00", "2026-03-12"), ("sin fecha", "2026-03-12")])
+    conn.commit()
+    
+    assert db.migrar_db(ruta) == (0, len(db.MIGRACIONES))
+    assert db.rellenar_dias(ruta, lote=1) == 1  # solo queda la fila con fecha inválida
+    conn.execute("INSERT INTO bookings (user_id, room_id, start_date, end_date, total_price, status) "
+                 "VALUES (1, 2, '1970-01-02', '1970-01-05', 0, 'CONFIRMED')")
+    conn.commit()
+    
+    dias = conn.execute("SELECT start_day, end_day FROM bookings ORDER BY id").fetchall()
+    assert [tuple(d) for d in dias] == [(db.dia("2026-03-01"), db.dia("2026-03-04")),
+                                       (db.dia("2026-03-10"), db.dia("2026-03-12")),
+                                       (None, db.dia("2026-03-12")), (1, 4)]
+    textos = conn.execute("SELECT start_date FROM bookings_texto ORDER BY id").fetchall()
+    assert [t[0] for t in textos] == ["2026-03-01", "2026-03-10", None, "1970-01-02"]
+    conn.close()
+
+
+# ==============================================================================
+# TESTS DEL ESCRITOR ÚNICO
+# ==============================================================================
+
+def test_escritor_unico_lote_aisla_fallos(plantilla_db, tmp_path):
+    """En un mismo lote, una intención que falla no deshace las demás y cada una recibe su resultado"""
+    import threading
+    from escritor import EscritorUnico
+    
+    ruta = tmp_path / "hotel.db"
+    copiar_db(plantilla_db, ruta).close()
+    escritor = EscritorUnico(BaseDatos(ruta))
+    
+    def crear(conn, nombre):
+        return conn.execute("INSERT INTO users (username, password_hash) VALUES (?, 'x')", (nombre,)).lastrowid
+    
+    # Bloquea el escritor para que las tres intenciones entren en el mismo lote
+    liberar = threading.Event()
+    bloqueo = escritor.enviar(lambda conn: liberar.wait(5))
+    futuros = [escritor.enviar(crear, n) for n in ("test_a", "test_a", "test_b")]
+    liberar.set()
+    bloqueo.result(5)
+    
+    assert isinstance(futuros[0].result(5), int)
+    with pytest.raises(Exception):
+        futuros[1].result(5)
+    assert isinstance(futuros[2].result(5), int)
+    escritor.cerrar()
+    
+    conn = db.connect(ruta)
+    nombres = [r[0] for r in conn.execute("SELECT username FROM users WHERE username LIKE 'test_%' ORDER BY id")]
+    conn.close()
+    assert nombres == ["test_a", "test_b"]
+
+
+def test_book_con_escritor_unico(base_datos):
+    """Con ESCRITOR_UNICO las reservas devuelven su id y los conflictos se informan igual"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "ESCRITOR_UNICO": True})
+    client = app.test_client()
+    client.post("/register", data={"username": "test_escritor", "password": "clave"})
+    client.post("/login", data={"username": "test_escritor", "password": "clave"})
+    datos = {"room_id": "3", "start_date": "2026-07-01", "end_date": "2026-07-03"}
+    
+    assert client.post("/book", data=datos).status_code == 200
+    response = client.post("/book", data=datos, follow_redirects=True)
+    
+    assert "ya no está disponible".encode() in response.data
+    assert app.extensions["hotel"].escritor.escrituras >= 2
+    app.extensions["hotel"].escritor.cerrar()
+
+
+# ==============================================================================
+# TESTS DE ROOM_NIGHTS
+# ==============================================================================
+
+def _cliente_noches(base_datos, **config):
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "ROOM_NIGHTS": True, **config})
+    client = app.test_client()
+    client.post("/register", data={"username": "test_noches", "password": "clave"})
+    client.post("/login", data={"username": "test_noches", "password": "clave"})
+    return app, client
+
+
+def test_room_nights_backfill_y_restriccion(base_datos):
+    """Las reservas existentes se expanden a noches y la clave (room_id, night) impide solapamientos"""
+    import noches
+    _reservar_directo(2, "2026-09-01", "2026-09-04")
+    app, client = _cliente_noches(base_datos)
+    
+    response = client.post("/book", data={"room_id": "2", "start_date": "2026-09-03", "end_date": "2026-09-05"},
+                           follow_redirects=True)
+    assert "ya no está disponible".encode() in response.data
+    assert client.post("/book", data={"room_id": "2", "start_date": "2026-09-04",
+                                      "end_date": "2026-09-06"}).status_code == 200
+    
+    conn = connect()
+    assert [r[0] for r in conn.execute("SELECT night FROM room_nights WHERE room_id = 2 ORDER BY night")] == \
+        ["2026-09-01", "2026-09-02", "2026-09-03", "2026-09-04", "2026-09-05"]
+    assert conn.execute("SELECT COUNT(*) FROM bookings WHERE room_id = 2").fetchone()[0] == 2
+    for inicio, fin in (("2026-09-02", "2026-09-03"), ("2026-09-05", "2026-09-07"), ("2026-09-06", "2026-09-08")):
+        por_sql = [h["room_id"] for h in noches.disponibles(conn, inicio, fin, "simple")]
+        assert por_sql == [h["room_id"] for h in app.extensions["hotel"].disponibles(inicio, fin, "simple")]
+    conn.close()
+
+
+def test_room_nights_expira_pendientes(base_datos):
+    """Una reserva sin pagar vencida expira al reservar y libera sus noches"""
+    app, client = _cliente_noches(base_datos, PENDIENTES_EXPIRAN_MIN=30)
+    datos = {"room_id": "3", "start_date": "2026-10-01", "end_date": "2026-10-03"}
+    assert client.post("/book", data=datos).status_code == 200
+    conn = connect()
+    conn.execute("UPDATE bookings SET created_at = datetime('now', '-2 hours')")
+    conn.commit()
+    
+    assert client.post("/book", data=datos).status_code == 200
+    
+    estados = [r[0] for r in conn.execute("SELECT status FROM bookings WHERE room_id = 3 ORDER BY id")]
+    assert estados == ["EXPIRED", "PENDING_PAYMENT"]
+    assert conn.execute("SELECT COUNT(*) FROM room_nights WHERE room_id = 3").fetchone()[0] == 2
+    conn.close()
+    busqueda = client.post("/search", data={"start_date": "2026-10-01", "end_date": "2026-10-03", "room_type": "simple"})
+    assert b'name="room_id" value="3"' not in busqueda.data
+
+
+def test_room_nights_pago_tras_expirar_no_confirma(base_datos):
+    """Pagar una reserva expirada (sus noches ya son de otra) no la revive ni registra el pago"""
+    app, client = _cliente_noches(base_datos, PENDIENTES_EXPIRAN_MIN=30)
+    datos = {"room_id": "1", "start_date": "2030-03-01", "end_date": "2030-03-04"}
+    assert client.post("/book", data=datos).status_code == 200
+    conn = connect()
+    conn.execute("UPDATE bookings SET created_at = datetime('now', '-2 hours')")
+    conn.commit()
+    assert client.post("/book", data=datos).status_code == 200
+    vencida, vigente = [r[0] for r in conn.execute("SELECT id FROM bookings WHERE room_id = 1 ORDER BY id")]
+    
+    response = client.post("/pay", data={"booking_id": str(vencida)}, follow_redirects=True)
+    assert "ya no está pendiente de pago".encode() in response.data
+    client.post("/pay", data={"booking_id": str(vigente)})
+    
+    estados = [r[0] for r in conn.execute("SELECT status FROM bookings WHERE room_id = 1 ORDER BY id")]
+    assert estados == ["EXPIRED", "CONFIRMED"]
+    assert [r[0] for r in conn.execute("SELECT booking_id FROM payments")] == [vigente]
+    conn.close()
+
+
+# ==============================================================================
+# TESTS DE REPORTES
+# ==============================================================================
+
+def test_reportes_ocupacion_adr_revpar_conversion(authenticated_client):
+    """Ocupación por noche, ADR y RevPAR sobre reservas confirmadas y conversión de pagos"""
+    client = authenticated_client
+    # Suite (220/noche) 2 noches pagada; simple 1 noche (80) sin pagar, empieza antes del período
+    client.post("/book", data={"room_id": "8", "start_date": "2026-05-02", "end_date": "2026-05-04"})
+    conn = connect()
+    booking_id = conn.execute("SELECT id FROM bookings ORDER BY id DESC LIMIT 1").fetchone()[0]
+    conn.close()
+    client.post("/pay", data={"booking_id": str(booking_id)})
+    client.post("/book", data={"room_id": "1", "start_date": "2026-04-30", "end_date": "2026-05-02"})
+    
+    reporte = client.get("/reportes?desde=2026-05-01&hasta=2026-05-05").get_json()
+    
+    assert reporte["fechas"] == ["2026-05-01", "2026-05-02", "2026-05-03", "2026-05-04"]
+    assert reporte["ocupacion_por_noche"]["suite"] == [0.0, 0.3333, 0.3333, 0.0]
+    assert reporte["ocupacion_por_noche"]["simple"] == [0.25, 0.0, 0.0, 0.0]
+    suite = reporte["por_tipo"]["suite"]
+    assert suite["noches_vendidas"] == 2 and suite["ingresos"] == 440.0
+    assert suite["adr"] == 220.0 and suite["revpar"] == round(440 / 12, 2)
+    assert reporte["total"]["noches_ocupadas"] == 3 and reporte["total"]["noches_disponibles"] == 40
+    assert reporte["conversion"] == {"pendientes": 0, "confirmadas": 1, "expiradas": 0, "tasa": 1.0}
+
+
+def test_reportes_cache_por_periodo(client):
+    """El reporte de un período se reutiliza hasta que cambian bookings o payments"""
+    reportes = client.application.extensions["hotel"].reportes
+    primero = reportes.reporte("2026-06-01", "2026-06-08")
+    assert reportes.reporte("2026-06-01", "2026-06-08") is primero
+    
+    _reservar_directo(2, "2026-06-03", "2026-06-05")
+    
+    assert reportes.reporte("2026-06-01", "2026-06-08")["total"]["noches_ocupadas"] == 2
+    assert client.get("/reportes?desde=2026-06-08&hasta=2026-06-01").status_code == 400
+
+
+def test_reportes_cache_ve_cambios_de_estado(client):
+    """Expirar una reserva (sin filas nuevas) invalida el reporte cacheado"""
+    import noches
+    
+    reportes = client.application.extensions["hotel"].reportes
+    _reservar_directo(3, "2026-07-03", "2026-07-05")
+    antes = reportes.reporte("2026-07-01", "2026-07-08")
+    assert antes["total"]["noches_ocupadas"] == 2 and antes["conversion"]["pendientes"] == 1
+    
+    conn = connect()
+    conn.execute("UPDATE bookings SET created_at = datetime('now', '-2 hours') WHERE id = (SELECT MAX(id) FROM bookings)")
+    assert noches.expirar_pendientes(conn, 30) >= 1
+    conn.commit()
+    conn.close()
+    
+    despues = reportes.reporte("2026-07-01", "2026-07-08")
+    assert despues["total"]["noches_ocupadas"] == 0
+    assert despues["conversion"]["pendientes"] == 0 and despues["conversion"]["expiradas"] == 1
+
+
+def test_reportes_periodo_acotado_y_limitado(base_datos):
+    """Un período enorme se rechaza con 400 sin calcular nada y GET /reportes pasa por el limitador"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "LIMITES_ACTIVOS": True,
+                      "LIMITES": {"reportes": (2, 0.01)}})
+    client = app.test_client()
+    
+    enorme = client.get("/reportes?desde=0001-01-01&hasta=9999-12-31")
+    assert enorme.status_code == 400 and "731" in enorme.get_json()["error"]
+    # La cubeta se consume antes de validar: el 400 ya gastó uno de los 2 tokens
+    periodo = "/reportes?desde=2026-01-01&hasta=2026-02-01"
+    assert [client.get(periodo).status_code for _ in range(2)] == [200, 429]
+    assert app.extensions["limites"].resumen()["rechazadas"] == {"reportes": {"ip": 1}}
+
+
+# ==============================================================================
+# TESTS DE RÉPLICA DE LECTURA
+# ==============================================================================
+
+def test_replica_desfase_acotado_y_book_valida_en_principal(base_datos):
+    """/search lee de la réplica (puede ir atrasada); /book siempre verifica contra la principal"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "REPLICA": "memoria",
+                      "REPLICA_MAX_DESFASE": 60, "REPLICA_INTERVALO": 0})
+    client = app.test_client()
+    replica = app.extensions["hotel"].replica
+    client.post("/register", data={"username": "test_replica", "password": "clave"})
+    client.post("/login", data={"username": "test_replica", "password": "clave"})
+    datos = {"start_date": "2026-08-01", "end_date": "2026-08-04", "room_type": "simple"}
+    
+    _reservar_directo(1, "2026-08-02", "2026-08-05")
+    assert b'name="room_id" value="1"' in client.post("/search", data=datos).data
+    
+    response = client.post("/book", data={**datos, "room_id": "1"}, follow_redirects=True)
+    assert "ya no está disponible".encode() in response.data
+    
+    replica.refrescar()
+    assert b'name="room_id" value="1"' not in client.post("/search", data=datos).data
+    replica.cerrar()
+
+
+def test_replica_se_refresca_al_vencer(base_datos):
+    """Superado REPLICA_MAX_DESFASE, la siguiente lectura refresca la réplica antes de responder"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "REPLICA": "memoria",
+                      "REPLICA_MAX_DESFASE": 0, "REPLICA_INTERVALO": 0})
+    replica = app.extensions["hotel"].replica
+    generacion = replica.generacion
+    datos = {"start_date": "2026-08-01", "end_date": "2026-08-04", "room_type": "simple"}
+    
+    _reservar_directo(1, "2026-08-02", "2026-08-05")
+    response = app.test_client().post("/search", data=datos)
+    
+    assert b'name="room_id" value="1"' not in response.data
+    assert replica.generacion > generacion
+    replica.cerrar()
+
+
+def test_replica_refresco_no_deja_lector_sin_tablas(base_datos, monkeypatch):
+    """Un refresco que llega entre leer `path` y abrir la conexión no libera la copia que se abre"""
+    import threading
+    import replica as modulo_replica
+    from replica import Replica
+    
+    replica = Replica(BaseDatos(base_datos), "memoria", max_desfase=3600)
+    conectar = modulo_replica.connect
+    
+    def refresco_en_el_medio(path):
+        hilo = threading.Thread(target=replica.refrescar)
+        hilo.start()
+        hilo.join(0.2)  # con la publicación excluida, el refresco espera a que se abra la conexión
+        return conectar(path)
+    
+    monkeypatch.setattr(modulo_replica, "connect", refresco_en_el_medio)
+    conn = replica.connect()
+    monkeypatch.setattr(modulo_replica, "connect", conectar)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM rooms").fetchone()[0] > 0
+    finally:
+        conn.close()
+    replica.cerrar()
+
+
+# ==============================================================================
+# TESTS DE LÍMITE DE TASA Y ADMISIÓN
+# ==============================================================================
+
+def test_limite_por_ip_y_por_usuario(base_datos):
+    """Agotada la cubeta de una IP o de un usuario, la ruta responde 429 con Retry-After"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "LIMITES_ACTIVOS": True,
+                      "LIMITES": {"search": (3, 0.01), "login": (2, 0.01)}})
+    client = app.test_client()
+    datos = {"start_date": "2026-02-01", "end_date": "2026-02-03", "room_type": "simple"}
+    
+    assert [client.post("/search", data=datos).status_code for _ in range(4)] == [200, 200, 200, 429]
+    response = client.post("/search", data=datos)
+    assert response.headers["Retry-After"] == "100"
+    otra_ip = client.post("/search", data=datos, environ_base={"REMOTE_ADDR": "10.0.0.2"})
+    assert otra_ip.status_code == 200
+    
+    intentos = [client.post("/login", data={"username": "test_victima", "password": "x"},
+                            environ_base={"REMOTE_ADDR": f"10.0.1.{i}"}).status_code for i in range(3)]
+    assert intentos == [302, 302, 429]
+    
+    limites = client.get("/metrics/rechazos.json").get_json()["limites"]
+    assert limites["rechazadas"] == {"login": {"usuario": 1}, "search": {"ip": 2}}
+    assert limites["en_curso"] == 0
+
+
+def test_admision_corta_con_503(base_datos):
+    """Con demasiadas peticiones en curso o escrituras lentas, las rutas caras responden 503"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "LIMITES_ACTIVOS": True})
+    client = app.test_client()
+    client.post("/register", data={"username": "test_admision", "password": "clave"})
+    client.post("/login", data={"username": "test_admision", "password": "clave"})
+    recursos = app.extensions["hotel"]
+    
+    recursos._demora, recursos._ultima_escritura = 2.0, time.monotonic()
+    response = client.post("/book", data={"room_id": "1", "start_date": "2026-02-01", "end_date": "2026-02-03"})
+    assert response.status_code == 503
+    
+    app.extensions["limites"].max_en_curso = 0
+    search = {"start_date": "2026-02-01", "end_date": "2026-02-03", "room_type": "simple"}
+    assert client.post("/search", data=search).status_code == 503
+    assert app.extensions["limites"].resumen()["rechazadas"] == {"book": {"bd_ocupada": 1}, "search": {"saturado": 1}}
+
+
+def test_cubetas_compartidas_entre_workers(tmp_path):
+    """Dos procesos (dos Limitador) con la misma BD de cubetas comparten el presupuesto"""
+    from limites import CubetasSQLite, Limitador
+    
+    ruta = tmp_path / "limites.db"
+    workers = [Limitador({"book": (3, 0.01)}, CubetasSQLite(ruta)) for _ in range(2)]
+    resultados = []
+    for i in range(4):
+        worker = workers[i % 2]
+        rechazo = worker.admitir("book", "10.0.0.1")
+        resultados.append(rechazo)
+        if rechazo is None:
+            worker.terminar()
+    
+    assert resultados[:3] == [None, None, None]
+    assert resultados[3] == (429, "ip", 100)
+
+
+def test_cubetas_sqlite_purga_y_cuenta_entre_hilos(tmp_path):
+    """Con consumos concurrentes cada clave da exactamente `capacidad` permisos y la purga borra las viejas"""
+    import sqlite3
+    import time
+    from collections import Counter
+    from concurrent.futures import ThreadPoolExecutor
+    from limites import CubetasSQLite
+    
+    ruta = tmp_path / "limites.db"
+    cubetas = CubetasSQLite(ruta, purgar_cada=10)
+    conn = sqlite3.connect(ruta)
+    with conn:
+        conn.executemany("INSERT INTO cubetas VALUES (?, 5, ?)",
+                         [(f"vieja-{i}", time.time() - 7200) for i in range(50)])
+    
+    claves = [f"ip-{i % 8}" for i in range(160)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        permitidos = list(pool.map(lambda clave: cubetas.consumir(clave, 5, 0.0001), claves))
+    
+    assert Counter(c for c, ok in zip(claves, permitidos) if ok) == {f"ip-{i}": 5 for i in range(8)}
+    assert sorted(r[0] for r in conn.execute("SELECT clave FROM cubetas")) == [f"ip-{i}" for i in range(8)]
+    conn.close()
+
+
+def test_assets_compilados_con_huella(base_datos, tmp_path):
+    """Las páginas enlazan los assets con huella, servidos precomprimidos y con caché de un año"""
+    import gzip
+    
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "ASSETS_DIR": str(tmp_path), "ASSETS_COMPILAR": True})
+    client = app.test_client()
+    manifiesto = app.extensions["assets"]["manifiesto"]
+    html = client.get("/").get_data(as_text=True)
+    assert f"/assets/{manifiesto['style.css']}" in html
+    assert f"/assets/{manifiesto['js/base.js']}" in html
+    
+    plano = client.get(f"/assets/{manifiesto['css/base.css']}")
+    assert plano.status_code == 200 and plano.mimetype == "text/css"
+    assert "immutable" in plano.headers["Cache-Control"] and "max-age=31536000" in plano.headers["Cache-Control"]
+    assert plano.headers["Vary"] == "Accept-Encoding"
+    comprimido = client.get(f"/assets/{manifiesto['css/base.css']}", headers={"Accept-Encoding": "gzip"})
+    assert comprimido.headers["Content-Encoding"] == "gzip" and comprimido.mimetype == "text/css"
+    assert gzip.decompress(comprimido.data) == plano.data
+    
+    # Sin compilar, las plantillas caen a /static/
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "ASSETS_DIR": str(tmp_path / "vacio")})
+    assert "/static/style.css" in app.test_client().get("/").get_data(as_text=True)
+
+
+def test_minificar_css_respeta_selectores_descendientes():
+    """Los espacios tras ':' se quitan en las declaraciones, no en selectores como 'a :hover'"""
+    from assets import minificar_css
+    
+    css = "a :hover { color: red ; }\n@media (max-width: 768px) { .x :not(.y) { margin : 0 auto; } }"
+    assert minificar_css(css) == "a :hover{color:red}@media (max-width: 768px){.x :not(.y){margin:0 auto}}"
+
+
+def test_compresion_y_etag(base_datos):
+    """Las páginas salen comprimidas si el cliente lo acepta y con ETag débil; sin cambios, 304"""
+    import gzip
+    
+    app = create_app({"TESTING": True, "DATABASE": base_datos,
+                      "COMPRESION_RUTAS": {"hotel.search_matriz": {"comprimir": False}}})
+    client = app.test_client()
+    plano = client.get("/")
+    assert plano.headers["ETag"].startswith('W/"') and "Content-Encoding" not in plano.headers
+    comprimido = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert comprimido.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(comprimido.data) == plano.data
+    assert comprimido.headers["ETag"] == plano.headers["ETag"]
+    
+    no_modificado = client.get("/", headers={"If-None-Match": plano.headers["ETag"]})
+    assert no_modificado.status_code == 304 and no_modificado.data == b""
+    
+    matriz = client.get("/search/matriz?start_date=2026-02-01&end_date=2026-02-03&flex=7",
+                        headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in matriz.headers and "ETag" in matriz.headers
+    resumen = client.get("/metrics/compresion.json").get_json()
+    assert resumen["no_modificadas"] == 1
+    assert resumen["codificaciones"]["gzip"]["respuestas"] == 1
+
+
+def test_booking_reutiliza_fragmentos(authenticated_client):
+    """La segunda página de pago copia el marco de booking.html desde la caché de fragmentos"""
+    client = authenticated_client
+    fragmentos = client.application.jinja_env.fragmentos
+    primera = client.post("/book", data={"room_id": "2", "start_date": "2026-09-01", "end_date": "2026-09-03"})
+    claves = {c[1] for c in fragmentos._fragmentos if c[0] == "booking.html"}
+    assert claves == {"encabezado_pago", "metodos_pago", "acciones_pago", "procesando"}
+    
+    aciertos = fragmentos.aciertos
+    segunda = client.post("/book", data={"room_id": "3", "start_date": "2026-09-01", "end_date": "2026-09-03"})
+    # 4 fragmentos de booking.html y 3 de base.html
+    assert fragmentos.aciertos - aciertos == 7
+    assert "PROCESS PAYMENT" in segunda.get_data(as_text=True)
+    assert primera.get_data(as_text=True).count("method-card") == segunda.get_data(as_text=True).count("method-card") == 3
+
+
+def test_plantillas_bytecode_fragmentos_y_streaming(base_datos, tmp_path):
+    """Bytecode en disco, cabecera en caché por usuario y /search transmitido por partes"""
+    app = create_app({"TESTING": True, "DATABASE": base_datos, "PLANTILLAS_CACHE_DIR": str(tmp_path),
+                      "STREAM_MINIMO": 1})
+    assert list(tmp_path.glob("__jinja2_*.cache"))
+    client = app.test_client()
+    fragmentos = app.jinja_env.fragmentos
+    
+    anonimo = client.get("/").get_data(as_text=True)
+    assert client.get("/").get_data(as_text=True) == anonimo
+    assert fragmentos.resumen()["aciertos"] >= 3
+    
+    client.post("/register", data={"username": "test_fragmento", "password": "clave"})
+    client.post("/login", data={"username": "test_fragmento", "password": "clave"})
+    response = client.post("/search", data={"start_date": "2026-02-01", "end_date": "2026-02-03",
+                                            "room_type": "simple"})
+    assert response.is_streamed
+    html = response.get_data(as_text=True)
+    assert "test_fragmento" in html and "CERRAR SESIÓN" in html
+    assert "Habitaciones Disponibles" in html and "Bienvenido, test_fragmento!" in html
+    # El flash del login se consumió antes del streaming y no vuelve a aparecer
+    assert "Bienvenido" not in client.get("/").get_data(as_text=True)
+
+
+# ==============================================================================
+# TESTS DE DASHBOARD DE MÉTRICAS
+# ==============================================================================
+
+def test_metrics_resumen_json(client):
+    """El resumen de métricas se calcula bajo demanda desde el CSV de defectos"""
+    response = client.get("/metrics/resumen.json")
+    
+    assert response.status_code == 200
+    assert response.headers.get("ETag")
+    data = response.get_json()
+    assert "metricas" in data
+    assert "criterios_salida" in data
+
+
+def test_metrics_resumen_not_modified(client):
+    """Con If-None-Match igual al ETag actual se responde 304 sin cuerpo"""
+    etag = client.get("/metrics/resumen.json").headers["ETag"]
+    
+    response = client.get("/metrics/resumen.json", headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_metrics_resumen_refreshes_on_csv_change(tmp_path):
+    """Al cambiar el mtime del CSV se recalcula en segundo plano"""
+    import os
+    from metricas_live import MetricasEnVivo
+    
+    csv = tmp_path / "defectos.csv"
+    csv.write_text("x")
+    llamadas = []
+    cache = MetricasEnVivo(csv, calcular=lambda ruta: llamadas.append(ruta) or {"n": len(llamadas)})
+    
+    _, etag1 = cache.obtener()
+    os.utime(csv, ns=(0, 0))
+    cache.obtener()  # dispara el recálculo, sirve la versión anterior
+    cache.esperar(5)
+    _, etag2 = cache.obtener()
+    
+    assert len(llamadas) == 2
+    assert etag1 != etag2
+
+
+def test_metrics_dashboard_served(client):
+    """El dashboard estático se sirve desde la aplicación"""
+    response = client.get("/metrics/dashboard/")
+    assert response.status_code == 200
+    assert b"CYBER METRICS" in response.data
+
+
+def test_metrics_dashboard_no_publica_bases_ni_caches(client):
+    """Solo HTML/CSS/JS/JSON del dashboard e imágenes de figs; BDs y cachés dan 404"""
+    assert client.get("/metrics/dashboard/metricas_resumen.json").status_code == 200
+    for ruta in ("dashboard/historial_metricas.db", "dashboard/resultados_pruebas.db",
+                 "dashboard/cubo_defectos.npz", "dashboard/.dashboard_metricas_cyber.html.sha256",
+                 "figs/.cache_graficos.json"):
+        assert client.get(f"/metrics/{ruta}").status_code == 404
+
+
 # ==============================================================================
 # TESTS DE INTEGRACIÓN
 # ==============================================================================
@@ -0,0 +1,538 @@
+import pytest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar el directorio metrics al path
+sys.path.insert(0, str(Path(__file__).parent.parent / "metrics"))
+
+from sistema_metricas import MetricasTesting, DATA
+from resolucion import AnalisisResolucion
+
+
+@pytest.fixture
+def df_defectos():
+    """Dataset de defectos real del proyecto"""
+    return pd.read_csv(DATA)
+
+
+# ==============================================================================
+# TESTS DE RESOLUCIÓN
+# ==============================================================================
+
+def test_tiempo_promedio_usa_resolved_days(df_defectos):
+    """El tiempo promedio es la media real de resolved_days de los defectos cerrados"""
+    metricas = MetricasTesting(df_defectos)
+    cerrados = df_defectos[df_defectos["status"].isin(["fixed", "closed"])]
+
+    assert metricas.calcular_tiempo_promedio_resolucion() == round(cerrados["resolved_days"].mean(), 2)
+    # Determinista: dos cálculos consecutivos dan el mismo valor
+    assert metricas.calcular_tiempo_promedio_resolucion() == MetricasTesting(df_defectos).calcular_tiempo_promedio_resolucion()
+
+
+def test_tasa_retest_usa_reopened(df_defectos):
+    """La tasa de retest es el porcentaje real de defectos reabiertos"""
+    metricas = MetricasTesting(df_defectos)
+    esperado = round((df_defectos["reopened"] > 0).mean() * 100, 2)
+
+    assert metricas.calcular_tasa_retest() == esperado
+
+
+def test_percentiles_por_modulo_coinciden_con_numpy(df_defectos):
+    """Los percentiles derivados del histograma son iguales a np.percentile sobre las filas"""
+    por_modulo = AnalisisResolucion(df_defectos).resumen(por="module")
+
+    for modulo, stats in por_modulo.items():
+        filas = df_defectos[(df_defectos["module"] == modulo) & df_defectos["status"].isin(["fixed", "closed"])]
+        p50, p90, p95 = np.percentile(filas["resolved_days"], [50, 90, 95])
+        assert stats["p50_dias"] == round(p50, 2)
+        assert stats["p90_dias"] == round(p90, 2)
+        assert stats["p95_dias"] == round(p95, 2)
+        assert stats["defectos"] == (df_defectos["module"] == modulo).sum()
+
+
+def test_histograma_suma_cerrados(df_defectos):
+    """El histograma de días cubre todos los defectos cerrados"""
+    analisis = AnalisisResolucion(df_defectos)
+
+    assert sum(analisis.histograma().values()) == analisis.resumen()["cerrados"]
+
+
+def test_histograma_suma_dias_fraccionarios_en_su_bin():
+    """Días fraccionarios caen en el bin de su día completo y se suman a los enteros del mismo bin"""
+    df = pd.DataFrame({
+        "module": ["auth", "auth", "auth", "pagos", "pagos"],
+        "severity": ["low"] * 5,
+        "env": ["prod"] * 5,
+        "status": ["fixed", "closed", "fixed", "fixed", "open"],
+        "resolved_days": [2.0, 2.5, 3.75, 2.9, 1.0],
+        "reopened": [0] * 5,
+    })
+    analisis = AnalisisResolucion(df)
+
+    assert analisis.histograma() == {2: 3, 3: 1}
+    assert analisis.histograma(por="module") == {"auth": {2: 2, 3: 1}, "pagos": {2: 1, 3: 0}}
+
+
+# ==============================================================================
+# TESTS DEL CUBO DE AGREGACIÓN
+# ==============================================================================
+
+def test_cubo_append_incremental_equivale_a_construccion_completa(df_defectos):
+    """Agregar filas por partes produce el mismo cubo que construirlo de una vez"""
+    from cubo import CuboDefectos
+
+    completo = CuboDefectos.desde_dataframe(df_defectos)
+    incremental = CuboDefectos.desde_dataframe(df_defectos.iloc[250:])
+    incremental.agregar(df_defectos.iloc[:250])
+
+    assert incremental.contar() == len(df_defectos)
+    for modulo in completo.categorias["module"]:
+        assert incremental.contar(module=modulo, status=["new", "open"]) == \
+               completo.contar(module=modulo, status=["new", "open"])
+    assert incremental.serie("day").equals(completo.serie("day"))
+
+
+def test_cubo_persistencia(df_defectos, tmp_path):
+    """El cubo guardado en disco responde las mismas consultas"""
+    from cubo import CuboDefectos
+
+    csv = tmp_path / "defectos.csv"
+    df_defectos.to_csv(csv, index=False)
+    original = CuboDefectos.cargar_o_construir(csv, tmp_path / "cubo.npz")
+    cargado = CuboDefectos.cargar_o_construir(csv, tmp_path / "cubo.npz")
+
+    assert cargado.metadatos["firma"] == original.metadatos["firma"]
+    assert cargado.contar(severity="critical") == (df_defectos["severity"] == "critical").sum()
+
+
+def test_cubo_descarta_filas_sin_fecha_o_categoria(df_defectos, tmp_path):
+    """Una fecha o categoría vacía no rompe el cubo: esas filas se omiten y se informan"""
+    from cubo import CuboDefectos
+
+    muestra = df_defectos.iloc[:20].copy()
+    muestra.loc[muestra.index[3], "date"] = None
+    muestra.loc[muestra.index[7], "module"] = None
+    cubo = CuboDefectos.desde_dataframe(muestra)
+
+    assert cubo.descartadas == 2
+    assert cubo.contar() == 18
+    validas = muestra.drop(index=muestra.index[[3, 7]])
+    assert cubo.contar(status=["new", "open"]) == validas["status"].isin(["new", "open"]).sum()
+
+    csv = tmp_path / "defectos.csv"
+    muestra.to_csv(csv, index=False)
+    CuboDefectos.cargar_o_construir(csv, tmp_path / "cubo.npz")
+    assert CuboDefectos.cargar_o_construir(csv, tmp_path / "cubo.npz").descartadas == 2
+
+
+def test_tendencia_desde_cubo_coincide_con_filas(df_defectos):
+    """detectar_tendencia (sobre el cubo) cuenta lo mismo que filtrar las filas por día"""
+    metricas = MetricasTesting(df_defectos)
+    tendencia, _ = metricas.detectar_tendencia(dias=5)
+
+    fechas = pd.to_datetime(df_defectos["date"])
+    for _, fila in tendencia.iterrows():
+        del_dia = df_defectos[fechas.dt.strftime("%Y-%m-%d") == fila["day"]]
+        assert fila["new"] == del_dia["status"].isin(["new", "open"]).sum()
+        assert fila["closed"] == del_dia["status"].isin(["fixed", "closed"]).sum()
+
+
+# ==============================================================================
+# TESTS DEL HISTÓRICO DE MÉTRICAS
+# ==============================================================================
+
+def _resumen(timestamp, resolucion, aprobado=True):
+    return {
+        "timestamp": timestamp,
+        "metricas": {"tasa_resolucion": resolucion, "tendencia_defectos": "ESTABLE ~"},
+        "criterios_salida": {"cumplidos": 6, "total": 8, "porcentaje": 75.0, "aprobado": aprobado},
+    }
+
+
+def test_historial_serie_y_releases(tmp_path):
+    """Los snapshots se consultan como serie temporal y agrupados por release"""
+    from historial import HistorialMetricas
+
+    historial = HistorialMetricas(tmp_path / "historial.db")
+    historial.guardar_lote([
+        (_resumen("2025-10-01T10:00:00", 60.0), "a.csv", "v1"),
+        (_resumen("2025-10-02T10:00:00", 70.0), "a.csv", "v1"),
+        (_resumen("2025-10-10T10:00:00", 90.0), "a.csv", "v2"),
+    ])
+
+    assert historial.serie("tasa_resolucion", desde="2025-10-02") == [
+        ("2025-10-02T10:00:00", 70.0), ("2025-10-10T10:00:00", 90.0)]
+    releases = historial.por_release("tasa_resolucion")
+    assert [r["release"] for r in releases] == ["v1", "v2"]
+    assert releases[0]["promedio"] == 65.0
+    assert releases[0]["ultimo"] == 70.0
+
+
+def test_historial_compactar_promedia_por_dia(tmp_path):
+    """La retención reemplaza los snapshots antiguos por uno promedio por día"""
+    from datetime import datetime
+    from historial import HistorialMetricas
+
+    historial = HistorialMetricas(tmp_path / "historial.db")
+    historial.guardar_lote([
+        (_resumen("2025-01-01T08:00:00", 50.0), "a.csv", ""),
+        (_resumen("2025-01-01T20:00:00", 70.0), "a.csv", ""),
+        (_resumen("2025-06-01T08:00:00", 80.0), "a.csv", ""),
+    ])
+
+    compactados = historial.compactar(antiguedad_dias=30, ahora=datetime(2025, 6, 2))
+
+    assert compactados == 2
+    assert historial.serie("tasa_resolucion") == [
+        ("2025-01-01T08:00:00", 60.0), ("2025-06-01T08:00:00", 80.0)]
+
+
+# ==============================================================================
+# TESTS DEL CLI DE MÉTRICAS
+# ==============================================================================
+
+def test_cli_criteria_desde_json_no_importa_modulos_pesados(tmp_path):
+    """`criteria --desde-json` devuelve el código de salida sin cargar pandas ni matplotlib"""
+    import json
+    import subprocess
+
+    resumen = tmp_path / "resumen.json"
+    resumen.write_text(json.dumps({"criterios_salida": {"cumplidos": 5, "total": 8, "porcentaje": 62.5,
+                                                        "aprobado": False, "detalle": {}}}))
+    metrics_dir = Path(__file__).parent.parent / "metrics"
+    codigo = (
+        f"import sys; sys.path.insert(0, {str(metrics_dir)!r}); import metricas_cli; "
+        f"c = metricas_cli.main(['criteria', '--desde-json', {str(resumen)!r}, '-q']); "
+        "print(c, 'pandas' in sys.modules, 'matplotlib' in sys.modules)"
+    )
+    salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+
+    assert salida.stdout.split() == ["1", "False", "False"]
+
+
+# ==============================================================================
+# TESTS DEL MOTOR DE CRITERIOS DE SALIDA
+# ==============================================================================
+
+def test_criterios_desde_config_explican_cada_resultado(df_defectos):
+    """Los criterios configurados dan un resultado y una explicación por criterio"""
+    metricas = MetricasTesting(df_defectos)
+    metricas.calcular_todas_metricas(48, 50, 19, 1)
+    metricas.detectar_tendencia(dias=5)
+    criterios = metricas.criterios_salida()
+
+    assert criterios["total"] == 8
+    assert criterios["cumplidos"] == sum(criterios["criterios"].values())
+    assert set(criterios["explicaciones"]) == set(criterios["criterios"])
+    assert criterios["explicaciones"]["1. Cobertura de pruebas >= 90%"] == "cobertura_pruebas = 96 (>= 90) ✓"
+
+
+def test_motor_criterios_evalua_lote_vectorizado():
+    """Un lote de candidatos se evalúa en una llamada; faltantes usan el valor por defecto"""
+    from criterios import MotorCriterios
+
+    motor = MotorCriterios({
+        "minimo_cumplidos": 2,
+        "criterios": [
+            {"nombre": "cobertura", "metrica": "cobertura_pruebas", "op": ">=", "umbral": 90, "defecto": 0},
+            {"nombre": "criticos", "cualquiera": [
+                {"metrica": "densidad_criticos", "op": "==", "umbral": 0, "defecto": 100},
+                {"metrica": "criticos_abiertos", "op": "==", "umbral": 0}]},
+            {"nombre": "tendencia", "metrica": "tendencia_defectos", "op": "contiene",
+             "umbral": "DESCENDENTE", "defecto": ""},
+        ],
+    })
+    candidatos = pd.DataFrame({
+        "cobertura_pruebas": np.tile([95.0, 80.0], 500),
+        "densidad_criticos": np.tile([5.0, 0.0], 500),
+        "criticos_abiertos": np.tile([0, 3], 500),
+        "tendencia_defectos": np.tile(["DESCENDENTE ↓", None], 500),
+    })
+
+    resultado = motor.evaluar_lote(candidatos)
+
+    assert len(resultado) == 1000
+    assert resultado.cumplidos[:2].tolist() == [3, 1]
+    assert resultado.aprobados.sum() == 500
+    assert resultado.detalle(1)["explicaciones"]["criticos"] == \
+        "densidad_criticos = 0 (== 0) ✓ o criticos_abiertos = 3 (== 0) ✗"
+
+
+# ==============================================================================
+# TESTS DEL ALMACÉN DE RESULTADOS DE PYTEST
+# ==============================================================================
+
+def _correr_muestra(tmp_path, *opciones, entorno=None):
+    """Corre en un subproceso una suite chica (un TC-900, un fallo, un omitido) con el plugin cargado"""
+    import os
+    import subprocess
+
+    (tmp_path / "test_muestra.py").write_text(
+        "import pytest\n"
+        "def test_ok():\n    '''TC-900: pasa'''\n"
+        "def test_falla():\n    assert False\n"
+        "@pytest.mark.skip\ndef test_omitido():\n    pass\n"
+    )
+    env = {k: v for k, v in os.environ.items() if k != "PYTEST_RESULTADOS_DB"}
+    env["PYTHONPATH"] = str(Path(__file__).parent.parent / "metrics")
+    return subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "pytest_resultados", *opciones],
+                          cwd=tmp_path, env={**env, **(entorno or {})}, capture_output=True)
+
+
+def _casos_registrados(db):
+    import sqlite3
+    conn = sqlite3.connect(db)
+    try:
+        return dict(conn.execute("SELECT nodeid, caso FROM resultados"))
+    finally:
+        conn.close()
+
+
+def test_plugin_registra_resultados_y_cobertura(df_defectos, tmp_path):
+    """El plugin guarda cada resultado y MetricasTesting calcula la cobertura con esos conteos"""
+    from resultados_pruebas import ResultadosPruebas
+
+    db = tmp_path / "resultados.db"
+    _correr_muestra(tmp_path, "--resultados-db-ruta", str(db))
+
+    conteos = ResultadosPruebas(db).conteos()
+    assert conteos["total"] == 3
+    assert conteos["ejecutados"] == 2
+    assert conteos["resultados"] == {"passed": 1, "failed": 1, "skipped": 1}
+    assert [d["nodeid"] for d in ResultadosPruebas(db).duraciones()] != []
+    assert _casos_registrados(db)["test_muestra.py::test_ok"] == "TC-900"
+
+    metricas = MetricasTesting(df_defectos)
+    assert metricas.casos_desde_resultados(db) == (2, 3)
+    assert metricas.calcular_cobertura(*metricas.casos_desde_resultados(db)) == 66.67
+
+
+def test_plugin_no_registra_sin_opcion_ni_variable(tmp_path):
+    """Sin --resultados-db ni PYTEST_RESULTADOS_DB el almacén de métricas no se toca"""
+    from resultados_pruebas import RUTA_RESULTADOS
+
+    antes = RUTA_RESULTADOS.stat().st_mtime_ns if RUTA_RESULTADOS.exists() else None
+    _correr_muestra(tmp_path)
+    assert (RUTA_RESULTADOS.stat().st_mtime_ns if RUTA_RESULTADOS.exists() else None) == antes
+    # Sin registro el plugin tampoco agrega propiedades a los tests
+    (tmp_path / "test_propiedades.py").write_text(
+        "def test_sin_propiedades(request):\n    '''TC-901'''\n    assert request.node.user_properties == []\n")
+    assert _correr_muestra(tmp_path, "test_propiedades.py").returncode == 0
+    (tmp_path / "test_propiedades.py").unlink()
+
+    db = tmp_path / "por_entorno.db"
+    _correr_muestra(tmp_path, entorno={"PYTEST_RESULTADOS_DB": str(db)})
+    assert len(_casos_registrados(db)) == 3
+
+    _correr_muestra(tmp_path, "--sin-resultados", entorno={"PYTEST_RESULTADOS_DB": str(tmp_path / "otra.db")})
+    assert not (tmp_path / "otra.db").exists()
+
+
+def test_plugin_opcion_no_toma_la_ruta_de_tests(tmp_path):
+    """`--resultados-db` es un flag: el argumento siguiente sigue siendo la ruta de tests"""
+    (tmp_path / "test_otro.py").write_text("def test_otro():\n    pass\n")
+    db = tmp_path / "resultados.db"
+    _correr_muestra(tmp_path, "--resultados-db-ruta", str(db), "--resultados-db", "test_muestra.py")
+
+    assert sorted(_casos_registrados(db)) == ["test_muestra.py::test_falla", "test_muestra.py::test_ok",
+                                              "test_muestra.py::test_omitido"]
+
+
+def test_plugin_con_xdist_conserva_casos(tmp_path):
+    """Con pytest-xdist los casos TC-xxx llegan desde los workers en los reportes"""
+    pytest.importorskip("xdist")
+    from resultados_pruebas import ResultadosPruebas
+
+    db = tmp_path / "resultados.db"
+    _correr_muestra(tmp_path, "-n", "2", "--resultados-db-ruta", str(db))
+
+    assert ResultadosPruebas(db).conteos()["total"] == 3
+    assert _casos_registrados(db) == {"test_muestra.py::test_ok": "TC-900",
+                                      "test_muestra.py::test_falla": "",
+                                      "test_muestra.py::test_omitido": ""}
+
+
+# ==============================================================================
+# TESTS DEL MOTOR DE REGLAS DE MEJORA DEL DATASET
+# ==============================================================================
+
+def _reglas_fila_a_fila(df):
+    """Las reglas originales (antes de vectorizar), fila por fila, sin las ramas al azar"""
+    df = df.copy()
+    fechas = pd.to_datetime(df["date"])
+    abiertos = lambda: df["status"].isin(["new", "open"])
+    for idx in df[(df["severity"] == "critical") & abiertos()].index:
+        df.at[idx, "status"] = "fixed"
+    assert ((df["severity"] == "high") & abiertos()).sum() <= 2
+    necesitamos_cerrar = max(0, int(np.ceil(0.9 * len(df))) - df["status"].isin(["fixed", "closed"]).sum())
+    prioridad = []
+    for severidad in ["low", "medium", "high"]:
+        prioridad.extend(df[abiertos() & (df["severity"] == severidad)].index.tolist())
+    for idx in prioridad[:necesitamos_cerrar]:
+        df.at[idx, "status"] = "fixed"  # fixed o closed al azar en el original
+    recientes = fechas >= fechas.max() - pd.Timedelta(days=5)
+    assert (recientes & (df["status"] == "new")).sum() <= 2
+    assert (recientes & (df["status"] == "open")).sum() <= 3
+    return df
+
+
+def test_aplicar_reglas_misma_semilla_resultado_identico():
+    """Con la misma semilla el dataset mejorado es idéntico byte a byte; con otra, cambia"""
+    from mejorar_dataset import aplicar_reglas
+
+    # Dataset sin mejorar (el del proyecto ya pasó por las reglas): muchos abiertos, recientes incluidos
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": range(400),
+        "date": (pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 30, 400), unit="D")).strftime("%Y-%m-%d"),
+        "severity": rng.choice(["low", "medium", "high", "critical"], 400),
+        "status": rng.choice(["new", "open", "fixed", "closed"], 400),
+    })
+    original = df.copy()
+
+    primero, reporte = aplicar_reglas(df, seed=42)
+    segundo, reporte_2 = aplicar_reglas(df, seed=42)
+    otro, _ = aplicar_reglas(df, seed=7)
+
+    assert primero.to_csv(index=False).encode() == segundo.to_csv(index=False).encode()
+    assert reporte == reporte_2
+    assert not primero.equals(otro)
+    assert df.equals(original)
+
+
+def test_aplicar_reglas_coincide_con_reglas_fila_a_fila():
+    """En un dataset chico, la versión vectorizada cierra los mismos defectos que las reglas originales"""
+    from mejorar_dataset import CERRADOS, aplicar_reglas
+
+    estados = ["fixed", "closed"] * 6 + ["open", "new"] + ["open", "new"] + ["new", "open", "new", "open", "new"] \
+              + ["open", "new", "open", "new", "open", "new", "open", "new", "open"]
+    severidades = ["low"] * 12 + ["critical"] * 2 + ["high"] * 2 + ["low"] * 5 + ["medium"] * 9
+    df = pd.DataFrame({
+        "id": range(30),
+        "date": pd.date_range("2025-01-01", periods=30).strftime("%Y-%m-%d"),
+        "severity": severidades,
+        "status": estados,
+    })
+    # Los últimos días quedan cerrados para que las reglas al azar (recientes) no actúen
+    df.loc[24:, "status"] = "closed"
+
+    vectorizado, reporte = aplicar_reglas(df, seed=1)
+    esperado = _reglas_fila_a_fila(df)
+
+    cerrados = vectorizado["status"].isin(CERRADOS)
+    assert cerrados.equals(esperado["status"].isin(CERRADOS))
+    sin_azar = ~(cerrados & ~df["status"].isin(CERRADOS) & (df["severity"] != "critical"))
+    assert vectorizado["status"][sin_azar].equals(esperado["status"][sin_azar])
+    assert dict(reporte)["Cerrar TODOS los defectos críticos abiertos"] == 2
+
+
+# ==============================================================================
+# TESTS DEL MODO LOTE
+# ==============================================================================
+
+def test_lote_consolida_datasets_y_reporta_el_roto(df_defectos, tmp_path, monkeypatch):
+    """Un dataset roto queda como error en el consolidado sin abortar el resto del lote"""
+    import json
+    import metricas_lote
+    from historial import HistorialMetricas
+
+    origen = tmp_path / "datasets"
+    origen.mkdir()
+    df_defectos.iloc[:200].to_csv(origen / "release_a.csv", index=False)
+    df_defectos.iloc[200:].to_csv(origen / "release_b.csv", index=False)
+    (origen / "roto.csv").write_text("id,date\n1,no-es-fecha\n", encoding="utf-8")
+    historial = tmp_path / "historial.db"
+    monkeypatch.setattr(metricas_lote, "HistorialMetricas", lambda: HistorialMetricas(historial))
+
+    salida = tmp_path / "consolidado.json"
+    consolidado = metricas_lote.main_lote(origen, workers=2, salida=salida)
+
+    assert consolidado["datasets"] == {**consolidado["datasets"], "total": 3, "procesados": 2, "fallidos": 1}
+    assert sorted(Path(d).name for d in consolidado["resultados"]) == ["release_a.csv", "release_b.csv"]
+    assert consolidado["defectos_totales"] == len(df_defectos)
+    assert [Path(f["dataset"]).name for f in consolidado["fallos"]] == ["roto.csv"]
+    assert consolidado["fallos"][0]["error"]
+    assert json.loads(salida.read_text(encoding="utf-8"))["datasets"]["fallidos"] == 1
+
+
+# ==============================================================================
+# TESTS DE LA CACHÉ DE GRÁFICOS
+# ==============================================================================
+
+def test_graficos_sin_cambios_no_se_reescriben(tmp_path):
+    """Con los mismos datos los PNG no se tocan; al cambiar un gráfico solo se re-renderiza ese"""
+    import os
+    from graficos import renderizar_graficos
+
+    datos = {
+        "trend": {"day": ["2025-01-01", "2025-01-02"], "new": [3, 1], "closed": [1, 4], "open": [2, 1]},
+        "severity": {"labels": ["critical", "high", "medium", "low"], "counts": [1, 2, 5, 9]},
+        "status": {"labels": ["new", "open", "fixed", "closed"], "counts": [2, 3, 7, 5]},
+        "semaforo": {"nombres": ["Cobertura", "Resolución"], "valores": [92.0, 80.0], "umbral": [90, 85]},
+    }
+    assert sorted(renderizar_graficos(datos, tmp_path, paralelo=False)) == ["semaforo", "severity", "status", "trend"]
+    pngs = sorted(tmp_path.glob("*.png"))
+    for png in pngs:
+        os.utime(png, ns=(1, 1))  # mtime fijo: cualquier reescritura lo cambia
+
+    assert renderizar_graficos(datos, tmp_path, paralelo=False) == []
+    assert [p.stat().st_mtime_ns for p in pngs] == [1] * 4
+
+    datos["severity"]["counts"] = [0, 2, 5, 9]
+    assert renderizar_graficos(datos, tmp_path, paralelo=False) == ["severity"]
+    assert {p.name for p in pngs if p.stat().st_mtime_ns != 1} == {"severity.png"}
+
+
+# ==============================================================================
+# TESTS DEL GENERADOR DE DASHBOARD
+# ==============================================================================
+
+def _contexto_dashboard(resolucion=90.0):
+    from dashboard import construir_contexto
+
+    criterios = {"cumplidos": 1, "total": 2, "porcentaje": 50.0, "aprobado": False,
+                 "criterios": {"Cobertura": True, "Resolución": False}}
+    return construir_contexto({"cobertura_pruebas": 95.0, "tasa_resolucion": resolucion,
+                               "tendencia_defectos": "DESCENDENTE"}, criterios)
+
+
+def test_dashboard_sin_cambios_no_se_reescribe(tmp_path):
+    """Si las métricas no cambiaron (el timestamp no cuenta) el HTML no se vuelve a escribir"""
+    import os
+    from dashboard import HOJA_ESTILOS, GeneradorDashboard
+
+    generador = GeneradorDashboard(tmp_path)
+    assert generador.escribir(_contexto_dashboard()) is True
+    assert (tmp_path / HOJA_ESTILOS).exists()
+    os.utime(generador.ruta, ns=(1, 1))
+
+    otro_momento = _contexto_dashboard()
+    otro_momento["encabezado"]["timestamp"] = "2000-01-01 00:00:00"
+    assert GeneradorDashboard(tmp_path).escribir(otro_momento) is False
+    assert generador.ruta.stat().st_mtime_ns == 1
+
+    assert GeneradorDashboard(tmp_path).escribir(_contexto_dashboard(resolucion=70.0)) is True
+    assert "70.0" in generador.ruta.read_text(encoding="utf-8")
+
+
+def test_dashboard_solo_re_renderiza_secciones_cambiadas(tmp_path, monkeypatch):
+    """Entre dos render, las secciones con el mismo contexto salen de la caché"""
+    import dashboard
+
+    generador = dashboard.GeneradorDashboard(tmp_path)
+    generador.render(_contexto_dashboard())
+    renderizadas = []
+    obtener = dashboard._entorno.get_template
+    monkeypatch.setattr(dashboard._entorno, "get_template",
+                        lambda nombre: renderizadas.append(nombre) or obtener(nombre))
+
+    html = generador.render(_contexto_dashboard(resolucion=70.0))
+
+    # El encabezado cambia (timestamp) y las métricas también; gráficos y criterios se reutilizan
+    assert set(renderizadas) - {"dashboard_cyber.html"} <= {"_encabezado.html", "_metricas.html"}
+    assert "_metricas.html" in renderizadas
+    assert "_graficos.html" not in renderizadas and "_criterios.html" not in renderizadas
+    assert "70.0" in html